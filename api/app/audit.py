@@ -0,0 +1,252 @@
+"""
+Data-integrity audit of player_game_stats.
+
+    python -m app.audit
+    python -m app.audit --sample 50 --out /tmp/audit.json
+
+StatBase only validates lines written through the API; rows loaded by
+seed.py, by hand or by older code are never checked, and the table's CHECK
+constraints only cover non-negativity. The audit re-applies the StatBase
+rules to every row, finds stat rows whose player or game no longer exists
+or belongs to another team than the line, lists games that share an
+opponent and date, and compares player_totals with the sums of each
+player's lines (POST /stats/totals/rebuild repairs drift). With --team only
+that team's rows are checked. The command line audits every shard in
+SHARDS as well as DATABASE_URL and reports each under its shard name.
+
+The stats table is split into primary-key ranges scanned in parallel on a
+process pool. Each range is one aggregate query that the database answers
+in a single pass, so only counts (and a capped sample of failing rows)
+come back to Python. Also exposed as POST /stats/audit.
+"""
+import argparse
+import asyncio
+import concurrent.futures
+import json
+import math
+import multiprocessing
+import os
+import sys
+import time
+from sqlalchemy import and_, case, create_engine, func, or_, select, true
+from . import models
+from .settings import Settings
+from .totals import COUNTING_FIELDS
+
+# Row checks: name -> condition that is true for a failing row
+_stat = models.PlayerGameStat.__table__.c
+_player = models.Player.__table__.c
+_game = models.Game.__table__.c
+CHECKS = {
+    # same rules as StatBase.check_consistency
+    "negative": or_(*[_stat[f] < 0 for f in (
+        "at_bats", "hits", "singles", "doubles", "triples", "home_runs", "rbis",
+        "walks", "strikeouts", "sac_flies", "sac_bunts", "hit_by_pitches", "errors",
+    )]),
+    "hits_breakdown": _stat.hits != _stat.singles + _stat.doubles + _stat.triples + _stat.home_runs,
+    "hits_over_pa": _stat.hits > _stat.at_bats + _stat.hit_by_pitches + _stat.walks + _stat.sac_flies,
+    "orphan_player": _player.id.is_(None),
+    "orphan_game": _game.id.is_(None),
+    "team_mismatch": or_(_player.team_id != _stat.team_id, _game.team_id != _stat.team_id),
+}
+
+# Keep ranges big enough that per-query overhead doesn't dominate
+MIN_RANGE_ROWS = 50_000
+WORKERS = int(os.getenv("AUDIT_WORKERS", "0")) or os.cpu_count() or 1
+
+# ---------- worker side ----------
+_engines: dict = {}
+
+def _engine(url: str):
+    if url not in _engines:
+        _engines[url] = create_engine(url, pool_pre_ping=True)
+    return _engines[url]
+
+def _scan_from():
+    stats = models.PlayerGameStat.__table__
+    return stats.outerjoin(models.Player.__table__, _player.id == _stat.player_id) \
+                .outerjoin(models.Game.__table__, _game.id == _stat.game_id)
+
+def _team_filter(column, team_id: int | None):
+    return column == team_id if team_id is not None else true()
+
+def id_bounds(url: str, team_id: int | None) -> tuple[int | None, int | None, int]:
+    with _engine(url).connect() as conn:
+        return tuple(conn.execute(
+            select(func.min(_stat.id), func.max(_stat.id), func.count())
+            .where(_team_filter(_stat.team_id, team_id))
+        ).one())
+
+def audit_range(url: str, lo: int, hi: int, sample: int, team_id: int | None) -> dict:
+    """Failure counts for stat ids in [lo, hi), plus up to `sample` failing rows."""
+    in_range = and_(_stat.id >= lo, _stat.id < hi, _team_filter(_stat.team_id, team_id))
+    flags = [case((cond, 1), else_=0).label(name) for name, cond in CHECKS.items()]
+    with _engine(url).connect() as conn:
+        counts = conn.execute(
+            select(func.count(), *[func.coalesce(func.sum(f), 0) for f in flags])
+            .select_from(_scan_from()).where(in_range)
+        ).one()
+        rows, *failures = counts
+        result = {"rows": rows, "failures": dict(zip(CHECKS, map(int, failures))), "samples": []}
+        if sample and any(failures):
+            result["samples"] = [
+                dict(r) for r in conn.execute(
+                    select(_stat.id, _stat.player_id, _stat.game_id, _stat.at_bats, _stat.hits,
+                           _stat.singles, _stat.doubles, _stat.triples, _stat.home_runs,
+                           _stat.walks, _stat.hit_by_pitches, _stat.sac_flies, *flags)
+                    .select_from(_scan_from())
+                    .where(in_range, or_(*CHECKS.values()))
+                    .order_by(_stat.id).limit(sample)
+                ).mappings()
+            ]
+    return result
+
+def duplicate_games(url: str, team_id: int | None) -> list[dict]:
+    """A team's games that share an opponent and date, grouped."""
+    games = models.Game.__table__
+    dupes = select(_game.team_id, _game.opponent, _game.date) \
+        .where(_team_filter(_game.team_id, team_id)) \
+        .group_by(_game.team_id, _game.opponent, _game.date) \
+        .having(func.count() > 1).subquery()
+    groups: dict[tuple, list[int]] = {}
+    with _engine(url).connect() as conn:
+        for gid, opponent, when in conn.execute(
+            select(_game.id, _game.opponent, _game.date)
+            .select_from(games.join(dupes, and_(
+                dupes.c.team_id == _game.team_id,
+                dupes.c.opponent == _game.opponent, dupes.c.date == _game.date)))
+            .order_by(_game.date, _game.opponent, _game.team_id, _game.id)
+        ):
+            groups.setdefault((opponent, when), []).append(gid)
+    return [{"opponent": o, "date": d.isoformat(), "game_ids": ids} for (o, d), ids in groups.items()]
+
+def totals_drift(url: str, team_id: int | None, sample: int) -> tuple[int, list[dict]]:
+    """
+    Players whose player_totals row differs from the sums of their stat
+    lines (a missing row counts as zeros): how many, and (player, field,
+    stored, actual) entries for the first `sample` of them.
+    """
+    total = models.PlayerTotal.__table__
+    fields = ["games_played", *COUNTING_FIELDS]
+    sums = select(
+        _stat.player_id, func.count().label("games_played"),
+        *[func.sum(_stat[f]).label(f) for f in COUNTING_FIELDS],
+    ).group_by(_stat.player_id).subquery()
+    stored = [func.coalesce(total.c[f], 0) for f in fields]
+    actual = [func.coalesce(sums.c[f], 0) for f in fields]
+    drifted = select(_player.id, *stored, *actual) \
+        .select_from(models.Player.__table__
+                     .outerjoin(total, total.c.player_id == _player.id)
+                     .outerjoin(sums, sums.c.player_id == _player.id)) \
+        .where(_team_filter(_player.team_id, team_id), or_(*[s != a for s, a in zip(stored, actual)]))
+    with _engine(url).connect() as conn:
+        players = conn.execute(select(func.count()).select_from(drifted.subquery())).scalar_one()
+        rows = conn.execute(drifted.order_by(_player.id).limit(sample)).all() if sample else []
+    drift = []
+    for pid, *values in rows:
+        for f, have, want in zip(fields, values[:len(fields)], values[len(fields):]):
+            if have != want:
+                drift.append({"player_id": pid, "field": f, "stored": int(have), "actual": int(want)})
+    return players, drift
+
+# ---------- process pool ----------
+_pool: concurrent.futures.ProcessPoolExecutor | None = None
+
+def pool() -> concurrent.futures.ProcessPoolExecutor:
+    """Spawned on first use, like the simulation pool, so workers don't
+    inherit the server's connections."""
+    global _pool
+    if _pool is None:
+        _pool = concurrent.futures.ProcessPoolExecutor(
+            max_workers=WORKERS, mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _pool
+
+def shutdown():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+def plan_ranges(lo: int | None, hi: int | None, rows: int, workers: int) -> list[tuple[int, int]]:
+    """Split ids lo..hi into [start, end) ranges, a few per worker for balance."""
+    if lo is None:
+        return []
+    count = max(1, min(workers * 4, math.ceil(rows / MIN_RANGE_ROWS)))
+    step = math.ceil((hi - lo + 1) / count)
+    return [(start, min(start + step, hi + 1)) for start in range(lo, hi + 1, step)]
+
+async def run(url: str, sample: int = 20, team_id: int | None = None) -> dict:
+    """
+    Audit the database at `url` (a sync SQLAlchemy URL), or only `team_id`'s
+    rows on it, and return the report.
+    """
+    started = time.perf_counter()
+    loop = asyncio.get_running_loop()
+    executor = pool()
+    lo, hi, rows = await loop.run_in_executor(executor, id_bounds, url, team_id)
+    ranges = plan_ranges(lo, hi, rows, WORKERS)
+    dupes, (drifted, drift), *results = await asyncio.gather(
+        loop.run_in_executor(executor, duplicate_games, url, team_id),
+        loop.run_in_executor(executor, totals_drift, url, team_id, sample),
+        *[loop.run_in_executor(executor, audit_range, url, a, b, sample, team_id) for a, b in ranges],
+    )
+
+    failures = {name: 0 for name in CHECKS}
+    samples = {name: [] for name in CHECKS}
+    for result in results:
+        for name, n in result["failures"].items():
+            failures[name] += n
+        for row in result["samples"]:
+            for name in CHECKS:
+                if row[name] and len(samples[name]) < sample:
+                    samples[name].append({k: v for k, v in row.items() if k not in CHECKS})
+    return {
+        "ok": not any(failures.values()) and not dupes and not drifted,
+        "rows_scanned": sum(r["rows"] for r in results),
+        "ranges": len(ranges),
+        "workers": WORKERS,
+        "failures": failures,
+        "samples": {name: rows for name, rows in samples.items() if rows},
+        "duplicate_games": dupes[:sample] if sample else [],
+        "duplicate_game_groups": len(dupes),
+        "totals_drift": drift,
+        "totals_drift_players": drifted,
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+
+async def run_shards(settings: Settings, sample: int = 20, team_id: int | None = None) -> dict:
+    """
+    Audit each of `settings`' shards in turn (only the shard `team_id` lives
+    on when it is one of the configured teams) and report them by name.
+    """
+    shards = settings.shard_settings()
+    team = next((t for t in settings.team_list if t.id == team_id), None)
+    if team is not None:
+        shards = {team.shard: shards[team.shard]}
+    reports = {}
+    for name, shard in shards.items():
+        reports[name] = await run(shard.database_url, sample, team_id)
+    return {"ok": all(r["ok"] for r in reports.values()), "shards": reports}
+
+def main():
+    ap = argparse.ArgumentParser(description="Check every stats row on every shard for integrity problems")
+    ap.add_argument("--sample", type=int, default=20, help="failing rows to include per check")
+    ap.add_argument("--out", help="write the JSON report here instead of stdout")
+    ap.add_argument("--team", type=int, help="only check this team id's rows (default: every team)")
+    args = ap.parse_args()
+
+    try:
+        report = asyncio.run(run_shards(Settings.from_env(), args.sample, args.team))
+    finally:
+        shutdown()
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    sys.exit(0 if report["ok"] else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from sqlalchemy.dialects import mysql, sqlite, postgresql
+from . import live, models, totals
+from .cache import DataVersion
+
+# Columns a stat line sets (StatCreate's counting fields)
+LINE_FIELDS = [
+    "at_bats","hits","singles","doubles","triples","home_runs",
+    "rbis","walks","strikeouts","sac_flies","hit_by_pitches","errors"
+]
+
+# Rows per multi-row INSERT on MySQL: keeps each statement well under
+# max_allowed_packet and its compile time bounded.
+MYSQL_ROWS_PER_STATEMENT = 500
+
+def upsert_statements(dialect: str, rows: list[dict]) -> list[tuple]:
+    """
+    (statement, parameters) pairs that write `rows` to player_game_stats
+    with INSERT ... ON DUPLICATE KEY UPDATE (MySQL) / ON CONFLICT DO UPDATE
+    (SQLite, Postgres) keyed on uq_player_game.
+
+    MySQL gets one multi-row INSERT per MYSQL_ROWS_PER_STATEMENT rows: the
+    8.0 form SQLAlchemy emits (VALUES (...) AS new ON DUPLICATE KEY UPDATE)
+    isn't one pymysql's executemany can rewrite into multi-row INSERTs, so
+    run as an executemany it would cost a round trip per row. The others
+    get a single-row statement run as an executemany, which the driver
+    steps through in-process.
+    """
+    table = models.PlayerGameStat.__table__
+    update_cols = [k for k in rows[0] if k not in ("player_id", "game_id", "team_id")]
+
+    if dialect == "mysql":
+        statements = []
+        for start in range(0, len(rows), MYSQL_ROWS_PER_STATEMENT):
+            stmt = mysql.insert(table).values(rows[start:start + MYSQL_ROWS_PER_STATEMENT])
+            stmt = stmt.on_duplicate_key_update({c: stmt.inserted[c] for c in update_cols})
+            statements.append((stmt, None))
+        return statements
+    if dialect in ("sqlite", "postgresql"):
+        insert = sqlite.insert if dialect == "sqlite" else postgresql.insert
+        stmt = insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["player_id", "game_id"],
+            set_={c: stmt.excluded[c] for c in update_cols},
+        )
+        return [(stmt, rows)]
+    raise RuntimeError(f"Bulk upsert not supported for dialect {dialect!r}")
+
+def upsert_stat_rows(db: Session, rows: list[dict]):
+    """
+    Write many player_game_stats rows (see upsert_statements). Each row
+    carries player_id, game_id, team_id and the counting columns to set;
+    all rows must carry the same columns. Does not commit.
+    """
+    if not rows:
+        return
+    for stmt, params in upsert_statements(db.get_bind().dialect.name, rows):
+        db.execute(stmt, params)
+
+def write_lines(db: Session, lines: dict[tuple[int, int], dict], team_id: int,
+                data_version: DataVersion, broker: live.LocalBroker) -> list[dict]:
+    """
+    Upsert one team's stat lines keyed by (player_id, game_id) in one
+    transaction: move player_totals by one summed delta per player, commit,
+    bump `data_version` and publish each change to the game's channel on
+    `broker`. Lines naming a player or game the team doesn't have are skipped
+    and reported. Returns one result dict per line.
+    """
+    player_ids = {pid for pid, _ in lines}
+    game_ids = {gid for _, gid in lines}
+
+    # plain rows, not ORM objects: they outlive the commit without a refresh per player
+    known_players = {p.id: p for p in db.execute(
+        select(models.Player.id, models.Player.first_name, models.Player.last_name)
+        .where(models.Player.id.in_(player_ids), models.Player.team_id == team_id)
+    )}
+    known_games = set(db.scalars(
+        select(models.Game.id).where(models.Game.id.in_(game_ids), models.Game.team_id == team_id)
+    ))
+    # Locked until commit, like POST /stats: deltas are computed from these
+    # rows, so a concurrent batch touching the same lines has to wait.
+    existing = {
+        (s.player_id, s.game_id): totals.stat_values(s)
+        for s in db.scalars(
+            select(models.PlayerGameStat).where(
+                models.PlayerGameStat.player_id.in_(player_ids),
+                models.PlayerGameStat.game_id.in_(game_ids),
+            ).with_for_update()
+        )
+    }
+
+    results, rows, changes = [], [], []
+    deltas: dict[int, dict] = {}
+    for (pid, gid), line in lines.items():
+        if pid not in known_players:
+            results.append({"player_id": pid, "game_id": gid, "status": "error", "detail": "Player not found"})
+            continue
+        if gid not in known_games:
+            results.append({"player_id": pid, "game_id": gid, "status": "error", "detail": "Game not found"})
+            continue
+        row = {"player_id": pid, "game_id": gid, "team_id": team_id, **{f: line[f] for f in LINE_FIELDS}}
+        rows.append(row)
+
+        old = existing.get((pid, gid))
+        new = {**(old or {f: 0 for f in totals.COUNTING_FIELDS}), **{f: row[f] for f in LINE_FIELDS}}
+        totals.add_line_delta(deltas, pid, old, new)
+        changes.append((pid, gid, old, new))
+        results.append({"player_id": pid, "game_id": gid, "status": "updated" if old else "created"})
+
+    if not rows:
+        return results
+    upsert_stat_rows(db, rows)
+    # one totals UPDATE per batch, not one per line
+    totals.apply_deltas(db, deltas)
+    db.commit()
+    version = data_version.bump()
+
+    for pid, gid, old, new in changes:
+        broker.publish(live.channel(team_id, gid), live.stat_message(known_players[pid], old, new, version))
+    return results
@@ -0,0 +1,191 @@
+import fcntl
+import hashlib
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from starlette.datastructures import Headers
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from .teams import TEAM_HEADER, requested_team
+
+# GET routes whose responses depend only on the URL, the team and the data version
+CACHED_PREFIXES = ("/players", "/games", "/stats", "/leaders")
+# streams under those prefixes pass straight through
+UNCACHED_SUFFIXES = ("/live",)
+# response headers kept alongside the cached body
+CACHED_HEADERS = ("x-next-cursor",)
+
+# ---------- Data version ----------
+class DataVersion:
+    """
+    A small counter file shared by every worker on the host. Writers replace
+    it atomically, so readers never see a partial value. Each app holds one
+    (app.state.data_version) for its settings' data_version_file.
+    """
+
+    def __init__(self, path: str = ""):
+        self.path = path or os.path.join(tempfile.gettempdir(), "softball-stats.version")
+
+    def get(self) -> int:
+        try:
+            with open(self.path) as f:
+                return int(f.read() or 0)
+        except (FileNotFoundError, ValueError):
+            return 0
+
+    def age(self) -> float:
+        """Seconds since the last write bumped the version."""
+        try:
+            return time.time() - os.stat(self.path).st_mtime
+        except FileNotFoundError:
+            return float("inf")
+
+    def bump(self) -> int:
+        """Call after a write has been committed."""
+        with open(self.path + ".lock", "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            version = self.get() + 1
+            tmp = f"{self.path}.{os.getpid()}"
+            with open(tmp, "w") as f:
+                f.write(str(version))
+            os.replace(tmp, self.path)
+        return version
+
+# Data version for scripts (seed, synth, importer) that run outside an app;
+# DATA_VERSION_FILE is read on first use.
+_default: DataVersion | None = None
+
+def _default_version() -> DataVersion:
+    global _default
+    if _default is None:
+        _default = DataVersion(os.getenv("DATA_VERSION_FILE", "").strip())
+    return _default
+
+def data_version() -> int:
+    return _default_version().get()
+
+def bump_version() -> int:
+    return _default_version().bump()
+
+def get_data_version(request: Request) -> DataVersion:
+    """Request dependency: the app's data version."""
+    return request.app.state.data_version
+
+# ---------- Response cache ----------
+class LRUCache:
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+def _etag(version: int, team: str | None, path: str, query: str) -> str:
+    digest = hashlib.sha1(f"{version}:{team}:{path}?{query}".encode()).hexdigest()[:20]
+    return f'"{digest}"'
+
+_ENTITY_TAG = re.compile(r'\*|(?:W/)?"[^"]*"')
+
+def _none_match(header: str, etag: str) -> bool:
+    """
+    Whether an If-None-Match header lists `etag`: entity tags are compared
+    exactly after dropping a W/ prefix (the weak comparison RFC 9110 asks
+    for), and * matches any current representation.
+    """
+    for tag in _ENTITY_TAG.findall(header):
+        if tag == "*" or tag.removeprefix("W/") == etag:
+            return True
+    return False
+
+class ResponseCacheMiddleware:
+    """
+    Serve GET responses from an in-process LRU keyed by route, query string,
+    team and data version, and answer a matching If-None-Match with 304. Neither
+    path touches the database.
+
+    `replica_lag` (seconds, 0 without a replica) holds off storing entries
+    right after a write, while a replica may still be serving older rows.
+
+    Plain ASGI rather than BaseHTTPMiddleware, so streams (/games/{id}/live)
+    pass straight through and still see the client disconnect.
+    """
+    def __init__(self, app: ASGIApp, data_version: DataVersion, max_entries: int = 256,
+                 replica_lag: float = 0):
+        self.app = app
+        self.data_version = data_version
+        self.replica_lag = replica_lag
+        # one cache per app, so apps on different databases never share entries
+        self.cache = LRUCache(max_entries)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["method"] != "GET":
+            return await self.app(scope, receive, send)
+        request = Request(scope)
+        path = request.url.path
+        if not path.startswith(CACHED_PREFIXES) or path.endswith(UNCACHED_SUFFIXES):
+            return await self.app(scope, receive, send)
+
+        query = "&".join(sorted(request.url.query.split("&"))) if request.url.query else ""
+        version = self.data_version.get()
+        team = requested_team(request)
+        etag = _etag(version, team, path, query)
+        headers = {"ETag": etag, "Cache-Control": "no-cache", "Vary": TEAM_HEADER}
+
+        if _none_match(request.headers.get("if-none-match", ""), etag):
+            scope["response_cache"] = "hit"
+            return await Response(status_code=304, headers=headers)(scope, receive, send)
+
+        key = (path, query, team, version)
+        cached = self.cache.get(key)
+        if cached is not None:
+            scope["response_cache"] = "hit"
+            body, media_type, extra = cached
+            response = Response(body, media_type=media_type, headers={**headers, **extra})
+            return await response(scope, receive, send)
+
+        # anything but a 200 goes out as it comes; a 200 is buffered whole
+        start: Message | None = None
+        chunks: list[bytes] = []
+
+        async def buffer(message: Message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                start = message
+                if start["status"] != 200:
+                    await send(message)
+            elif start["status"] != 200:
+                await send(message)
+            else:
+                chunks.append(message.get("body", b""))
+
+        await self.app(scope, receive, buffer)
+        if start is None or start["status"] != 200:
+            return
+        body = b"".join(chunks)
+        response_headers = Headers(raw=start["headers"])
+        media_type = response_headers.get("content-type")
+        extra = {h: response_headers[h] for h in CACHED_HEADERS if h in response_headers}
+        # don't pin what a lagging replica returned to the new version
+        if not self.replica_lag or self.data_version.age() >= self.replica_lag:
+            self.cache.put(key, (body, media_type, extra))
+        await Response(body, media_type=media_type, headers={**headers, **extra})(scope, receive, send)
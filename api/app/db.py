@@ -1,39 +1,218 @@
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, DeclarativeBase
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.orm import Session, sessionmaker, DeclarativeBase
 import os
-
-def _build_url() -> str:
-    url = os.getenv("DATABASE_URL", "").strip()
-    if url:
-        return url
-    host = os.getenv("MYSQL_HOST", "").strip()
-    port = os.getenv("MYSQL_PORT", "3306").strip()
-    db   = os.getenv("MYSQL_DATABASE", "").strip()
-    user = os.getenv("MYSQL_USER", "").strip()
-    pw   = os.getenv("MYSQL_PASSWORD", "").strip()
-    if not all([host, port, db, user, pw]):
-        # Helpful error for logs
-        missing = [k for k,v in [("MYSQL_HOST",host),("MYSQL_PORT",port),
-                                 ("MYSQL_DATABASE",db),("MYSQL_USER",user),
-                                 ("MYSQL_PASSWORD",pw)] if not v]
-        raise RuntimeError(f"DB config missing: {', '.join(missing)}")
-    return f"mysql+pymysql://{user}:{pw}@{host}:{port}/{db}"
-
-DATABASE_URL = _build_url()
-
-engine = create_engine(
-    DATABASE_URL,
-    pool_pre_ping=True,
-    pool_recycle=3600,
-)
-SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+import threading
+import time
+from http.cookies import SimpleCookie
+from fastapi import Depends
+from starlette.datastructures import MutableHeaders
+from starlette.requests import Request
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from . import observability
+from .settings import DEFAULT_SHARD, Settings, Team
+from .teams import get_team
 
 class Base(DeclarativeBase):
     pass
 
-def get_db():
-    db = SessionLocal()
+# async drivers used for the read path, keyed by the sync driver they replace
+_ASYNC_DRIVERS = {
+    "mysql+pymysql": "mysql+aiomysql",
+    "mysql": "mysql+aiomysql",
+    "sqlite": "sqlite+aiosqlite",
+    "sqlite+pysqlite": "sqlite+aiosqlite",
+}
+
+def _build_async_url(url: str, explicit: str, name: str) -> str:
+    if explicit:
+        return explicit
+    scheme, sep, rest = url.partition("://")
+    if scheme not in _ASYNC_DRIVERS:
+        raise RuntimeError(f"No async driver known for {scheme!r}; set {name}")
+    return f"{_ASYNC_DRIVERS[scheme]}{sep}{rest}"
+
+def _engine_kwargs(settings: Settings, url: str) -> dict:
+    """Pool settings; each gunicorn worker gets its own pool."""
+    kwargs = {"pool_pre_ping": settings.pool_pre_ping, "pool_recycle": settings.pool_recycle}
+    # SQLite (used for local testing) runs on pools that don't take sizing arguments
+    if not url.startswith("sqlite"):
+        kwargs.update(
+            pool_size=settings.pool_size,
+            max_overflow=settings.max_overflow,
+            pool_timeout=settings.pool_timeout,
+        )
+    return kwargs
+
+READ_PIN_COOKIE = "db_read_primary_until"
+
+class Database:
+    """
+    Engines and session factories for one Settings. Nothing connects until
+    first use, and the engines are rebuilt if the process has forked since
+    (e.g. gunicorn --preload), so workers never share pooled connections.
+    """
+
+    def __init__(self, settings: Settings):
+        self.settings = settings
+        self.async_url = _build_async_url(
+            settings.database_url, settings.database_url_async, "DATABASE_URL_ASYNC")
+        self.async_read_url = _build_async_url(
+            settings.read_url, settings.database_url_read_async, "DATABASE_URL_READ_ASYNC")
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _ensure(self):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                if self._pid is not None:
+                    # forked: leave the parent's connections to the parent
+                    for engine in self._all_sync_engines():
+                        engine.dispose(close=False)
+                self._create()
+                self._pid = os.getpid()
+
+    def _create(self):
+        s = self.settings
+        self._engine = create_engine(s.database_url, **_engine_kwargs(s, s.database_url))
+        self._read_engine = self._engine if not s.has_replica else create_engine(
+            s.read_url, **_engine_kwargs(s, s.read_url)
+        )
+        # Read endpoints run on async engines so slow queries don't tie up worker threads
+        self._async_engine = create_async_engine(
+            self.async_url, **_engine_kwargs(s, self.async_url))
+        self._async_read_engine = self._async_engine if not s.has_replica else create_async_engine(
+            self.async_read_url, **_engine_kwargs(s, self.async_read_url)
+        )
+        for engine in self._all_sync_engines():
+            observability.instrument_engine(engine, s)
+        self._session = sessionmaker(bind=self._engine, autoflush=False, autocommit=False)
+        self._read_session = sessionmaker(bind=self._read_engine, autoflush=False, autocommit=False)
+        self._async_session = async_sessionmaker(
+            bind=self._async_engine, autoflush=False, expire_on_commit=False)
+        self._async_read_session = async_sessionmaker(
+            bind=self._async_read_engine, autoflush=False, expire_on_commit=False)
+
+    def _all_sync_engines(self) -> list:
+        return list(dict.fromkeys([
+            self._engine, self._read_engine,
+            self._async_engine.sync_engine, self._async_read_engine.sync_engine,
+        ]))
+
+    @property
+    def engine(self):
+        self._ensure()
+        return self._engine
+
+    def SessionLocal(self) -> Session:
+        self._ensure()
+        return self._session()
+
+    def ReadSessionLocal(self) -> Session:
+        self._ensure()
+        return self._read_session()
+
+    def AsyncSessionLocal(self):
+        self._ensure()
+        return self._async_session()
+
+    def AsyncReadSessionLocal(self):
+        self._ensure()
+        return self._async_read_session()
+
+    async def dispose(self):
+        """Close this process's pools; the next use creates fresh engines."""
+        if self._pid != os.getpid():
+            return
+        for engine in dict.fromkeys([self._engine, self._read_engine]):
+            engine.dispose()
+        for engine in dict.fromkeys([self._async_engine, self._async_read_engine]):
+            await engine.dispose()
+        self._pid = None
+
+class Databases:
+    """
+    One Database per shard in `settings`; each team's rows live on the
+    shard its Team names. Nothing connects until a shard is first used.
+    """
+
+    def __init__(self, settings: Settings):
+        self.shards = {name: Database(s) for name, s in settings.shard_settings().items()}
+        self.default = self.shards[DEFAULT_SHARD]
+        self._team_shards = {t.id: t.shard for t in settings.team_list}
+
+    def for_team(self, team_id: int) -> Database:
+        """Raises KeyError for a team this app doesn't serve."""
+        return self.shards[self._team_shards[team_id]]
+
+    async def dispose(self):
+        for database in self.shards.values():
+            await database.dispose()
+
+# Database for scripts (seed, synth, migrations) that run outside an app;
+# configured from the environment on first use.
+_default: Database | None = None
+
+def get_database() -> Database:
+    global _default
+    if _default is None:
+        _default = Database(Settings.from_env())
+    return _default
+
+def SessionLocal() -> Session:
+    return get_database().SessionLocal()
+
+# ---------- request dependencies (the team's shard of the app's databases) ----------
+def read_pinned(request: Request) -> bool:
+    """True while the client is inside the read-your-writes window after a write."""
+    if not request.app.state.settings.has_replica:
+        return False
+    try:
+        return float(request.cookies.get(READ_PIN_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+class ReadPinMiddleware:
+    """
+    After a successful write, keep this client's reads on the primary for
+    read_pin_seconds by setting READ_PIN_COOKIE. Plain ASGI, so streams pass
+    straight through.
+    """
+    def __init__(self, app: ASGIApp, read_pin_seconds: int):
+        self.app = app
+        self.read_pin_seconds = read_pin_seconds
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["method"] in ("GET", "HEAD", "OPTIONS"):
+            return await self.app(scope, receive, send)
+
+        async def send_pinned(message: Message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                cookie = SimpleCookie()
+                cookie[READ_PIN_COOKIE] = f"{time.time() + self.read_pin_seconds:.3f}"
+                cookie[READ_PIN_COOKIE].update({
+                    "max-age": self.read_pin_seconds, "path": "/", "httponly": True, "samesite": "lax",
+                })
+                MutableHeaders(scope=message).append(
+                    "set-cookie", cookie.output(header="").strip())
+            await send(message)
+
+        await self.app(scope, receive, send_pinned)
+
+def team_database(request: Request, team: Team = Depends(get_team)) -> Database:
+    return request.app.state.databases.for_team(team.id)
+
+def get_db(database: Database = Depends(team_database)):
+    db = database.SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+async def get_async_db(request: Request, database: Database = Depends(team_database)):
+    # Replica by default; the primary right after this client wrote something
+    factory = database.AsyncSessionLocal if read_pinned(request) else database.AsyncReadSessionLocal
+    async with factory() as db:
+        yield db
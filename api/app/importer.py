@@ -0,0 +1,333 @@
+"""
+Stream a scorebook export (CSV or NDJSON of game lines) into the database.
+
+    python -m app.importer season.csv
+    python -m app.importer season.ndjson --chunk 2000 --checkpoint /tmp/season.ckpt
+    DATABASE_URL=<team's shard> python -m app.importer season.csv --team 3
+
+Each row is one player's line in one game. Players are named by
+`first_name` + `last_name` (optional `jersey_number`) or by `player_id`;
+games by `opponent` + `date` (optional `location`) or by `game_id`. The
+counting columns are StatBase's; missing or empty ones count as 0. Every
+row goes to one team (--team, default the single-team DEFAULT_TEAM_ID):
+names resolve only to that team's players and games, and new ones are
+created on it.
+
+Rows flow through generators and are written in chunks: names are resolved
+against lookup maps fetched once at start (unknown players and games are
+created a chunk at a time), lines are validated with StatBase and upserted
+with one multi-row statement per chunk, and player_totals moves by one
+delta per player per chunk. Memory is bounded by the chunk size and the
+number of distinct players and games, not by the file size.
+
+After every committed chunk the number of rows consumed is saved to the
+checkpoint file; rerunning the same command resumes after it. The
+checkpoint is removed once the file has been read to the end.
+"""
+import argparse
+import csv
+import itertools
+import json
+import os
+import sys
+import time
+from datetime import date
+from typing import Iterable, Iterator
+from pydantic import ValidationError
+from sqlalchemy import insert, select, tuple_
+from sqlalchemy.orm import Session
+from .db import SessionLocal
+from . import models, totals
+from .bulk import LINE_FIELDS, upsert_stat_rows
+from .cache import bump_version
+from .schemas import StatBase
+from .seed import ensure_tables
+from .settings import DEFAULT_TEAM_ID
+
+# rows with errors kept and printed; the rest are only counted
+MAX_ERRORS_SHOWN = 20
+
+class RowError(ValueError):
+    pass
+
+class ErrorLog:
+    """Rejected rows: the first `keep` (row number, message) pairs and a count of all of them."""
+    def __init__(self, keep: int = MAX_ERRORS_SHOWN):
+        self.keep = keep
+        self.first: list[tuple[int, str]] = []
+        self.count = 0
+
+    def add(self, number: int, message: str):
+        self.count += 1
+        if len(self.first) < self.keep:
+            self.first.append((number, message))
+
+# ---------- reading ----------
+def read_rows(path: str, fmt: str) -> Iterator[dict]:
+    """Raw rows as dicts, one at a time."""
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        if fmt == "csv":
+            yield from csv.DictReader(f)
+        else:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+def _text(row: dict, key: str) -> str | None:
+    value = row.get(key)
+    if value is None:
+        return None
+    value = str(value).strip()
+    return value or None
+
+def _int(row: dict, key: str) -> int | None:
+    value = _text(row, key)
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise RowError(f"{key} must be an integer, got {value!r}") from None
+
+def parse_row(row: dict) -> dict:
+    """
+    One validated line: player and game keys plus the counting fields.
+    Raises RowError when the row can't be imported.
+    """
+    player_id, game_id = _int(row, "player_id"), _int(row, "game_id")
+    first, last = _text(row, "first_name"), _text(row, "last_name")
+    opponent, when = _text(row, "opponent"), _text(row, "date")
+    if player_id is None and not (first and last):
+        raise RowError("player_id or first_name and last_name are required")
+    if game_id is None and not (opponent and when):
+        raise RowError("game_id or opponent and date are required")
+    try:
+        when = date.fromisoformat(when) if game_id is None else None
+    except ValueError:
+        raise RowError(f"date must be YYYY-MM-DD, got {when!r}") from None
+    try:
+        line = StatBase.model_validate({f: row[f] for f in LINE_FIELDS if _text(row, f) is not None})
+    except ValidationError as e:
+        raise RowError("; ".join(err["msg"] for err in e.errors())) from None
+    return {
+        "player": player_id if player_id is not None else (first, last),
+        "jersey_number": _int(row, "jersey_number"),
+        "game": game_id if game_id is not None else (opponent, when),
+        "location": _text(row, "location"),
+        "line": line.model_dump(),
+    }
+
+def parse_rows(rows: Iterable[dict], start: int, errors: ErrorLog) -> Iterator[tuple[int, dict]]:
+    """(row number, parsed row) for the good rows; bad ones go to `errors`."""
+    for number, row in enumerate(rows, start=start + 1):
+        try:
+            yield number, parse_row(row)
+        except RowError as e:
+            errors.add(number, str(e))
+
+def chunked(items: Iterable, size: int) -> Iterator[list]:
+    it = iter(items)
+    while chunk := list(itertools.islice(it, size)):
+        yield chunk
+
+# ---------- name resolution ----------
+class Lookup:
+    """
+    Name -> id maps for one team's players (first, last) and games
+    (opponent, date), fetched once; names not in the database are created a
+    batch at a time. Where names repeat in the database the lowest id wins.
+    """
+
+    def __init__(self, db: Session, team_id: int, create: bool):
+        self.db = db
+        self.team_id = team_id
+        self.create = create
+        self.players: dict[tuple, int] = {}
+        self.games: dict[tuple, int] = {}
+        self.player_ids: set[int] = set()
+        self.game_ids: set[int] = set()
+        self.created = {"players": 0, "games": 0}
+        for pid, first, last in db.execute(
+            select(models.Player.id, models.Player.first_name, models.Player.last_name)
+            .where(models.Player.team_id == team_id).order_by(models.Player.id)
+        ):
+            self.players.setdefault((first, last), pid)
+            self.player_ids.add(pid)
+        for gid, opponent, when in db.execute(
+            select(models.Game.id, models.Game.opponent, models.Game.date)
+            .where(models.Game.team_id == team_id).order_by(models.Game.id)
+        ):
+            self.games.setdefault((opponent, when), gid)
+            self.game_ids.add(gid)
+
+    def _create(self, model, key_cols, names: dict[tuple, dict], mapping: dict, ids: set):
+        self.db.execute(insert(model), [{**row, "team_id": self.team_id} for row in names.values()])
+        cols = [getattr(model, c) for c in key_cols]
+        for pk, *key in self.db.execute(
+            select(model.id, *cols)
+            .where(model.team_id == self.team_id, tuple_(*cols).in_(list(names)))
+            .order_by(model.id)
+        ):
+            mapping.setdefault(tuple(key), pk)
+            ids.add(pk)
+
+    def resolve(self, chunk: list[tuple[int, dict]], errors: ErrorLog) -> dict[tuple[int, int], dict]:
+        """Stat lines of a chunk keyed by (player_id, game_id); a later row for the same pair wins."""
+        new_players, new_games = {}, {}
+        for _, row in chunk:
+            if isinstance(row["player"], tuple) and row["player"] not in self.players:
+                first, last = row["player"]
+                new_players.setdefault(row["player"], {
+                    "first_name": first, "last_name": last, "jersey_number": row["jersey_number"],
+                })
+            if isinstance(row["game"], tuple) and row["game"] not in self.games:
+                opponent, when = row["game"]
+                new_games.setdefault(row["game"], {
+                    "opponent": opponent, "date": when, "location": row["location"],
+                })
+        if self.create and new_players:
+            self._create(models.Player, ["first_name", "last_name"], new_players,
+                         self.players, self.player_ids)
+            self.created["players"] += len(new_players)
+        if self.create and new_games:
+            self._create(models.Game, ["opponent", "date"], new_games, self.games, self.game_ids)
+            self.created["games"] += len(new_games)
+
+        lines = {}
+        for number, row in chunk:
+            player, game = row["player"], row["game"]
+            pid = self.players.get(player) if isinstance(player, tuple) else player
+            gid = self.games.get(game) if isinstance(game, tuple) else game
+            if pid is None or pid not in self.player_ids:
+                errors.add(number, f"Player not found: {player}")
+            elif gid is None or gid not in self.game_ids:
+                errors.add(number, f"Game not found: {game}")
+            else:
+                lines[(pid, gid)] = row["line"]
+        return lines
+
+# ---------- writing ----------
+def write_chunk(db: Session, lines: dict[tuple[int, int], dict], team_id: int) -> dict:
+    """
+    Upsert one chunk and move player_totals by one delta per player, in the
+    caller's transaction. Returns created/updated counts.
+    """
+    counts = {"created": 0, "updated": 0}
+    if not lines:
+        return counts
+    stat = models.PlayerGameStat
+    # Locked until the caller commits, like bulk.write_lines: the deltas are
+    # computed from these rows, so a concurrent write to the same lines waits.
+    existing = {
+        (s.player_id, s.game_id): totals.stat_values(s)
+        for s in db.scalars(
+            select(stat).where(tuple_(stat.player_id, stat.game_id).in_(list(lines))).with_for_update()
+        )
+    }
+    # one increment per player for the whole chunk
+    deltas: dict[int, dict] = {}
+    for (pid, gid), line in lines.items():
+        old = existing.get((pid, gid))
+        counts["updated" if old else "created"] += 1
+        totals.add_line_delta(deltas, pid, old, line)
+    upsert_stat_rows(db, [
+        {"player_id": pid, "game_id": gid, "team_id": team_id, **line} for (pid, gid), line in lines.items()
+    ])
+    totals.apply_deltas(db, deltas)
+    return counts
+
+# ---------- checkpoints ----------
+def _fingerprint(path: str) -> dict:
+    st = os.stat(path)
+    return {"file": os.path.abspath(path), "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+def load_checkpoint(path: str, source: str) -> int:
+    """Rows already imported from `source`, or 0 with no checkpoint."""
+    try:
+        with open(path) as f:
+            saved = json.load(f)
+    except FileNotFoundError:
+        return 0
+    if {k: saved.get(k) for k in ("file", "size", "mtime_ns")} != _fingerprint(source):
+        raise SystemExit(f"{path} belongs to a different or changed file; remove it or pass --restart")
+    return saved["rows"]
+
+def save_checkpoint(path: str, source: str, rows: int):
+    tmp = f"{path}.{os.getpid()}"
+    with open(tmp, "w") as f:
+        json.dump({**_fingerprint(source), "rows": rows}, f)
+    os.replace(tmp, path)
+
+# ---------- driver ----------
+def run(path: str, fmt: str, chunk: int = 1000, checkpoint: str | None = None,
+        create: bool = True, progress_seconds: float = 2.0, out=sys.stderr,
+        team_id: int = DEFAULT_TEAM_ID) -> dict:
+    checkpoint = checkpoint or path + ".checkpoint"
+    skip = load_checkpoint(checkpoint, path)
+    errors = ErrorLog()
+    counts = {"created": 0, "updated": 0}
+    done, shown = skip, 0
+    t0 = last_report = time.perf_counter()
+
+    def report(final=False):
+        elapsed = time.perf_counter() - t0
+        rate = (done - skip) / elapsed if elapsed else 0.0
+        print(f"{'done' if final else 'rows'} {done:>10,}  errors {errors.count:>7,}  "
+              f"{rate:>10,.0f} rows/s", file=out, flush=True)
+
+    with SessionLocal() as db:
+        lookup = Lookup(db, team_id, create)
+        # rows are counted before parsing so the checkpoint covers rejected rows too
+        numbered = enumerate(itertools.islice(read_rows(path, fmt), skip, None), start=skip + 1)
+        for batch in chunked(numbered, chunk):
+            parsed = parse_rows((row for _, row in batch), batch[0][0] - 1, errors)
+            lines = lookup.resolve(list(parsed), errors)
+            result = write_chunk(db, lines, team_id)
+            db.commit()
+            bump_version()
+            for k in counts:
+                counts[k] += result[k]
+            done = batch[-1][0]
+            save_checkpoint(checkpoint, path, done)
+
+            for number, message in errors.first[shown:]:
+                print(f"row {number}: {message}", file=out)
+            shown = len(errors.first)
+            if time.perf_counter() - last_report >= progress_seconds:
+                report()
+                last_report = time.perf_counter()
+    report(final=True)
+    if os.path.exists(checkpoint):
+        os.remove(checkpoint)
+    elapsed = time.perf_counter() - t0
+    return {
+        "rows": done, "resumed_from": skip, **counts, "errors": errors.count,
+        "players_created": lookup.created["players"], "games_created": lookup.created["games"],
+        "seconds": round(elapsed, 2),
+        "rows_per_second": round((done - skip) / elapsed) if elapsed else 0,
+    }
+
+def main():
+    ap = argparse.ArgumentParser(description="Import a CSV/NDJSON scorebook export of game lines")
+    ap.add_argument("path")
+    ap.add_argument("--format", choices=["csv", "ndjson"],
+                    help="default: from the file extension (.ndjson/.jsonl, otherwise csv)")
+    ap.add_argument("--chunk", type=int, default=1000, help="rows per upsert and commit")
+    ap.add_argument("--checkpoint", help="default: PATH.checkpoint")
+    ap.add_argument("--restart", action="store_true", help="ignore an existing checkpoint")
+    ap.add_argument("--no-create", action="store_true",
+                    help="reject rows naming unknown players or games instead of creating them")
+    ap.add_argument("--progress", type=float, default=2.0, help="seconds between progress lines")
+    ap.add_argument("--team", type=int, default=DEFAULT_TEAM_ID, help="team id the rows belong to")
+    args = ap.parse_args()
+
+    fmt = args.format or ("ndjson" if args.path.endswith((".ndjson", ".jsonl")) else "csv")
+    checkpoint = args.checkpoint or args.path + ".checkpoint"
+    if args.restart and os.path.exists(checkpoint):
+        os.remove(checkpoint)
+    ensure_tables()
+    print(run(args.path, fmt, args.chunk, checkpoint, not args.no_create, args.progress,
+              team_id=args.team))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""
+Live per-game channels. Writes publish stat deltas; /games/{id}/live streams
+them to clients as Server-Sent Events.
+
+Every worker fans messages out to its own subscribers from memory (one small
+queue per client, nothing else while idle). The broker decides how a publish
+reaches the other workers: LocalBroker only delivers within this process,
+RedisBroker relays through Redis pub/sub so every gunicorn worker sees every
+write. Set LIVE_BROKER_URL=redis://... to use it (needs the `redis` package).
+Each app builds its broker from its settings (app.state.broker).
+"""
+import asyncio
+import contextlib
+import logging
+import orjson
+from starlette.requests import HTTPConnection, Request
+from .settings import Settings
+
+log = logging.getLogger(__name__)
+
+RESYNC = orjson.dumps({"type": "resync"})
+
+class LocalBroker:
+    """In-process fan-out. Also the delivery half of every other broker."""
+
+    def __init__(self, queue_size: int = 100, heartbeat_seconds: float = 15):
+        # messages a slow client may fall behind by before it is told to resync
+        self.queue_size = queue_size
+        # seconds between keep-alive comments on an idle stream
+        self.heartbeat_seconds = heartbeat_seconds
+        self._channels: dict[str, set[asyncio.Queue]] = {}
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    async def start(self):
+        await self._open()
+
+    async def stop(self):
+        await self._close()
+
+    async def _open(self):
+        self._loop = asyncio.get_running_loop()
+
+    async def _close(self):
+        self._channels.clear()
+
+    def publish(self, channel: str, message: dict) -> None:
+        """Safe to call from sync routes running in the threadpool."""
+        self._deliver(channel, orjson.dumps(message))
+
+    def _deliver(self, channel: str, data: bytes) -> None:
+        if self._loop is None or channel not in self._channels:
+            return
+        self._loop.call_soon_threadsafe(self._fanout, channel, data)
+
+    def _fanout(self, channel: str, data: bytes) -> None:
+        for queue in self._channels.get(channel, ()):
+            if queue.full():
+                # the client missed deltas; drop them and have it refetch
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(RESYNC)
+            else:
+                queue.put_nowait(data)
+
+    def subscribers(self, channel: str) -> int:
+        return len(self._channels.get(channel, ()))
+
+    def add_subscriber(self, channel: str) -> asyncio.Queue:
+        """A new queue on `channel`; pair every call with unsubscribe()."""
+        if self._loop is None:
+            self._loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._channels.setdefault(channel, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, channel: str, queue: asyncio.Queue) -> None:
+        subscribers = self._channels.get(channel)
+        if subscribers is not None:
+            subscribers.discard(queue)
+            if not subscribers:
+                del self._channels[channel]
+
+class RedisBroker(LocalBroker):
+    """Relays publishes through Redis so subscribers on any worker receive them."""
+
+    prefix = "softball:live:"
+
+    def __init__(self, url: str, queue_size: int = 100, heartbeat_seconds: float = 15):
+        super().__init__(queue_size, heartbeat_seconds)
+        try:
+            import redis
+            import redis.asyncio
+        except ImportError as exc:
+            raise RuntimeError("LIVE_BROKER_URL needs the redis package installed") from exc
+        self._url = url
+        self._publisher = redis.Redis.from_url(url)
+        self._client = None
+        self._listener: asyncio.Task | None = None
+
+    async def _open(self):
+        import redis.asyncio
+        await super()._open()
+        self._client = redis.asyncio.Redis.from_url(self._url)
+        self._listener = asyncio.create_task(self._listen())
+
+    async def _close(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._listener
+        if self._client is not None:
+            await self._client.aclose()
+        self._publisher.close()
+        await super()._close()
+
+    def publish(self, channel: str, message: dict) -> None:
+        try:
+            self._publisher.publish(f"{self.prefix}{channel}", orjson.dumps(message))
+        except Exception:
+            # live updates are best effort; the write itself has committed
+            log.exception("live publish failed for channel %s", channel)
+
+    async def _listen(self):
+        while True:
+            try:
+                pubsub = self._client.pubsub()
+                await pubsub.psubscribe(f"{self.prefix}*")
+                async for msg in pubsub.listen():
+                    if msg["type"] != "pmessage":
+                        continue
+                    channel = msg["channel"].decode()[len(self.prefix):]
+                    self._fanout(channel, msg["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                log.exception("live broker connection lost; reconnecting")
+                await asyncio.sleep(1)
+
+def make_broker(settings: Settings) -> LocalBroker:
+    url = settings.live_broker_url
+    sizes = (settings.live_queue_size, settings.live_heartbeat_seconds)
+    if not url:
+        return LocalBroker(*sizes)
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisBroker(url, *sizes)
+    raise RuntimeError(f"Unsupported LIVE_BROKER_URL: {url}")
+
+def get_broker(request: HTTPConnection) -> LocalBroker:
+    """Request dependency: the app's broker."""
+    return request.app.state.broker
+
+def channel(team_id: int, game_id: int) -> str:
+    """A game's channel; game ids are only unique within one shard."""
+    return f"{team_id}:{game_id}"
+
+def stat_message(player, old: dict | None, new: dict, version: int) -> dict:
+    """A 'stat' event: the player's full line for the game plus what changed."""
+    old = old or {f: 0 for f in new}
+    return {
+        "type": "stat",
+        "version": version,
+        "player_id": player.id,
+        "first_name": player.first_name,
+        "last_name": player.last_name,
+        "line": new,
+        "delta": {f: new[f] - old.get(f, 0) for f in new if new[f] != old.get(f, 0)},
+    }
+
+# seconds an idle stream waits between checks that its client is still there
+DISCONNECT_POLL_SECONDS = 1.0
+
+async def event_stream(request: Request, broker: LocalBroker, channel: str, hello: dict):
+    """
+    SSE framing for one subscriber, with keep-alives while idle. Ends (and
+    unsubscribes) as soon as the client disconnects rather than waiting for
+    a write to fail, so idle streams don't pile up queues on the channel.
+    """
+    queue = broker.add_subscriber(channel)
+    try:
+        yield b"event: hello\ndata: " + orjson.dumps(hello) + b"\n\n"
+        loop = asyncio.get_running_loop()
+        last_sent = loop.time()
+        while not await request.is_disconnected():
+            try:
+                data = await asyncio.wait_for(
+                    queue.get(), min(DISCONNECT_POLL_SECONDS, broker.heartbeat_seconds))
+            except asyncio.TimeoutError:
+                if loop.time() - last_sent >= broker.heartbeat_seconds:
+                    last_sent = loop.time()
+                    yield b": ping\n\n"
+                continue
+            last_sent = loop.time()
+            event = b"resync" if data is RESYNC else b"stat"
+            yield b"event: " + event + b"\ndata: " + data + b"\n\n"
+    finally:
+        broker.unsubscribe(channel, queue)
@@ -1,38 +1,108 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-import os
 
 from .routers import health
-from .routers import players, games, stats
+from .routers import players, games, stats, leaders, lineups, export, monitoring
 
-from .db import engine
+from .db import Databases, ReadPinMiddleware
+from .settings import Settings
 from . import models  # <-- import models so metadata is registered
+from .cache import DataVersion, ResponseCacheMiddleware
+from . import audit, live, observability, simulate
+from .writebehind import WriteBehindQueue
 
-app = FastAPI(title="Softball Stats API")
-
-origins = [o.strip() for o in os.getenv("API_CORS_ORIGINS", "").split(",") if o.strip()]
-if not origins:
-    origins = ["http://localhost:5173", "http://127.0.0.1:5173"]
-
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=origins,
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-# --- AUTO-CREATE TABLES ON STARTUP ---
-@app.on_event("startup")
-def on_startup():
-    models.Base.metadata.create_all(bind=engine)
-# --------------------------------------
-
-app.include_router(health.router)
-app.include_router(players.router)
-app.include_router(games.router)
-app.include_router(stats.router)
-
-@app.get("/")
-def root():
-    return {"message": "Softball Stats API is running"}
+def create_app(settings: Settings | None = None) -> FastAPI:
+    """
+    Build the API for `settings` (read from the environment when omitted).
+    No database connection is made here: each worker process creates its
+    engines on first use and disposes them on shutdown. Every request is
+    for one team (see teams.py) and runs against that team's shard.
+
+        uvicorn --factory app.main:create_app
+        gunicorn 'app.main:create_app()' -k uvicorn.workers.UvicornWorker
+    """
+    settings = settings or Settings.from_env()
+    databases = Databases(settings)
+    data_version = DataVersion(settings.data_version_file)
+    broker = live.make_broker(settings)
+    stat_queue = WriteBehindQueue(
+        settings.write_behind_flush_ms, settings.write_behind_batch,
+        settings.write_behind_journal, settings.write_behind_fsync,
+    )
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        await broker.start()
+        await stat_queue.start(databases, data_version, broker)
+        yield
+        # flush queued stat lines while the engines and broker are still up
+        await stat_queue.stop()
+        await broker.stop()
+        simulate.shutdown()
+        audit.shutdown()
+        await databases.dispose()
+
+    # the response classes time their own encoding for Server-Timing
+    app = FastAPI(title="Softball Stats API", lifespan=lifespan,
+                  default_response_class=observability.TimedJSONResponse)
+    app.state.settings = settings
+    app.state.databases = databases
+    # the default shard, for callers that aren't serving a team's request
+    app.state.database = databases.default
+    app.state.teams = {t.slug: t for t in settings.team_list}
+    app.state.data_version = data_version
+    app.state.broker = broker
+    app.state.stat_queue = stat_queue
+    # typeahead indexes, one per team id, built on first search
+    app.state.player_indexes = {}
+    # lineup simulations running per team id (routers/lineups.py)
+    app.state.simulations = {}
+
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=list(settings.cors_origins),
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+        expose_headers=["ETag", "X-Next-Cursor", "Server-Timing"],
+    )
+    app.add_middleware(
+        ResponseCacheMiddleware,
+        data_version=data_version,
+        max_entries=settings.response_cache_size,
+        replica_lag=settings.read_pin_seconds if settings.has_replica else 0,
+    )
+
+    if settings.has_replica:
+        app.add_middleware(ReadPinMiddleware, read_pin_seconds=settings.read_pin_seconds)
+
+    # outermost, so cache hits are timed too
+    observability.install(app, settings)
+
+    # Schema is managed by Alembic (`alembic upgrade head`, run before the server
+    # starts); workers no longer create or inspect tables at boot.
+
+    app.include_router(health.router)
+    app.include_router(players.router)
+    app.include_router(games.router)
+    app.include_router(stats.router)
+    app.include_router(leaders.router)
+    app.include_router(lineups.router)
+    app.include_router(export.router)
+    app.include_router(monitoring.router)
+
+    @app.get("/")
+    def root():
+        return {"message": "Softball Stats API is running"}
+
+    return app
+
+def __getattr__(name):
+    # `uvicorn app.main:app` keeps working: the default app is built from the
+    # environment on first access rather than when the module is imported.
+    if name == "app":
+        global app
+        app = create_app()
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,120 @@
+"""
+Derived batting metrics computed column-wise with NumPy.
+
+Every router that reports rate stats goes through here, so the formulas live
+in one place. Inputs are arrays (or lists) of counting stats, one element per
+player/game/bucket; missing columns count as zero.
+"""
+from typing import Mapping, Sequence
+import numpy as np
+
+# Counting columns the formulas read
+INPUT_FIELDS = [
+    "at_bats","hits","singles","doubles","triples","home_runs",
+    "walks","strikeouts","sac_flies","sac_bunts","hit_by_pitches",
+]
+
+# Derived integer and rate outputs, in response order
+COUNT_METRICS = ["plate_appearances", "total_bases"]
+RATE_METRICS = [
+    "average", "slugging", "on_base_percent", "on_base_percent_plus_slugging",
+    "iso", "babip", "k_percent", "bb_percent", "woba",
+]
+
+# Linear weights for wOBA (unintentional walks are not tracked separately)
+WOBA_WEIGHTS = {
+    "walks": 0.69, "hit_by_pitches": 0.72, "singles": 0.89,
+    "doubles": 1.27, "triples": 1.62, "home_runs": 2.10,
+}
+
+def _div(n: np.ndarray, d: np.ndarray) -> np.ndarray:
+    """n / d with 0.0 wherever the denominator is zero."""
+    out = np.zeros(np.broadcast(n, d).shape, dtype=np.float64)
+    np.divide(n, d, out=out, where=d != 0)
+    return out
+
+def compute(columns: Mapping[str, Sequence[int]]) -> dict[str, np.ndarray]:
+    """Return every derived metric as an array aligned with the input rows."""
+    n = len(next(iter(columns.values()))) if columns else 0
+    c = {
+        f: np.asarray(columns[f], dtype=np.int64) if f in columns else np.zeros(n, dtype=np.int64)
+        for f in INPUT_FIELDS
+    }
+    ab, h, hr, so = c["at_bats"], c["hits"], c["home_runs"], c["strikeouts"]
+    bb, hbp, sf = c["walks"], c["hit_by_pitches"], c["sac_flies"]
+
+    plate_appearances = ab + bb + hbp + sf + c["sac_bunts"]
+    total_bases = c["singles"] + 2 * c["doubles"] + 3 * c["triples"] + 4 * hr
+    obp_denom = ab + bb + hbp + sf
+
+    avg = _div(h, ab)
+    slg = _div(total_bases, ab)
+    obp = _div(h + bb + hbp, obp_denom)
+    woba_num = sum(w * c[f] for f, w in WOBA_WEIGHTS.items())
+
+    return {
+        "plate_appearances": plate_appearances,
+        "total_bases": total_bases,
+        "average": avg,
+        "slugging": slg,
+        "on_base_percent": obp,
+        "on_base_percent_plus_slugging": obp + slg,
+        "iso": slg - avg,
+        "babip": _div(h - hr, ab - so - hr + sf),
+        "k_percent": _div(so, plate_appearances),
+        "bb_percent": _div(bb, plate_appearances),
+        "woba": _div(woba_num, obp_denom),
+    }
+
+def _round(values: np.ndarray, digits: int) -> list[float]:
+    """
+    Round like Python's round(). np.round agrees except next to a tie, where
+    scaling by 10**digits can tip the result, so those few values are redone
+    with round() itself.
+    """
+    scaled = values * 10 ** digits
+    out = (np.rint(scaled) / 10 ** digits).tolist()
+    near_tie = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    for i in np.flatnonzero(near_tie).tolist():
+        out[i] = round(float(values[i]), digits)
+    return out
+
+def round_rates(values: Sequence[float], digits: int = 3) -> list[float]:
+    """Rates rounded for output, the same way rows() does it."""
+    return _round(np.asarray(values, dtype=np.float64), digits)
+
+def rows(columns: Mapping[str, Sequence[int]], digits: int = 3) -> list[dict]:
+    """compute() as one dict of plain Python numbers per row, rates rounded."""
+    derived = compute(columns)
+    values = [derived[k].tolist() for k in COUNT_METRICS]
+    values += [_round(derived[k], digits) for k in RATE_METRICS]
+    keys = COUNT_METRICS + RATE_METRICS
+    return [dict(zip(keys, row)) for row in zip(*values)]
+
+def one(values: Mapping[str, int], digits: int = 3) -> dict:
+    """Derived metrics for a single line of totals."""
+    return rows({k: [v] for k, v in values.items()}, digits)[0]
+
+def rolling(columns: Mapping[str, Sequence[int]], window: int,
+            group_starts: Sequence[int] | None = None) -> tuple[dict[str, np.ndarray], np.ndarray]:
+    """
+    Trailing-window sums over game-ordered rows using one prefix-sum pass, so
+    the cost is O(rows) whatever the window. `group_starts` marks the first row
+    of each player's run when several players are stacked; windows never cross
+    into the previous group. Returns (window sums per column, games in window).
+    """
+    n = len(next(iter(columns.values()))) if columns else 0
+    idx = np.arange(n)
+    # index of the first row of the group each row belongs to
+    first = np.zeros(n, dtype=np.int64)
+    if group_starts is not None and n:
+        marks = np.zeros(n, dtype=np.int64)
+        marks[np.asarray(group_starts, dtype=np.int64)] = np.asarray(group_starts, dtype=np.int64)
+        first = np.maximum.accumulate(marks)
+    start = np.maximum(first, idx - window + 1)
+
+    sums = {}
+    for f, values in columns.items():
+        prefix = np.concatenate(([0], np.cumsum(np.asarray(values, dtype=np.int64))))
+        sums[f] = prefix[idx + 1] - prefix[start]
+    return sums, idx + 1 - start
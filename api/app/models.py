@@ -1,15 +1,19 @@
 from datetime import datetime
 from sqlalchemy import (
     Column, Integer, String, Date, Text, ForeignKey,
-    DateTime, CheckConstraint, UniqueConstraint
+    DateTime, CheckConstraint, UniqueConstraint, Index
 )
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 from .db import Base
+from .settings import DEFAULT_TEAM_ID
 
 class Player(Base):
     __tablename__ = "players"
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    team_id: Mapped[int] = mapped_column(
+        Integer, default=DEFAULT_TEAM_ID, server_default=str(DEFAULT_TEAM_ID), nullable=False
+    )
     first_name: Mapped[str] = mapped_column(String(100), nullable=False)
     last_name: Mapped[str] = mapped_column(String(100), nullable=False)
     jersey_number: Mapped[int | None] = mapped_column(Integer, nullable=True)
@@ -17,11 +21,26 @@ class Player(Base):
     created_at: Mapped[datetime] = mapped_column(
         DateTime, default=datetime.utcnow, nullable=False
     )
+    # Also moved by the database on any update (see migration 0005), so the
+    # typeahead index notices edits made outside the API
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False
+    )
+
+    __table_args__ = (
+        # Roster listing and keyset pages sort by name within a team
+        Index("ix_players_team_name", "team_id", "last_name", "first_name", "id"),
+        # Newest change per team, for the typeahead index fingerprint
+        Index("ix_players_team_updated", "team_id", "updated_at"),
+    )
 
     # Relationships
     stats: Mapped[list["PlayerGameStat"]] = relationship(
         "PlayerGameStat", back_populates="player", cascade="all, delete-orphan"
     )
+    totals: Mapped["PlayerTotal | None"] = relationship(
+        "PlayerTotal", back_populates="player", cascade="all, delete-orphan", uselist=False
+    )
 
     def __repr__(self) -> str:
         return f"<Player {self.id} {self.first_name} {self.last_name}>"
@@ -30,6 +49,9 @@ class Game(Base):
     __tablename__ = "games"
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    team_id: Mapped[int] = mapped_column(
+        Integer, default=DEFAULT_TEAM_ID, server_default=str(DEFAULT_TEAM_ID), nullable=False
+    )
     opponent: Mapped[str] = mapped_column(String(150), nullable=False)
     date: Mapped[Date] = mapped_column(Date, nullable=False)
     time: Mapped[str | None] = mapped_column(String(10), nullable=True)
@@ -41,6 +63,11 @@ class Game(Base):
         DateTime, default=datetime.utcnow, nullable=False
     )
 
+    __table_args__ = (
+        # Date range filters, newest-first listing and keyset pages within a team
+        Index("ix_games_team_date", "team_id", "date", "id"),
+    )
+
     # Relationships
     stats: Mapped[list["PlayerGameStat"]] = relationship(
         "PlayerGameStat", back_populates="game", cascade="all, delete-orphan"
@@ -56,6 +83,10 @@ class PlayerGameStat(Base):
 
     player_id: Mapped[int] = mapped_column(ForeignKey("players.id", ondelete="CASCADE"), nullable=False)
     game_id: Mapped[int] = mapped_column(ForeignKey("games.id", ondelete="CASCADE"), nullable=False)
+    # the player's (and game's) team, copied onto the line so team scans need no join
+    team_id: Mapped[int] = mapped_column(
+        Integer, default=DEFAULT_TEAM_ID, server_default=str(DEFAULT_TEAM_ID), nullable=False
+    )
 
     # Box score (non-negative)
     at_bats: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
@@ -82,6 +113,16 @@ class PlayerGameStat(Base):
         # Basic non-negative guards (MySQL 8.0+ enforces CHECK)
         CheckConstraint("at_bats >= 0 AND hits >= 0 AND singles >= 0 AND doubles >= 0 AND triples >= 0 AND home_runs >= 0", name="ck_nonneg_hits"),
         CheckConstraint("rbis >= 0 AND walks >= 0 AND strikeouts >= 0 AND sac_flies >= 0 AND sac_bunts >= 0 AND hit_by_pitches >= 0 AND errors >= 0", name="ck_nonneg_other"),
+        # Box score lookups and the join to games (and the games FK on MySQL)
+        Index("ix_pgs_game_player", "game_id", "player_id"),
+        # A team's lines in game order: /stats listing and splits
+        Index("ix_pgs_team_game", "team_id", "game_id", "player_id"),
+        # Covering index: a team's per-player SUMs are answered from the index alone
+        Index(
+            "ix_pgs_team_player_totals", "team_id", "player_id", "game_id",
+            "at_bats", "hits", "singles", "doubles", "triples", "home_runs", "rbis",
+            "walks", "strikeouts", "sac_flies", "sac_bunts", "hit_by_pitches", "errors",
+        ),
     )
 
     # Relationships
@@ -90,3 +131,37 @@ class PlayerGameStat(Base):
 
     def __repr__(self) -> str:
         return f"<Stat p={self.player_id} g={self.game_id}>"
+
+class PlayerTotal(Base):
+    """Running career totals per player, kept in step with player_game_stats."""
+    __tablename__ = "player_totals"
+
+    player_id: Mapped[int] = mapped_column(
+        ForeignKey("players.id", ondelete="CASCADE"), primary_key=True
+    )
+    games_played: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+
+    # Same counting columns as PlayerGameStat
+    at_bats: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    hits: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    singles: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    doubles: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    triples: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    home_runs: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    rbis: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    walks: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    strikeouts: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    sac_flies: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    sac_bunts: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    hit_by_pitches: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    errors: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False
+    )
+
+    # Relationships
+    player: Mapped["Player"] = relationship("Player", back_populates="totals")
+
+    def __repr__(self) -> str:
+        return f"<Totals p={self.player_id} g={self.games_played}>"
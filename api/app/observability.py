@@ -0,0 +1,180 @@
+"""
+Per-request database and serialization timing.
+
+When enabled (Settings.request_metrics, REQUEST_METRICS, on by default) every
+request records its query count, time spent in the database and time spent
+encoding the response body. They are returned in a Server-Timing header and
+folded into per-route Prometheus histograms served at /metrics. Encoding is
+timed by the response classes below (the app's default, and the ORJSON one
+the list routes return), not by patching FastAPI.
+slow_query_ms (SLOW_QUERY_MS) turns on a log line (statement and parameters)
+for queries slower than the threshold. With both off, nothing is installed.
+"""
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from dataclasses import dataclass
+from fastapi.responses import JSONResponse, ORJSONResponse
+from sqlalchemy import event
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+slow_log = logging.getLogger("softball.slow_query")
+
+@dataclass
+class RequestStats:
+    queries: int = 0
+    db_seconds: float = 0.0
+    serialize_seconds: float = 0.0
+
+_current: ContextVar[RequestStats | None] = ContextVar("request_stats", default=None)
+
+# ---------- SQLAlchemy hooks ----------
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # Kept on the statement's execution context rather than the connection:
+    # a statement that raises never reaches the after hook, and its start
+    # time must not be paired with the next statement's.
+    context._query_start = time.perf_counter()
+
+def instrument_engine(engine, settings):
+    """
+    Attach the cursor hooks to a sync Engine, configured from `settings`
+    (the Database's); a no-op when metrics and the slow-query log are off.
+    """
+    if not settings.request_metrics and settings.slow_query_ms is None:
+        return
+    if event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    slow_seconds = settings.slow_query_ms / 1000 if settings.slow_query_ms is not None else None
+
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - context._query_start
+        stats = _current.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.db_seconds += elapsed
+        if slow_seconds is not None and elapsed >= slow_seconds:
+            slow_log.warning("slow query %.1fms: %s params=%r", elapsed * 1000, statement, parameters)
+
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", after_cursor_execute)
+
+# ---------- Serialization timing ----------
+class _TimedRender:
+    """Adds the time spent in render() to the current request's stats."""
+    def render(self, content) -> bytes:
+        stats = _current.get()
+        if stats is None:
+            return super().render(content)
+        start = time.perf_counter()
+        try:
+            return super().render(content)
+        finally:
+            stats.serialize_seconds += time.perf_counter() - start
+
+class TimedJSONResponse(_TimedRender, JSONResponse):
+    pass
+
+class TimedORJSONResponse(_TimedRender, ORJSONResponse):
+    pass
+
+# ---------- Histograms ----------
+class Histogram:
+    def __init__(self, name: str, help: str, buckets: list[float]):
+        self.name, self.help, self.buckets = name, help, buckets
+        self._series: dict[tuple, list] = {}  # labels -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, labels: tuple, value: float):
+        with self._lock:
+            series = self._series.setdefault(labels, [0] * len(self.buckets) + [0.0, 0])
+            i = bisect_left(self.buckets, value)
+            if i < len(self.buckets):
+                series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self, label_names: tuple[str, ...]) -> list[str]:
+        out = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted(self._series.items())
+            items = [(labels, list(series)) for labels, series in items]
+        for labels, series in items:
+            base = ",".join(f'{k}="{v}"' for k, v in zip(label_names, labels))
+            cumulative = 0
+            for bound, n in zip(self.buckets, series):
+                cumulative += n
+                out.append(f'{self.name}_bucket{{{base},le="{bound}"}} {cumulative}')
+            out.append(f'{self.name}_bucket{{{base},le="+Inf"}} {series[-1]}')
+            out.append(f"{self.name}_sum{{{base}}} {series[-2]}")
+            out.append(f"{self.name}_count{{{base}}} {series[-1]}")
+        return out
+
+_LABELS = ("method", "route")
+_SECONDS = [0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0]
+HISTOGRAMS = {
+    "duration": Histogram("http_request_duration_seconds", "Request latency", _SECONDS),
+    "db": Histogram("http_request_db_seconds", "Time in database queries per request", _SECONDS),
+    "serialize": Histogram("http_request_serialize_seconds", "Response body encoding time", _SECONDS),
+    "queries": Histogram("http_request_db_queries", "Database queries per request",
+                         [0, 1, 2, 3, 5, 10, 25, 50, 100, 500]),
+}
+
+def render_metrics() -> str:
+    lines = []
+    for h in HISTOGRAMS.values():
+        lines += h.render(_LABELS)
+    return "\n".join(lines) + "\n"
+
+# ---------- Middleware ----------
+class RequestMetricsMiddleware:
+    """
+    Plain ASGI, so streamed responses pass through untouched; the timings
+    are taken when the response starts.
+    """
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        stats = RequestStats()
+        token = _current.set(stats)
+        start = time.perf_counter()
+
+        async def send_timed(message: Message):
+            if message["type"] == "http.response.start":
+                total = time.perf_counter() - start
+                MutableHeaders(scope=message)["Server-Timing"] = ", ".join([
+                    f'db;dur={stats.db_seconds * 1000:.2f};desc="{stats.queries} queries"',
+                    f"ser;dur={stats.serialize_seconds * 1000:.2f}",
+                    f"total;dur={total * 1000:.2f}",
+                ])
+                route = scope.get("route")
+                if scope.get("response_cache") == "hit":
+                    route_label = "(cache)"
+                else:
+                    route_label = route.path if route is not None else "(unmatched)"
+                labels = (scope["method"], route_label)
+                HISTOGRAMS["duration"].observe(labels, total)
+                HISTOGRAMS["db"].observe(labels, stats.db_seconds)
+                HISTOGRAMS["serialize"].observe(labels, stats.serialize_seconds)
+                HISTOGRAMS["queries"].observe(labels, stats.queries)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_timed)
+        finally:
+            _current.reset(token)
+
+def install(app, settings):
+    """
+    Wire the middleware into the app; a no-op when request metrics are off.
+    Engines are created lazily per process, so Database hooks each one
+    (instrument_engine) when it builds it.
+    """
+    if not settings.request_metrics:
+        return
+    app.add_middleware(RequestMetricsMiddleware)
@@ -0,0 +1,143 @@
+import csv
+import io
+import json
+from datetime import date, datetime
+from typing import Literal, Optional
+from fastapi import APIRouter, Depends, Query, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func, select
+from ..db import Database, read_pinned, team_database
+from .. import models
+from ..settings import Team
+from ..teams import get_team
+from ..totals import COUNTING_FIELDS
+
+router = APIRouter(prefix="/export", tags=["export"])
+
+# rows fetched per round trip from the server-side cursor
+_CHUNK = 1000
+
+Format = Literal["csv", "ndjson"]
+
+def _jsonable(v):
+    return v.isoformat() if isinstance(v, (date, datetime)) else v
+
+def _stream(stmt, fmt: Format, session_factory):
+    """
+    Yield the rows of `stmt` encoded as CSV or NDJSON, one chunk at a time.
+    The session is opened here (not via get_db) because the response body is
+    produced after the endpoint returns; yield_per keeps a server-side cursor
+    so only one chunk is held in memory.
+    """
+    with session_factory() as db:
+        result = db.execute(stmt, execution_options={"yield_per": _CHUNK})
+        columns = list(result.keys())
+        buf = io.StringIO()
+        writer = csv.writer(buf) if fmt == "csv" else None
+        if writer:
+            writer.writerow(columns)
+        for part in result.partitions():
+            for row in part:
+                if writer:
+                    writer.writerow([_jsonable(v) for v in row])
+                else:
+                    buf.write(json.dumps({k: _jsonable(v) for k, v in zip(columns, row)}))
+                    buf.write("\n")
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+        if buf.tell():
+            yield buf.getvalue()
+
+def _response(request: Request, database: Database, stmt, fmt: Format, name: str) -> StreamingResponse:
+    # exports read from the replica unless the client just wrote
+    session_factory = database.SessionLocal if read_pinned(request) else database.ReadSessionLocal
+    media_type = "text/csv" if fmt == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        _stream(stmt, fmt, session_factory),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{name}.{fmt}"'},
+    )
+
+@router.get("/stats")
+def export_stats(
+    request: Request,
+    team: Team = Depends(get_team),
+    database: Database = Depends(team_database),
+    player_id: Optional[int] = None,
+    game_id: Optional[int] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    format: Format = Query("csv"),
+):
+    stat = models.PlayerGameStat
+    stmt = select(
+        stat.id,
+        stat.player_id,
+        models.Player.first_name.label("player_first_name"),
+        models.Player.last_name.label("player_last_name"),
+        stat.game_id,
+        models.Game.date.label("game_date"),
+        models.Game.opponent,
+        *[getattr(stat, f) for f in COUNTING_FIELDS],
+        stat.created_at,
+    ).join(models.Player, models.Player.id == stat.player_id)\
+     .join(models.Game, models.Game.id == stat.game_id)\
+     .where(stat.team_id == team.id)
+
+    if player_id is not None:
+        stmt = stmt.where(stat.player_id == player_id)
+    if game_id is not None:
+        stmt = stmt.where(stat.game_id == game_id)
+    if date_from is not None:
+        stmt = stmt.where(models.Game.date >= date_from)
+    if date_to is not None:
+        stmt = stmt.where(models.Game.date <= date_to)
+
+    stmt = stmt.order_by(stat.game_id.desc(), stat.player_id.asc())
+    return _response(request, database, stmt, format, "stats")
+
+@router.get("/games")
+def export_games(
+    request: Request,
+    team: Team = Depends(get_team),
+    database: Database = Depends(team_database),
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    opponent: Optional[str] = None,
+    format: Format = Query("csv"),
+):
+    stmt = select(*models.Game.__table__.columns).where(models.Game.team_id == team.id)
+    if opponent:
+        stmt = stmt.where(models.Game.opponent.ilike(f"%{opponent.strip()}%"))
+    if date_from:
+        stmt = stmt.where(models.Game.date >= date_from)
+    if date_to:
+        stmt = stmt.where(models.Game.date <= date_to)
+    stmt = stmt.order_by(models.Game.date.desc())
+    return _response(request, database, stmt, format, "games")
+
+@router.get("/players")
+def export_players(
+    request: Request,
+    team: Team = Depends(get_team),
+    database: Database = Depends(team_database),
+    q: Optional[str] = Query(None, description="Search by name"),
+    format: Format = Query("csv"),
+):
+    totals = models.PlayerTotal
+    stmt = select(
+        *models.Player.__table__.columns,
+        *[
+            func.coalesce(getattr(totals, f), 0).label(f)
+            for f in ["games_played"] + COUNTING_FIELDS
+        ],
+    ).outerjoin(totals, totals.player_id == models.Player.id)\
+     .where(models.Player.team_id == team.id)
+    if q:
+        term = f"%{q.strip()}%"
+        stmt = stmt.where(
+            (models.Player.first_name.ilike(term)) | (models.Player.last_name.ilike(term))
+        )
+    stmt = stmt.order_by(models.Player.last_name, models.Player.first_name)
+    return _response(request, database, stmt, format, "players")
@@ -1,17 +1,27 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select, tuple_
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 from datetime import date
-from ..db import get_db
-from .. import models
-from ..schemas import GameCreate, GameRead
+from ..db import get_db, get_async_db
+from .. import live, metrics, models
+from ..totals import COUNTING_FIELDS
+from ..schemas import GameCreate, GameRead, BoxScoreRead, StatRead, AggregateRead
 from ..security import require_admin
+from ..settings import Team
+from ..teams import get_team
+from ..cache import DataVersion, get_data_version
+from ..pagination import decode_cursor, set_next_cursor
 
 router = APIRouter(prefix="/games", tags=["games"])
 
 @router.post("", response_model=GameRead, status_code=201, dependencies=[Depends(require_admin)])
-def create_game(payload: GameCreate, db: Session = Depends(get_db)):
+def create_game(payload: GameCreate, db: Session = Depends(get_db), team: Team = Depends(get_team),
+                data_version: DataVersion = Depends(get_data_version)):
     game = models.Game(
+        team_id=team.id,
         opponent=payload.opponent.strip(),
         date=payload.date,
         location=payload.location.strip() if payload.location else None,
@@ -19,25 +29,103 @@ def create_game(payload: GameCreate, db: Session = Depends(get_db)):
     )
     db.add(game)
     db.commit()
+    data_version.bump()
     db.refresh(game)
     return game
 
 @router.get("", response_model=List[GameRead])
-def list_games(
-    db: Session = Depends(get_db),
+async def list_games(
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+    team: Team = Depends(get_team),
     date_from: date | None = Query(None),
     date_to: date | None = Query(None),
     opponent: str | None = Query(None),
     limit: int = Query(100, ge=1, le=500),
     offset: int = Query(0, ge=0),
+    cursor: str | None = Query(None, description="Keyset cursor from X-Next-Cursor; overrides offset"),
 ):
-    query = db.query(models.Game)
+    query = select(models.Game).where(models.Game.team_id == team.id)
     if opponent:
-        query = query.filter(models.Game.opponent.ilike(f"%{opponent.strip()}%"))
+        query = query.where(models.Game.opponent.ilike(f"%{opponent.strip()}%"))
     if date_from:
-        query = query.filter(models.Game.date >= date_from)
+        query = query.where(models.Game.date >= date_from)
     if date_to:
-        query = query.filter(models.Game.date <= date_to)
-    games = query.order_by(models.Game.date.desc())\
-                 .offset(offset).limit(limit).all()
+        query = query.where(models.Game.date <= date_to)
+    if cursor:
+        last_date, last_id = decode_cursor(cursor, date, int)
+        query = query.where(tuple_(models.Game.date, models.Game.id) < (last_date, last_id))
+        offset = 0
+    query = query.order_by(models.Game.date.desc(), models.Game.id.desc())\
+                 .offset(offset).limit(limit)
+    games = (await db.scalars(query)).all()
+    set_next_cursor(response, games, limit, lambda g: (g.date, g.id))
     return games
+
+@router.get("/{game_id}/boxscore", response_model=BoxScoreRead)
+async def game_boxscore(game_id: int, db: AsyncSession = Depends(get_async_db),
+                        team: Team = Depends(get_team)):
+    """
+    The game, every player line with names, and team totals in one response.
+    Lines come from one joined query; totals are summed from those lines.
+    """
+    stat = models.PlayerGameStat
+    query = select(models.Game, stat, models.Player.first_name, models.Player.last_name)\
+        .outerjoin(stat, stat.game_id == models.Game.id)\
+        .outerjoin(models.Player, models.Player.id == stat.player_id)\
+        .where(models.Game.id == game_id, models.Game.team_id == team.id)\
+        .order_by(models.Player.last_name, models.Player.first_name)
+    rows = (await db.execute(query)).all()
+    if not rows:
+        raise HTTPException(status_code=404, detail="Game not found")
+
+    game = rows[0][0]
+    lines = [
+        StatRead(
+            id=line.id,
+            player_id=line.player_id,
+            game_id=line.game_id,
+            player_first_name=first_name,
+            player_last_name=last_name,
+            created_at=line.created_at,
+            **{f: getattr(line, f) for f in StatRead.model_fields if f in COUNTING_FIELDS},
+        )
+        for _, line, first_name, last_name in rows if line is not None
+    ]
+    sums = {
+        f: sum(getattr(line, f) for _, line, _, _ in rows if line is not None)
+        for f in COUNTING_FIELDS
+    }
+
+    derived = game.score_ours is None and bool(lines)
+    return BoxScoreRead(
+        game=GameRead.model_validate(game),
+        lines=lines,
+        totals=AggregateRead(**sums, **metrics.one(sums)),
+        score_ours=sums["rbis"] if derived else game.score_ours,
+        score_ours_derived=derived,
+    )
+
+@router.get("/{game_id}/live", response_class=StreamingResponse)
+async def live_feed(game_id: int, request: Request, db: AsyncSession = Depends(get_async_db),
+                    team: Team = Depends(get_team),
+                    data_version: DataVersion = Depends(get_data_version),
+                    broker: live.LocalBroker = Depends(live.get_broker)):
+    """
+    Server-Sent Events for one game. After a `hello` event (carrying the data
+    version), every stat write for the game arrives as a `stat` event with the
+    player's new line and the delta. A `resync` event means updates were
+    dropped for a slow client: refetch the box score. EventSource can't send
+    headers, so pass the team as ?team=.
+    """
+    game = await db.get(models.Game, game_id)
+    if not game or game.team_id != team.id:
+        raise HTTPException(status_code=404, detail="Game not found")
+    # don't hold a pooled connection for the life of the stream
+    await db.close()
+    hello = {"game_id": game_id, "version": data_version.get()}
+    return StreamingResponse(
+        live.event_stream(request, broker, live.channel(team.id, game_id), hello),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,22 +1,21 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from ..db import get_db
+from fastapi import APIRouter, Depends, Request
 from sqlalchemy import text
 from ..security import require_admin
 
 router = APIRouter(prefix="/health", tags=["health"])
 
 @router.get("")
-def health(db: Session = Depends(get_db)):
-    # Try a simple DB query
-    try:
-        db.execute(text("SELECT 1"))
-        db_ok = True
-    except Exception:
-        db_ok = False
+def health(request: Request):
+    # Try a simple query on every shard
+    db_ok = True
+    for database in request.app.state.databases.shards.values():
+        try:
+            with database.SessionLocal() as db:
+                db.execute(text("SELECT 1"))
+        except Exception:
+            db_ok = False
     return {"ok": True, "db": db_ok}
 
 @router.get("/admin")
 def health_admin(_: bool = Depends(require_admin)):
     return {"ok": True, "admin": True}
-    
\ No newline at end of file
@@ -0,0 +1,136 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from datetime import date
+import numpy as np
+from ..db import get_async_db
+from .. import metrics, models
+from ..totals import COUNTING_FIELDS
+from ..schemas import LeaderBoardRead
+from ..settings import Team
+from ..teams import get_team
+
+router = APIRouter(prefix="/leaders", tags=["leaders"])
+
+# Everything a board can rank on, plus the usual abbreviations
+STATS = ["games_played"] + COUNTING_FIELDS + metrics.COUNT_METRICS + metrics.RATE_METRICS
+ALIASES = {
+    "g": "games_played", "ab": "at_bats", "h": "hits", "1b": "singles", "2b": "doubles",
+    "3b": "triples", "hr": "home_runs", "rbi": "rbis", "bb": "walks", "so": "strikeouts",
+    "k": "strikeouts", "sf": "sac_flies", "sh": "sac_bunts", "hbp": "hit_by_pitches",
+    "e": "errors", "pa": "plate_appearances", "tb": "total_bases", "avg": "average",
+    "slg": "slugging", "obp": "on_base_percent", "ops": "on_base_percent_plus_slugging",
+}
+
+def _parse_stats(values: List[str]) -> list[tuple[str, bool]]:
+    """(stat, ascending) pairs; a leading '-' ranks lowest first, e.g. -k_percent."""
+    parsed, unknown = [], []
+    for value in values:
+        for raw in value.split(","):
+            raw = raw.strip().lower()
+            if not raw:
+                continue
+            ascending = raw.startswith("-")
+            name = ALIASES.get(raw.lstrip("-"), raw.lstrip("-"))
+            if name in STATS:
+                parsed.append((name, ascending))
+            else:
+                unknown.append(raw)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown stat: {', '.join(unknown)}")
+    if not parsed:
+        raise HTTPException(status_code=400, detail="stat is required")
+    return list(dict.fromkeys(parsed))
+
+def _totals_query(team_id: int, date_from: date | None, date_to: date | None):
+    """One row per team player with stats, ordered by name then id so ties break the same way every time."""
+    player = models.Player
+    names = [player.id, player.first_name, player.last_name, player.jersey_number]
+    if date_from is None and date_to is None:
+        total = models.PlayerTotal
+        query = select(
+            *names, total.games_played, *[getattr(total, f) for f in COUNTING_FIELDS],
+        ).join(total, total.player_id == player.id)\
+         .where(player.team_id == team_id, total.games_played > 0)
+    else:
+        stat = models.PlayerGameStat
+        query = select(
+            *names, func.count(func.distinct(stat.game_id)),
+            *[func.coalesce(func.sum(getattr(stat, f)), 0) for f in COUNTING_FIELDS],
+        ).select_from(stat)\
+         .join(models.Game, models.Game.id == stat.game_id)\
+         .join(player, player.id == stat.player_id)\
+         .where(stat.team_id == team_id)\
+         .group_by(*names)
+        if date_from is not None:
+            query = query.where(models.Game.date >= date_from)
+        if date_to is not None:
+            query = query.where(models.Game.date <= date_to)
+    return query.order_by(player.last_name, player.first_name, player.id)
+
+def _top_k(values: np.ndarray, eligible: np.ndarray, k: int, ascending: bool) -> np.ndarray:
+    """
+    Indices of the k best eligible rows, best first. Partitioning narrows
+    the field to rows at or above the k-th value before sorting; ties stay in
+    input (name, id) order.
+    """
+    idx = np.flatnonzero(eligible)
+    if not len(idx):
+        return idx
+    keyed = values[idx] if ascending else -values[idx]
+    if len(idx) > k:
+        cutoff = np.partition(keyed, k - 1)[k - 1]
+        idx, keyed = idx[keyed <= cutoff], keyed[keyed <= cutoff]
+    return idx[np.argsort(keyed, kind="stable")][:k]
+
+@router.get("", response_model=List[LeaderBoardRead])
+async def leaders(
+    db: AsyncSession = Depends(get_async_db),
+    team: Team = Depends(get_team),
+    stat: List[str] = Query(..., description="e.g. ops, avg, hr; repeat or comma-separate; prefix '-' for lowest first"),
+    k: int = Query(10, ge=1, le=100, description="Leaders per board"),
+    min_pa: int = Query(0, ge=0, description="Qualifying plate appearances"),
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+):
+    """
+    Top-K players for one or more stats from a single grouped query. Rates and
+    counts are ranked together in NumPy; players under min_pa are left out.
+    """
+    boards = _parse_stats(stat)
+    rows = (await db.execute(_totals_query(team.id, date_from, date_to))).all()
+
+    columns = {f: np.asarray([r[5 + i] for r in rows], dtype=np.int64)
+               for i, f in enumerate(COUNTING_FIELDS)}
+    columns["games_played"] = np.asarray([r[4] for r in rows], dtype=np.int64)
+    derived = metrics.compute(columns)
+    columns.update(derived)
+    eligible = derived["plate_appearances"] >= min_pa
+    pa = derived["plate_appearances"].tolist()
+    games = columns["games_played"].tolist()
+
+    result = []
+    for name, ascending in boards:
+        values = columns[name]
+        if name in metrics.RATE_METRICS:
+            # rank on the value shown, so players level at three decimals tie
+            values = np.asarray(metrics.round_rates(values), dtype=np.float64)
+        top = _top_k(values, eligible, k, ascending).tolist()
+        shown = values[top].tolist()
+        entries, rank = [], 0
+        for pos, (i, value) in enumerate(zip(top, shown)):
+            # standard competition ranking: 1, 2, 2, 4
+            if pos == 0 or values[i] != values[top[pos - 1]]:
+                rank = pos + 1
+            r = rows[i]
+            entries.append({
+                "rank": rank, "player_id": r[0], "first_name": r[1], "last_name": r[2],
+                "jersey_number": r[3], "games_played": games[i],
+                "plate_appearances": pa[i], "value": value,
+            })
+        result.append({
+            "stat": name, "order": "asc" if ascending else "desc",
+            "min_pa": min_pa, "leaders": entries,
+        })
+    return result
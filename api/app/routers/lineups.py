@@ -0,0 +1,138 @@
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import date
+import time
+from ..db import get_async_db
+from .. import models, simulate
+from ..schemas import LineupOptimize, LineupOptimizeRead, LineupSimulate, LineupSimulationRead
+from ..security import require_admin
+from ..settings import Settings, Team
+from ..teams import get_team
+
+router = APIRouter(prefix="/lineups", tags=["lineups"])
+
+# columns the outcome rates are built from
+_FIELDS = ["at_bats"] + list(simulate.OUTCOME_FIELDS.values())
+
+async def _lines(db: AsyncSession, team_id: int, player_ids: list[int],
+                 date_from: date | None, date_to: date | None) -> list[dict]:
+    """Counting totals for each of the team's players, in the order given."""
+    if len(set(player_ids)) != len(player_ids):
+        raise HTTPException(status_code=400, detail="A player can only bat once in a lineup")
+    player = models.Player
+    if date_from is None and date_to is None:
+        total = models.PlayerTotal
+        query = select(
+            player.id, player.first_name, player.last_name,
+            *[func.coalesce(getattr(total, f), 0).label(f) for f in _FIELDS],
+        ).outerjoin(total, total.player_id == player.id)
+    else:
+        stat = models.PlayerGameStat
+        sums = select(
+            stat.player_id, *[func.sum(getattr(stat, f)).label(f) for f in _FIELDS],
+        ).join(models.Game, models.Game.id == stat.game_id)\
+         .where(stat.team_id == team_id, stat.player_id.in_(player_ids))
+        if date_from is not None:
+            sums = sums.where(models.Game.date >= date_from)
+        if date_to is not None:
+            sums = sums.where(models.Game.date <= date_to)
+        sums = sums.group_by(stat.player_id).subquery()
+        query = select(
+            player.id, player.first_name, player.last_name,
+            *[func.coalesce(getattr(sums.c, f), 0).label(f) for f in _FIELDS],
+        ).outerjoin(sums, sums.c.player_id == player.id)
+    rows = {r["id"]: dict(r) for r in (await db.execute(
+        query.where(player.team_id == team_id, player.id.in_(player_ids))
+    )).mappings()}
+    missing = [pid for pid in player_ids if pid not in rows]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Player not found: {', '.join(map(str, missing))}")
+    return [rows[pid] for pid in player_ids]
+
+async def simulation_slot(request: Request, team: Team = Depends(get_team)):
+    """
+    Holds one of the team's simulation_per_team slots in this worker for the
+    request; the process pool is shared, so one team can't queue up work
+    for everyone else.
+    """
+    settings: Settings = request.app.state.settings
+    running: dict[int, int] = request.app.state.simulations
+    if running.get(team.id, 0) >= settings.simulation_per_team:
+        raise HTTPException(status_code=429, detail="A simulation for this team is already running",
+                            headers={"Retry-After": "1"})
+    running[team.id] = running.get(team.id, 0) + 1
+    try:
+        yield
+    finally:
+        running[team.id] -= 1
+
+def _limits(request: Request, games: int, budget_ms: int) -> tuple[int, float]:
+    """(games, budget in seconds) held to the server's ceilings."""
+    settings: Settings = request.app.state.settings
+    return (min(games, settings.simulation_max_games),
+            min(budget_ms, settings.simulation_max_budget_ms) / 1000)
+
+def _slots(lines: list[dict], probabilities) -> list[dict]:
+    return [
+        {
+            "player_id": line["id"], "first_name": line["first_name"], "last_name": line["last_name"],
+            "plate_appearances": line["at_bats"] + line["walks"] + line["hit_by_pitches"]
+                                 + line["sac_flies"] + line["sac_bunts"],
+            "probabilities": dict(zip(simulate.OUTCOMES, [round(p, 4) for p in row.tolist()])),
+        }
+        for line, row in zip(lines, probabilities)
+    ]
+
+@router.post("/simulate", response_model=LineupSimulationRead,
+             dependencies=[Depends(require_admin), Depends(simulation_slot)])
+async def simulate_lineup(payload: LineupSimulate, request: Request,
+                          db: AsyncSession = Depends(get_async_db), team: Team = Depends(get_team)):
+    """
+    Expected runs per game for a batting order. Each player's per-PA outcome
+    rates come from their stats; games are simulated in NumPy batches on a
+    process pool until done or until budget_ms runs out, in which case the
+    estimate covers the games that finished. games and budget_ms are held
+    to the server's SIMULATION_MAX_GAMES / SIMULATION_MAX_BUDGET_MS.
+    """
+    started = time.perf_counter()
+    lines = await _lines(db, team.id, payload.lineup, payload.date_from, payload.date_to)
+    await db.close()  # nothing else to read; don't hold a connection while simulating
+    probabilities = simulate.outcome_probabilities(lines)
+    games, budget_seconds = _limits(request, payload.games, payload.budget_ms)
+    summary, truncated = await simulate.simulate(
+        probabilities, games, payload.innings, payload.seed, budget_seconds,
+    )
+    return {
+        **summary, "lineup": _slots(lines, probabilities), "innings": payload.innings,
+        "truncated": truncated, "elapsed_ms": round((time.perf_counter() - started) * 1e3, 1),
+    }
+
+@router.post("/optimize", response_model=LineupOptimizeRead,
+             dependencies=[Depends(require_admin), Depends(simulation_slot)])
+async def optimize_lineup(payload: LineupOptimize, request: Request,
+                          db: AsyncSession = Depends(get_async_db), team: Team = Depends(get_team)):
+    """
+    Search for a better batting order of the given players: rounds of
+    pairwise swaps, every candidate in a round simulated in parallel with the
+    same random numbers, stopping when no swap helps or budget_ms runs out.
+    Held to the same server ceilings as /lineups/simulate.
+    """
+    started = time.perf_counter()
+    lines = await _lines(db, team.id, payload.lineup, payload.date_from, payload.date_to)
+    await db.close()
+    probabilities = simulate.outcome_probabilities(lines)
+    games, budget_seconds = _limits(request, payload.games, payload.budget_ms)
+    result = await simulate.optimize(
+        probabilities, list(range(len(lines))), games, payload.innings,
+        payload.seed, budget_seconds,
+    )
+    best_lines = [lines[i] for i in result["order"]]
+    return {
+        "lineup": _slots(best_lines, probabilities[result["order"]]),
+        "innings": payload.innings,
+        "best": result["best"], "baseline": result["baseline"],
+        "candidates_evaluated": result["evaluated"], "rounds": result["rounds"],
+        "truncated": result["truncated"],
+        "elapsed_ms": round((time.perf_counter() - started) * 1e3, 1),
+    }
@@ -0,0 +1,10 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from ..observability import render_metrics
+
+router = APIRouter(tags=["monitoring"])
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Per-route request histograms in Prometheus text format (this worker only)."""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
@@ -1,104 +1,180 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy import func, select, tuple_
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
-from ..db import get_db
-from .. import models
-from ..schemas import PlayerCreate, PlayerRead
+from datetime import date
+from ..db import get_db, get_async_db
+from .. import metrics, models
+from ..totals import COUNTING_FIELDS
+from ..schemas import PlayerCreate, PlayerRead, PlayerSearchRead, PlayerTrendRead
+from ..search import IndexHolder
 from ..security import require_admin
-
-def _safe_div(n: float, d: float) -> float:
-    return float(n / d) if d else 0.0
+from ..settings import Team
+from ..teams import get_team
+from ..cache import DataVersion, get_data_version
+from ..pagination import decode_cursor, set_next_cursor
+from ..observability import TimedORJSONResponse
 
 router = APIRouter(prefix="/players", tags=["players"])
 
 @router.post("", response_model=PlayerRead, status_code=201, dependencies=[Depends(require_admin)])
-def create_player(payload: PlayerCreate, db: Session = Depends(get_db)):
+def create_player(payload: PlayerCreate, db: Session = Depends(get_db), team: Team = Depends(get_team),
+                  data_version: DataVersion = Depends(get_data_version)):
     player = models.Player(
+        team_id=team.id,
         first_name=payload.first_name.strip(),
         last_name=payload.last_name.strip(),
         jersey_number=payload.jersey_number,
     )
+    player.totals = models.PlayerTotal()
     db.add(player)
     db.commit()
+    data_version.bump()
     db.refresh(player)
     return player
 
 @router.get("", response_model=List[PlayerRead])
-def list_players(
-    db: Session = Depends(get_db),
-    q: str | None = Query(None, description="Search by name"),
+async def list_players(
+    db: AsyncSession = Depends(get_async_db),
+    team: Team = Depends(get_team),
+    q: str | None = Query(None, description="Search by name (substring; use /players/search for typeahead)"),
     limit: int = Query(100, ge=1, le=500),
     offset: int = Query(0, ge=0),
+    cursor: str | None = Query(None, description="Keyset cursor from X-Next-Cursor; overrides offset"),
 ):
-    query = db.query(models.Player)
+    # Totals are maintained in player_totals, so the page joins one row per
+    # player by primary key; players without any stats come back with zeros.
+    fields = ["games_played"] + COUNTING_FIELDS
+    query = select(
+        models.Player.id, models.Player.first_name, models.Player.last_name,
+        models.Player.jersey_number, models.Player.created_at,
+        *[func.coalesce(getattr(models.PlayerTotal, f), 0).label(f) for f in fields],
+    ).outerjoin(models.PlayerTotal, models.PlayerTotal.player_id == models.Player.id)\
+     .where(models.Player.team_id == team.id)
     if q:
         term = f"%{q.strip()}%"
-        query = query.filter(
+        query = query.where(
             (models.Player.first_name.ilike(term)) | (models.Player.last_name.ilike(term))
         )
-    players = query.order_by(models.Player.last_name, models.Player.first_name)\
-                   .offset(offset).limit(limit).all()
+    if cursor:
+        last = decode_cursor(cursor, str, str, int)
+        query = query.where(
+            tuple_(models.Player.last_name, models.Player.first_name, models.Player.id) > tuple(last)
+        )
+        offset = 0
+    query = query.order_by(models.Player.last_name, models.Player.first_name, models.Player.id)\
+                 .offset(offset).limit(limit)
+    rows = [dict(r) for r in (await db.execute(query)).mappings()]
+
+    # Derived stats for the whole page at once
+    derived = metrics.rows({f: [r[f] for r in rows] for f in metrics.INPUT_FIELDS})
+
+    # Trusted DB output: build PlayerRead-shaped dicts and encode once with
+    # orjson instead of validating a model per row
+    keys = list(PlayerRead.model_fields)
+    merged = [{**r, **d} for r, d in zip(rows, derived)]
+    response = TimedORJSONResponse([{k: m[k] for k in keys} for m in merged])
+    set_next_cursor(response, rows, limit, lambda r: (r["last_name"], r["first_name"], r["id"]))
+    return response
+
+@router.get("/search", response_model=List[PlayerSearchRead])
+async def search_players(
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    team: Team = Depends(get_team),
+    prefix: str = Query(..., min_length=1, max_length=100, description="Name prefix or jersey number"),
+    limit: int = Query(10, ge=1, le=50),
+):
+    """
+    Typeahead for the name box: prefix matches on last name, first name or
+    "first last", plus exact jersey numbers, served from an in-memory index.
+    """
+    holders = request.app.state.player_indexes
+    if team.id not in holders:
+        holders[team.id] = IndexHolder(team.id, request.app.state.data_version)
+    index = await holders[team.id].get(db)
+    return TimedORJSONResponse(index.search(prefix, limit))
 
-    # Calculate aggregated stats for each player
-    result = []
-    for player in players:
-        # Get aggregated stats for this player
-        stats_query = db.query(
-            func.coalesce(func.sum(models.PlayerGameStat.at_bats), 0),
-            func.coalesce(func.sum(models.PlayerGameStat.hits), 0),
-            func.coalesce(func.sum(models.PlayerGameStat.singles), 0),
-            func.coalesce(func.sum(models.PlayerGameStat.doubles), 0),
-            func.coalesce(func.sum(models.PlayerGameStat.triples), 0),
-            func.coalesce(func.sum(models.PlayerGameStat.home_runs), 0),
-            func.coalesce(func.sum(models.PlayerGameStat.rbis), 0),
-            func.coalesce(func.sum(models.PlayerGameStat.walks), 0),
-            func.coalesce(func.sum(models.PlayerGameStat.strikeouts), 0),
-            func.coalesce(func.sum(models.PlayerGameStat.sac_flies), 0),
-            func.coalesce(func.sum(models.PlayerGameStat.sac_bunts), 0),
-            func.coalesce(func.sum(models.PlayerGameStat.hit_by_pitches), 0),
-            func.coalesce(func.sum(models.PlayerGameStat.errors), 0),
-        ).filter(models.PlayerGameStat.player_id == player.id)
-        
-        (ab, h, s1, s2, s3, hr, rbi, bb, so, sf, sb, hbp, err) = stats_query.one()
+def _trend_query(team_id: int, date_from: date | None, date_to: date | None):
+    stat = models.PlayerGameStat
+    query = select(
+        stat.player_id, stat.game_id, models.Game.date, models.Game.opponent,
+        *[getattr(stat, f) for f in COUNTING_FIELDS],
+    ).join(models.Game, models.Game.id == stat.game_id).where(stat.team_id == team_id)
+    if date_from is not None:
+        query = query.where(models.Game.date >= date_from)
+    if date_to is not None:
+        query = query.where(models.Game.date <= date_to)
+    return query.order_by(stat.player_id, models.Game.date, models.Game.id)
 
-        # Count games played separately
-        games_count = db.query(func.count(models.PlayerGameStat.id)).filter(
-            models.PlayerGameStat.player_id == player.id
-        ).scalar() or 0
+def _trends(rows, players: dict, window: int) -> list[dict]:
+    """Rolling totals and rates for rows already ordered by (player, game date)."""
+    if not rows:
+        return []
+    starts = [i for i, r in enumerate(rows) if i == 0 or r.player_id != rows[i - 1].player_id]
+    sums, games = metrics.rolling(
+        {f: [getattr(r, f) for r in rows] for f in COUNTING_FIELDS}, window, starts
+    )
+    derived = metrics.rows(sums)
+    sums = {f: v.tolist() for f, v in sums.items()}
+    games = games.tolist()
+
+    result = {}
+    for i, r in enumerate(rows):
+        if r.player_id not in result:
+            p = players[r.player_id]
+            result[r.player_id] = {
+                "player_id": p.id, "first_name": p.first_name, "last_name": p.last_name,
+                "window": window, "games": [],
+            }
+        result[r.player_id]["games"].append({
+            "game_id": r.game_id, "date": r.date, "opponent": r.opponent,
+            "games_in_window": games[i],
+            **{f: sums[f][i] for f in COUNTING_FIELDS},
+            **derived[i],
+        })
+    return list(result.values())
 
-        # Calculate derived stats
-        plate_appearances = int(ab + bb + hbp + sf)
-        total_bases = int(s1 + 2 * s2 + 3 * s3 + 4 * hr)
-        avg = _safe_div(h, ab)
-        slg = _safe_div(total_bases, ab)
-        obp = _safe_div(h + bb + hbp, plate_appearances)
-        ops = obp + slg
-        
-        # Create player dict with stats
-        player_dict = {
-            **player.__dict__,
-            'games_played': int(games_count),
-            'plate_appearances': plate_appearances,
-            'at_bats': int(ab),
-            'hits': int(h),
-            'singles': int(s1),
-            'doubles': int(s2),
-            'triples': int(s3),
-            'home_runs': int(hr),
-            'rbis': int(rbi),
-            'walks': int(bb),
-            'strikeouts': int(so),
-            'sac_bunts': int(sb),
-            'sac_flies': int(sf),
-            'hit_by_pitches': int(hbp),
-            'errors': int(err),
-            'total_bases': total_bases,
-            'average': round(avg, 3),
-            'slugging': round(slg, 3),
-            'on_base_percent': round(obp, 3),
-            'on_base_percent_plus_slugging': round(ops, 3),
-        }
-        result.append(PlayerRead(**player_dict))
+@router.get("/trend", response_model=List[PlayerTrendRead])
+async def roster_trend(
+    db: AsyncSession = Depends(get_async_db),
+    team: Team = Depends(get_team),
+    window: int = Query(5, ge=1, le=200, description="Trailing games per point"),
+    date_from: date | None = Query(None),
+    date_to: date | None = Query(None),
+):
+    """Rolling game-log trend for every player with stats in the date range."""
+    rows = (await db.execute(_trend_query(team.id, date_from, date_to))).all()
+    players = {
+        p.id: p for p in await db.scalars(
+            select(models.Player).where(models.Player.id.in_({r.player_id for r in rows}))
+        )
+    }
+    return _trends(rows, players, window)
 
-    return result
+@router.get("/{player_id}/trend", response_model=PlayerTrendRead)
+async def player_trend(
+    player_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    team: Team = Depends(get_team),
+    window: int = Query(5, ge=1, le=200, description="Trailing games per point"),
+    date_from: date | None = Query(None),
+    date_to: date | None = Query(None),
+):
+    """
+    Per-game rolling totals and rates for one player, e.g. last-5 AVG/OPS.
+    Each point covers the `window` games ending at that game.
+    """
+    player = await db.get(models.Player, player_id)
+    if not player or player.team_id != team.id:
+        raise HTTPException(status_code=404, detail="Player not found")
+    query = _trend_query(team.id, date_from, date_to).where(models.PlayerGameStat.player_id == player_id)
+    rows = (await db.execute(query)).all()
+    trends = _trends(rows, {player.id: player}, window)
+    if not trends:
+        return PlayerTrendRead(
+            player_id=player.id, first_name=player.first_name, last_name=player.last_name,
+            window=window, games=[],
+        )
+    return trends[0]
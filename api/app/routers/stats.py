@@ -1,36 +1,53 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_, or_, select
 from typing import List, Optional
+from collections import Counter
 from datetime import date
 from sqlalchemy import func
-from ..schemas import AggregateRead
-from ..db import get_db
+from ..schemas import AggregateRead, SplitRead
+from ..db import get_db, get_async_db
 from .. import models
-from ..schemas import StatCreate, StatRead
+from ..schemas import AuditRead, StatCreate, StatRead, TotalsRebuildRead
+from ..schemas import StatBulkCreate, StatBulkRead, StatQueuedRead
 from ..security import require_admin
+from ..settings import Team
+from ..teams import get_team
+from .. import audit, bulk, live, metrics, totals
+from ..cache import DataVersion, get_data_version
+from ..pagination import decode_cursor, set_next_cursor
+from ..observability import TimedORJSONResponse
 
 router = APIRouter(prefix="/stats", tags=["stats"])
 
 @router.post("", response_model=StatRead, status_code=201, dependencies=[Depends(require_admin)])
-def upsert_stat(payload: StatCreate, db: Session = Depends(get_db)):
-    # ensure player & game exist (helpful error)
-    if not db.get(models.Player, payload.player_id):
+def upsert_stat(payload: StatCreate, db: Session = Depends(get_db), team: Team = Depends(get_team),
+                data_version: DataVersion = Depends(get_data_version),
+                broker: live.LocalBroker = Depends(live.get_broker)):
+    # ensure player & game exist on this team (helpful error)
+    player = db.get(models.Player, payload.player_id)
+    if not player or player.team_id != team.id:
         raise HTTPException(status_code=404, detail="Player not found")
-    if not db.get(models.Game, payload.game_id):
+    game = db.get(models.Game, payload.game_id)
+    if not game or game.team_id != team.id:
         raise HTTPException(status_code=404, detail="Game not found")
 
+    # Lock the line until commit: the totals delta is computed from it, and a
+    # concurrent write to the same line must not start from the same old values.
     stat = db.query(models.PlayerGameStat).filter(
         and_(
             models.PlayerGameStat.player_id == payload.player_id,
             models.PlayerGameStat.game_id == payload.game_id,
         )
-    ).one_or_none()
+    ).with_for_update().one_or_none()
 
+    old = totals.stat_values(stat)
     if stat is None:
         stat = models.PlayerGameStat(
             player_id=payload.player_id,
             game_id=payload.game_id,
+            team_id=team.id,
         )
         db.add(stat)
 
@@ -41,10 +58,14 @@ def upsert_stat(payload: StatCreate, db: Session = Depends(get_db)):
     ]:
         setattr(stat, field, getattr(payload, field))
 
+    # keep player_totals in step within the same transaction
+    new = totals.stat_values(stat)
+    totals.apply_delta(db, payload.player_id, old, new)
     db.commit()
+    version = data_version.bump()
     db.refresh(stat)
     
-    player = db.get(models.Player, stat.player_id)
+    broker.publish(live.channel(team.id, stat.game_id), live.stat_message(player, old, new, version))
     stat_dict = {
         **stat.__dict__,
         'player_first_name': player.first_name,
@@ -53,47 +74,92 @@ def upsert_stat(payload: StatCreate, db: Session = Depends(get_db)):
     
     return StatRead(**stat_dict)
 
+@router.post("/bulk", response_model=StatBulkRead, dependencies=[Depends(require_admin)])
+def bulk_upsert_stats(payload: StatBulkCreate, db: Session = Depends(get_db),
+                      team: Team = Depends(get_team),
+                      data_version: DataVersion = Depends(get_data_version),
+                      broker: live.LocalBroker = Depends(live.get_broker)):
+    """
+    Upsert a full box score (or several games) in one transaction. Lines that
+    reference an unknown player or game are reported and skipped; the rest are
+    written with a single multi-row upsert.
+    """
+    # last line wins when the same (player, game) appears twice
+    lines = {(l.player_id, l.game_id): l.model_dump(include=set(bulk.LINE_FIELDS)) for l in payload.lines}
+    results = bulk.write_lines(db, lines, team.id, data_version, broker)
+
+    counts = Counter(r["status"] for r in results)
+    return StatBulkRead(
+        created=counts["created"],
+        updated=counts["updated"],
+        errors=counts["error"],
+        results=results,
+    )
+
+@router.post("/deferred", response_model=StatQueuedRead, status_code=202, dependencies=[Depends(require_admin)])
+def queue_stat(payload: StatCreate, request: Request, team: Team = Depends(get_team)):
+    """
+    Write-behind variant of POST /stats for live scorekeeping: the line is
+    queued and acknowledged without touching the database. Repeated updates
+    to the same player and game are coalesced and written in batches a few
+    hundred ms later; lines naming an unknown player or game are dropped then.
+    """
+    line = payload.model_dump(include=set(bulk.LINE_FIELDS))
+    pending = request.app.state.stat_queue.put(team.id, payload.player_id, payload.game_id, line)
+    return StatQueuedRead(player_id=payload.player_id, game_id=payload.game_id, pending=pending)
+
 @router.get("", response_model=List[StatRead])
-def list_stats(
-    db: Session = Depends(get_db),
+async def list_stats(
+    db: AsyncSession = Depends(get_async_db),
+    team: Team = Depends(get_team),
     player_id: Optional[int] = None,
     game_id: Optional[int] = None,
     limit: int = Query(200, ge=1, le=1000),
     offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="Keyset cursor from X-Next-Cursor; overrides offset"),
 ):
-    query = db.query(
-        models.PlayerGameStat,
-        models.Player.first_name,
-        models.Player.last_name
-    ).join(models.Player, models.Player.id == models.PlayerGameStat.player_id)
+    # Plain columns in StatRead field order; the rows are encoded as-is
+    columns = {
+        "player_first_name": models.Player.first_name,
+        "player_last_name": models.Player.last_name,
+    }
+    query = select(*[
+        columns[k] if k in columns else getattr(models.PlayerGameStat, k)
+        for k in StatRead.model_fields
+    ]).join(models.Player, models.Player.id == models.PlayerGameStat.player_id)\
+      .where(models.PlayerGameStat.team_id == team.id)
 
     if player_id is not None:
-        query = query.filter(models.PlayerGameStat.player_id == player_id)
+        query = query.where(models.PlayerGameStat.player_id == player_id)
     if game_id is not None:
-        query = query.filter(models.PlayerGameStat.game_id == game_id)
+        query = query.where(models.PlayerGameStat.game_id == game_id)
+    if cursor:
+        # mixed sort directions, so the seek is spelled out rather than a row-value compare
+        last_game, last_player = decode_cursor(cursor, int, int)
+        query = query.where(or_(
+            models.PlayerGameStat.game_id < last_game,
+            and_(
+                models.PlayerGameStat.game_id == last_game,
+                models.PlayerGameStat.player_id > last_player,
+            ),
+        ))
+        offset = 0
 
-    results = query.order_by(
-        models.PlayerGameStat.game_id.desc(), 
+    query = query.order_by(
+        models.PlayerGameStat.game_id.desc(),
         models.PlayerGameStat.player_id.asc()
-    ).offset(offset).limit(limit).all()
+    ).offset(offset).limit(limit)
+    keys = list(StatRead.model_fields)
+    results = [dict(zip(keys, r)) for r in (await db.execute(query)).all()]
 
-    stats = []
-    for stat, first_name, last_name in results:
-        stat_dict = {
-            **stat.__dict__,
-            'player_first_name': first_name,
-            'player_last_name': last_name
-        }
-        stats.append(StatRead(**stat_dict))
-
-    return stats
-
-def _safe_div(n: float, d: float) -> float:
-    return float(n / d) if d else 0.0
+    response = TimedORJSONResponse(results)
+    set_next_cursor(response, results, limit, lambda r: (r["game_id"], r["player_id"]))
+    return response
 
 @router.get("/aggregate", response_model=AggregateRead)
-def aggregate_stats(
-    db: Session = Depends(get_db),
+async def aggregate_stats(
+    db: AsyncSession = Depends(get_async_db),
+    team: Team = Depends(get_team),
     player_id: Optional[int] = None,
     game_id: Optional[int] = None,
     date_from: Optional[date] = None,
@@ -106,54 +172,128 @@ def aggregate_stats(
       - date range (by Game.date): team or player within span
       - combine filters as needed (e.g., player_id + date_from/to)
     """
-    q = db.query(
-        func.coalesce(func.sum(models.PlayerGameStat.at_bats), 0),
-        func.coalesce(func.sum(models.PlayerGameStat.hits), 0),
-        func.coalesce(func.sum(models.PlayerGameStat.singles), 0),
-        func.coalesce(func.sum(models.PlayerGameStat.doubles), 0),
-        func.coalesce(func.sum(models.PlayerGameStat.triples), 0),
-        func.coalesce(func.sum(models.PlayerGameStat.home_runs), 0),
-        func.coalesce(func.sum(models.PlayerGameStat.rbis), 0),
-        func.coalesce(func.sum(models.PlayerGameStat.walks), 0),
-        func.coalesce(func.sum(models.PlayerGameStat.strikeouts), 0),
-        func.coalesce(func.sum(models.PlayerGameStat.sac_flies), 0),
-        func.coalesce(func.sum(models.PlayerGameStat.hit_by_pitches), 0),
-        func.coalesce(func.sum(models.PlayerGameStat.errors), 0),
-    ).join(models.Game, models.Game.id == models.PlayerGameStat.game_id)
+    fields = totals.COUNTING_FIELDS
+    if game_id is None and date_from is None and date_to is None:
+        # Career totals are maintained in player_totals; read them directly
+        # instead of re-summing the whole stats history.
+        q = select(*[
+            func.coalesce(func.sum(getattr(models.PlayerTotal, f)), 0) for f in fields
+        ]).join(models.Player, models.Player.id == models.PlayerTotal.player_id)\
+          .where(models.Player.team_id == team.id)
+        if player_id is not None:
+            q = q.where(models.PlayerTotal.player_id == player_id)
+    else:
+        q = select(*[
+            func.coalesce(func.sum(getattr(models.PlayerGameStat, f)), 0) for f in fields
+        ]).select_from(models.PlayerGameStat)\
+          .join(models.Game, models.Game.id == models.PlayerGameStat.game_id)\
+          .where(models.PlayerGameStat.team_id == team.id)
+
+        if player_id is not None:
+            q = q.where(models.PlayerGameStat.player_id == player_id)
+        if game_id is not None:
+            q = q.where(models.PlayerGameStat.game_id == game_id)
+        if date_from is not None:
+            q = q.where(models.Game.date >= date_from)
+        if date_to is not None:
+            q = q.where(models.Game.date <= date_to)
+
+    sums = {f: int(v) for f, v in zip(fields, (await db.execute(q)).one())}
+    return AggregateRead(**sums, **metrics.one(sums))
+
+# group_by name -> (key name, column) pairs making up that part of the bucket key
+_SPLITS = {
+    "opponent": [("opponent", models.Game.opponent)],
+    "location": [("location", models.Game.location)],
+    "month": [("year", func.extract("year", models.Game.date)),
+              ("month", func.extract("month", models.Game.date))],
+    "game": [("game_id", models.PlayerGameStat.game_id), ("date", models.Game.date)],
+    "player": [("player_id", models.PlayerGameStat.player_id),
+               ("first_name", models.Player.first_name),
+               ("last_name", models.Player.last_name)],
+}
+
+@router.get("/aggregate/splits", response_model=List[SplitRead])
+async def aggregate_splits(
+    db: AsyncSession = Depends(get_async_db),
+    team: Team = Depends(get_team),
+    group_by: List[str] = Query(..., description="opponent, month, location, game, player; repeat or comma-separate to combine"),
+    player_id: Optional[int] = None,
+    game_id: Optional[int] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+):
+    """
+    Totals and rates for every bucket of the requested split(s) in a single
+    grouped query. Takes the same filters as /stats/aggregate.
+    """
+    splits = [g.strip() for value in group_by for g in value.split(",") if g.strip()]
+    unknown = [g for g in splits if g not in _SPLITS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown group_by: {', '.join(unknown)}")
+    if not splits:
+        raise HTTPException(status_code=400, detail="group_by is required")
+    splits = list(dict.fromkeys(splits))
+    keys = [kc for g in splits for kc in _SPLITS[g]]
+
+    fields = totals.COUNTING_FIELDS
+    q = select(
+        *[col.label(f"k_{name}") for name, col in keys],
+        func.count(func.distinct(models.PlayerGameStat.game_id)),
+        *[func.coalesce(func.sum(getattr(models.PlayerGameStat, f)), 0) for f in fields],
+    ).select_from(models.PlayerGameStat)\
+     .join(models.Game, models.Game.id == models.PlayerGameStat.game_id)\
+     .where(models.PlayerGameStat.team_id == team.id)
+    if "player" in splits:
+        q = q.join(models.Player, models.Player.id == models.PlayerGameStat.player_id)
 
     if player_id is not None:
-        q = q.filter(models.PlayerGameStat.player_id == player_id)
+        q = q.where(models.PlayerGameStat.player_id == player_id)
     if game_id is not None:
-        q = q.filter(models.PlayerGameStat.game_id == game_id)
+        q = q.where(models.PlayerGameStat.game_id == game_id)
     if date_from is not None:
-        q = q.filter(models.Game.date >= date_from)
+        q = q.where(models.Game.date >= date_from)
     if date_to is not None:
-        q = q.filter(models.Game.date <= date_to)
-
-    (ab, h, s1, s2, s3, hr, rbi, bb, so, sf, hbp, errs) = q.one()
-
-    total_bases = int(s1 + 2 * s2 + 3 * s3 + 4 * hr)
-    avg = _safe_div(h, ab)
-    slg = _safe_div(total_bases, ab)
-    obp = _safe_div(h + bb + hbp, ab + bb + hbp + sf)
-    ops = obp + slg
-
-    return AggregateRead(
-        at_bats=int(ab),
-        hits=int(h),
-        singles=int(s1),
-        doubles=int(s2),
-        triples=int(s3),
-        home_runs=int(hr),
-        rbis=int(rbi),
-        walks=int(bb),
-        strikeouts=int(so),
-        sac_flies=int(sf),
-        hit_by_pitches=int(hbp),
-        errors=int(errs),
-        total_bases=total_bases,
-        average=round(avg, 3),
-        slugging=round(slg, 3),
-        on_base_percent=round(obp, 3),
-        on_base_percent_plus_slugging=round(ops, 3),
-    )
\ No newline at end of file
+        q = q.where(models.Game.date <= date_to)
+
+    group_cols = [col for _, col in keys]
+    rows = (await db.execute(q.group_by(*group_cols).order_by(*group_cols))).all()
+    if not rows:
+        return []
+
+    n = len(keys)
+    sums = [{f: int(v) for f, v in zip(fields, r[n + 1:])} for r in rows]
+    derived = metrics.rows({f: [s[f] for s in sums] for f in metrics.INPUT_FIELDS})
+
+    result = []
+    for r, s, d in zip(rows, sums, derived):
+        split = {name: r[i] for i, (name, _) in enumerate(keys)}
+        if "month" in splits:
+            split["month"] = f"{int(split.pop('year')):04d}-{int(split['month']):02d}"
+        result.append(SplitRead(split=split, games=r[n], **s, **d))
+    return result
+
+@router.post("/totals/rebuild", response_model=TotalsRebuildRead, dependencies=[Depends(require_admin)])
+def rebuild_totals(db: Session = Depends(get_db), team: Team = Depends(get_team),
+                   data_version: DataVersion = Depends(get_data_version)):
+    """
+    Recompute the team's player_totals from player_game_stats and report any
+    rows that had drifted from the per-game history.
+    """
+    report = totals.rebuild(db, team.id)
+    data_version.bump()
+    return report
+
+@router.post("/audit", response_model=AuditRead, dependencies=[Depends(require_admin)])
+async def audit_stats(request: Request, team: Team = Depends(get_team),
+                      sample: int = Query(20, ge=0, le=200)):
+    """
+    Check every one of the team's stat rows against the StatBase rules, for
+    missing players or games and for lines filed under another team, list
+    games sharing an opponent and date, and report player_totals rows that
+    disagree with the lines they sum. Runs on the team's primary,
+    scanning id ranges in parallel on a process pool; `sample` failing rows
+    are returned per check.
+    """
+    database = request.app.state.databases.for_team(team.id)
+    return await audit.run(database.settings.database_url, sample, team.id)
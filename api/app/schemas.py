@@ -1,6 +1,6 @@
 from datetime import date, datetime
 from pydantic import BaseModel, Field, model_validator
-from typing import Optional
+from typing import Dict, List, Literal, Optional, Union
 
 # ---------- Players ----------
 class PlayerCreate(BaseModel):
@@ -33,11 +33,24 @@ class PlayerRead(BaseModel):
     slugging: float = 0.0
     on_base_percent: float = 0.0
     on_base_percent_plus_slugging: float = 0.0
+    iso: float = 0.0
+    babip: float = 0.0
+    k_percent: float = 0.0
+    bb_percent: float = 0.0
+    woba: float = 0.0
     errors: int = 0
     hit_by_pitches: int = 0
     class Config:
         from_attributes = True
 
+class PlayerSearchRead(BaseModel):
+    id: int
+    first_name: str
+    last_name: str
+    jersey_number: Optional[int]
+    # which key matched; results are ordered jersey, last name, first name, full name
+    match: Literal["jersey", "last_name", "first_name", "name"]
+
 # ---------- Games ----------
 class GameCreate(BaseModel):
     opponent: str = Field(..., min_length=1, max_length=150)
@@ -124,12 +137,213 @@ class AggregateRead(BaseModel):
     walks: int
     strikeouts: int
     sac_flies: int
+    sac_bunts: int = 0
     hit_by_pitches: int
     errors: int
     # derived
+    plate_appearances: int = 0
     total_bases: int
     average: float
     slugging: float
     on_base_percent: float
     on_base_percent_plus_slugging: float
+    iso: float = 0.0
+    babip: float = 0.0
+    k_percent: float = 0.0
+    bb_percent: float = 0.0
+    woba: float = 0.0
+
+
+# ---------- Totals maintenance ----------
+class TotalsDrift(BaseModel):
+    player_id: int
+    field: str
+    stored: int
+    actual: int
+
+class TotalsRebuildRead(BaseModel):
+    players: int
+    drift: List[TotalsDrift]
+
+# ---------- Integrity audit ----------
+class AuditSample(BaseModel):
+    id: int
+    player_id: int
+    game_id: int
+    at_bats: int
+    hits: int
+    singles: int
+    doubles: int
+    triples: int
+    home_runs: int
+    walks: int
+    hit_by_pitches: int
+    sac_flies: int
+
+class DuplicateGames(BaseModel):
+    opponent: str
+    date: date
+    game_ids: List[int]
+
+class AuditRead(BaseModel):
+    ok: bool
+    rows_scanned: int
+    ranges: int
+    workers: int
+    failures: Dict[str, int]  # check name -> failing rows
+    samples: Dict[str, List[AuditSample]]
+    duplicate_games: List[DuplicateGames]
+    duplicate_game_groups: int
+    # player_totals rows that disagree with the player's lines
+    totals_drift: List[TotalsDrift]
+    totals_drift_players: int
+    seconds: float
+
+# ---------- Bulk ingestion ----------
+class StatBulkCreate(BaseModel):
+    # One or more games' worth of lines; each line is validated like POST /stats
+    lines: List[StatCreate] = Field(..., min_length=1, max_length=5000)
+
+class StatBulkResult(BaseModel):
+    player_id: int
+    game_id: int
+    status: str  # "created" | "updated" | "error"
+    detail: Optional[str] = None
 
+class StatBulkRead(BaseModel):
+    created: int
+    updated: int
+    errors: int
+    results: List[StatBulkResult]
+
+class StatQueuedRead(BaseModel):
+    player_id: int
+    game_id: int
+    # lines waiting in this worker's queue, including this one
+    pending: int
+
+# ---------- Trends ----------
+class TrendPoint(BaseModel):
+    # the game this point ends on
+    game_id: int
+    date: date
+    opponent: str
+    # totals over the trailing window ending at this game
+    games_in_window: int
+    at_bats: int
+    hits: int
+    singles: int
+    doubles: int
+    triples: int
+    home_runs: int
+    rbis: int
+    walks: int
+    strikeouts: int
+    sac_flies: int
+    sac_bunts: int
+    hit_by_pitches: int
+    errors: int
+    plate_appearances: int
+    total_bases: int
+    average: float
+    slugging: float
+    on_base_percent: float
+    on_base_percent_plus_slugging: float
+    iso: float
+    babip: float
+    k_percent: float
+    bb_percent: float
+    woba: float
+
+class PlayerTrendRead(BaseModel):
+    player_id: int
+    first_name: str
+    last_name: str
+    window: int
+    games: List[TrendPoint]
+
+# ---------- Splits ----------
+class SplitRead(AggregateRead):
+    # bucket key, e.g. {"opponent": "Cardinals", "month": "2025-04"}
+    split: Dict[str, Union[str, int, date, None]]
+    games: int
+
+# ---------- Leaders ----------
+class LeaderRead(BaseModel):
+    rank: int
+    player_id: int
+    first_name: str
+    last_name: str
+    jersey_number: Optional[int]
+    games_played: int
+    plate_appearances: int
+    value: Union[int, float]
+
+class LeaderBoardRead(BaseModel):
+    stat: str
+    order: Literal["desc", "asc"]
+    min_pa: int
+    leaders: List[LeaderRead]
+
+# ---------- Lineup simulation ----------
+class LineupSimulate(BaseModel):
+    # batting order, leadoff first
+    lineup: List[int] = Field(..., min_length=1, max_length=15)
+    games: int = Field(10000, ge=100, le=1_000_000)
+    innings: int = Field(7, ge=1, le=12)
+    seed: Optional[int] = None
+    budget_ms: int = Field(2000, ge=100, le=30000)
+    # outcome rates from stats in this range (career totals when omitted)
+    date_from: Optional[date] = None
+    date_to: Optional[date] = None
+
+class LineupOptimize(BaseModel):
+    # starting order; the optimizer only reorders these players
+    lineup: List[int] = Field(..., min_length=2, max_length=15)
+    games: int = Field(2000, ge=100, le=100_000, description="Games simulated per candidate order")
+    innings: int = Field(7, ge=1, le=12)
+    seed: Optional[int] = None
+    budget_ms: int = Field(5000, ge=100, le=60000)
+    date_from: Optional[date] = None
+    date_to: Optional[date] = None
+
+class LineupSlot(BaseModel):
+    player_id: int
+    first_name: str
+    last_name: str
+    plate_appearances: int
+    # per-PA outcome probabilities used in the simulation
+    probabilities: Dict[str, float]
+
+class RunsEstimate(BaseModel):
+    games: int
+    expected_runs: float
+    std: float
+    ci_low: float
+    ci_high: float
+
+class LineupSimulationRead(RunsEstimate):
+    lineup: List[LineupSlot]
+    innings: int
+    # true when the budget ran out before every game was simulated
+    truncated: bool
+    elapsed_ms: float
+
+class LineupOptimizeRead(BaseModel):
+    lineup: List[LineupSlot]
+    innings: int
+    best: Optional[RunsEstimate]
+    baseline: Optional[RunsEstimate]
+    candidates_evaluated: int
+    rounds: int
+    truncated: bool
+    elapsed_ms: float
+
+# ---------- Box score ----------
+class BoxScoreRead(BaseModel):
+    game: GameRead
+    lines: List[StatRead]
+    totals: AggregateRead
+    # game.score_ours if recorded, otherwise team RBIs as an estimate
+    score_ours: Optional[int]
+    score_ours_derived: bool
@@ -0,0 +1,107 @@
+import asyncio
+import unicodedata
+from bisect import bisect_left
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from . import models
+from .cache import DataVersion
+
+# Typeahead over player names, held in memory per worker. Each searchable key
+# (last name, first name, "first last") gets its own sorted list, ordered by
+# (key, last, first, id), so the first matches of a prefix are already in
+# display order and a lookup is one bisect plus `limit` steps.
+MATCH_ORDER = ("jersey", "last_name", "first_name", "name")
+
+def normalize(text: str) -> str:
+    """Case- and accent-insensitive form used for keys and queries."""
+    if text.isascii():
+        return " ".join(text.lower().split())
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    return " ".join("".join(c for c in decomposed if not unicodedata.combining(c)).split())
+
+class PlayerIndex:
+    def __init__(self, players):
+        # players: (id, first_name, last_name, jersey_number) tuples
+        self.players = {p[0]: p for p in players}
+        # (last, first, id) with names normalized once
+        order = sorted((normalize(p[2]), normalize(p[1]), p[0]) for p in players)
+        ids = [n[2] for n in order]
+        self.keys = {}
+        for kind, keys in (
+            ("last_name", [n[0] for n in order]),
+            ("first_name", [n[1] for n in order]),
+            ("name", [f"{n[1]} {n[0]}" for n in order]),
+        ):
+            # stable sort keeps (last, first, id) order among equal keys
+            ranks = sorted(range(len(keys)), key=keys.__getitem__)
+            self.keys[kind] = ([keys[i] for i in ranks], [ids[i] for i in ranks])
+        self.jerseys = {}
+        for n in order:
+            jersey = self.players[n[2]][3]
+            if jersey is not None:
+                self.jerseys.setdefault(str(jersey), []).append(n[2])
+
+    def search(self, prefix: str, limit: int) -> list[dict]:
+        term = normalize(prefix)
+        if not term:
+            return []
+        seen, results = set(), []
+
+        def take(ids, match):
+            for pid in ids:
+                if len(results) >= limit:
+                    return
+                if pid not in seen:
+                    seen.add(pid)
+                    p = self.players[pid]
+                    results.append({
+                        "id": p[0], "first_name": p[1], "last_name": p[2],
+                        "jersey_number": p[3], "match": match,
+                    })
+
+        take(self.jerseys.get(term.lstrip("#"), []), "jersey")
+        for kind in MATCH_ORDER[1:]:
+            keys, ids = self.keys[kind]
+            start = end = bisect_left(keys, term)
+            # enough candidates to fill the page even if some were already taken
+            stop = min(len(keys), start + limit + len(seen))
+            while end < stop and keys[end].startswith(term):
+                end += 1
+            take(ids[start:end], kind)
+        return results
+
+class IndexHolder:
+    """One team's index, rebuilt lazily when the roster may have changed."""
+
+    def __init__(self, team_id: int, data_version: DataVersion):
+        self.team_id = team_id
+        self.data_version = data_version
+        self.index = PlayerIndex([])
+        self.version = None
+        self.fingerprint = None
+        self.lock = asyncio.Lock()
+
+    async def get(self, db: AsyncSession) -> PlayerIndex:
+        version = self.data_version.get()
+        if version == self.version:
+            return self.index
+        async with self.lock:
+            if version == self.version:
+                return self.index
+            # Most version bumps are stat writes; only reload names when the
+            # team's players were added, removed or edited since the last load.
+            fingerprint = tuple((await db.execute(
+                select(func.count(models.Player.id), func.max(models.Player.id),
+                       func.max(models.Player.updated_at))
+                .where(models.Player.team_id == self.team_id)
+            )).one())
+            if fingerprint != self.fingerprint:
+                rows = (await db.execute(select(
+                    models.Player.id, models.Player.first_name,
+                    models.Player.last_name, models.Player.jersey_number,
+                ).where(models.Player.team_id == self.team_id))).all()
+                # off the event loop; a 100k roster takes a good fraction of a second
+                self.index = await asyncio.to_thread(PlayerIndex, [tuple(r) for r in rows])
+                self.fingerprint = fingerprint
+            self.version = version
+            return self.index
@@ -1,16 +1,19 @@
-import os
+import hmac
 from fastapi import Depends, HTTPException
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from .settings import Team
+from .teams import get_team
 
-_admin_token = os.getenv("ADMIN_TOKEN", "").strip()
 _scheme = HTTPBearer(auto_error=False)
 
-def require_admin(creds: HTTPAuthorizationCredentials = Depends(_scheme)):
-    if not _admin_token:
-        # If you forgot to set ADMIN_TOKEN, block writes defensively.
+def require_admin(team: Team = Depends(get_team),
+                  creds: HTTPAuthorizationCredentials = Depends(_scheme)):
+    # each team has its own token; one team's token is no good for another
+    if not team.admin_token:
+        # If you forgot to set the team's token (ADMIN_TOKEN for a single team), block writes defensively.
         raise HTTPException(status_code=503, detail="Admin auth not configured")
     if not creds or not creds.credentials or creds.scheme.lower() != "bearer":
         raise HTTPException(status_code=401, detail="Missing or invalid Authorization header")
-    if creds.credentials != _admin_token:
+    if not hmac.compare_digest(creds.credentials.encode(), team.admin_token.encode()):
         raise HTTPException(status_code=403, detail="Forbidden")
     return True
@@ -1,35 +1,44 @@
+import argparse
+import os
 from datetime import date
 from sqlalchemy.orm import Session
 from sqlalchemy import select
-from .db import SessionLocal, engine
-from . import models
+from .db import SessionLocal
+from . import models, totals
+from .cache import bump_version
+from .settings import DEFAULT_TEAM_ID
 
 def ensure_tables():
-    models.Base.metadata.create_all(bind=engine)
+    # Bring the schema up to date through the same migrations the API uses
+    from alembic import command
+    from alembic.config import Config
+    command.upgrade(Config(os.path.join(os.path.dirname(__file__), "..", "alembic.ini")), "head")
 
-def upsert_player(db: Session, first, last, num=None):
+def upsert_player(db: Session, first, last, num=None, team_id=DEFAULT_TEAM_ID):
     existing = db.execute(
         select(models.Player).where(
+            models.Player.team_id==team_id,
             models.Player.first_name==first, models.Player.last_name==last
         )
     ).scalar_one_or_none()
     if existing:
         return existing
-    p = models.Player(first_name=first, last_name=last, jersey_number=num)
+    p = models.Player(team_id=team_id, first_name=first, last_name=last, jersey_number=num)
     db.add(p)
     db.commit()
     db.refresh(p)
     return p
 
-def upsert_game(db: Session, opponent, when, location=None, notes=None):
+def upsert_game(db: Session, opponent, when, location=None, notes=None, team_id=DEFAULT_TEAM_ID):
     existing = db.execute(
         select(models.Game).where(
+            models.Game.team_id==team_id,
             models.Game.opponent==opponent, models.Game.date==when
         )
     ).scalar_one_or_none()
     if existing:
         return existing
-    g = models.Game(opponent=opponent, date=when, location=location, notes=notes)
+    g = models.Game(team_id=team_id, opponent=opponent, date=when, location=location, notes=notes)
     db.add(g)
     db.commit()
     db.refresh(g)
@@ -43,29 +52,37 @@ def upsert_stat(db: Session, player_id, game_id, **kws):
         )
     ).scalar_one_or_none()
     if existing:
+        old = totals.stat_values(existing)
         for k,v in kws.items():
             setattr(existing, k, v)
+        totals.apply_delta(db, player_id, old, totals.stat_values(existing))
         db.commit()
         db.refresh(existing)
         return existing
-    stat = models.PlayerGameStat(player_id=player_id, game_id=game_id, **kws)
+    # a line belongs to its player's team
+    team_id = db.scalar(select(models.Player.team_id).where(models.Player.id==player_id))
+    stat = models.PlayerGameStat(player_id=player_id, game_id=game_id, team_id=team_id, **kws)
     db.add(stat)
+    totals.apply_delta(db, player_id, None, totals.stat_values(stat))
     db.commit()
     db.refresh(stat)
     return stat
 
 def main():
+    ap = argparse.ArgumentParser(description="Load a few sample players, games and stat lines")
+    ap.add_argument("--team", type=int, default=DEFAULT_TEAM_ID, help="team id the samples belong to")
+    team_id = ap.parse_args().team
     ensure_tables()
     db = SessionLocal()
     try:
         # Players
-        alex   = upsert_player(db, "Alex", "Morgan", 10)
-        riley  = upsert_player(db, "Riley", "Parker", 7)
-        taylor = upsert_player(db, "Taylor", "Kim", 22)
+        alex   = upsert_player(db, "Alex", "Morgan", 10, team_id=team_id)
+        riley  = upsert_player(db, "Riley", "Parker", 7, team_id=team_id)
+        taylor = upsert_player(db, "Taylor", "Kim", 22, team_id=team_id)
 
         # Games
-        g1 = upsert_game(db, "Blue Jays", date(2025, 4, 12), "Field 1")
-        g2 = upsert_game(db, "Cardinals", date(2025, 4, 19), "Field 2")
+        g1 = upsert_game(db, "Blue Jays", date(2025, 4, 12), "Field 1", team_id=team_id)
+        g2 = upsert_game(db, "Cardinals", date(2025, 4, 19), "Field 2", team_id=team_id)
 
         # Stats (keep hits = 1B+2B+3B+HR)
         upsert_stat(db, alex.id, g1.id,
@@ -80,6 +97,7 @@ def main():
             at_bats=4, hits=3, singles=1, doubles=1, triples=0, home_runs=1,
             rbis=3, walks=0, strikeouts=0, sac_flies=0, hit_by_pitches=0, errors=0
         )
+        bump_version()
         print("Seed complete.")
     finally:
         db.close()
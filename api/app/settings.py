@@ -0,0 +1,180 @@
+"""
+Settings for one app instance. create_app() takes a Settings; when none is
+given they are read from the environment at that point, not at import time,
+so tests and scripts can build apps against different databases.
+"""
+import json
+import os
+from dataclasses import dataclass, field, replace
+
+DEFAULT_CORS_ORIGINS = ("http://localhost:5173", "http://127.0.0.1:5173")
+# Rows written before teams existed, and single-team deployments, belong here
+DEFAULT_TEAM_ID = 1
+# The shard behind DATABASE_URL (and its replica)
+DEFAULT_SHARD = "default"
+
+def _build_url() -> str:
+    url = os.getenv("DATABASE_URL", "").strip()
+    if url:
+        return url
+    host = os.getenv("MYSQL_HOST", "").strip()
+    port = os.getenv("MYSQL_PORT", "3306").strip()
+    db   = os.getenv("MYSQL_DATABASE", "").strip()
+    user = os.getenv("MYSQL_USER", "").strip()
+    pw   = os.getenv("MYSQL_PASSWORD", "").strip()
+    if not all([host, port, db, user, pw]):
+        # Helpful error for logs
+        missing = [k for k,v in [("MYSQL_HOST",host),("MYSQL_PORT",port),
+                                 ("MYSQL_DATABASE",db),("MYSQL_USER",user),
+                                 ("MYSQL_PASSWORD",pw)] if not v]
+        raise RuntimeError(f"DB config missing: {', '.join(missing)}")
+    return f"mysql+pymysql://{user}:{pw}@{host}:{port}/{db}"
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name, "").strip()
+    return int(value) if value else default
+
+def _env_float(name: str, default: float | None) -> float | None:
+    value = os.getenv(name, "").strip()
+    return float(value) if value else default
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name, "").strip().lower()
+    return default if not value else value not in ("0", "false", "no")
+
+@dataclass(frozen=True)
+class Team:
+    id: int
+    slug: str
+    # empty blocks the team's admin routes
+    admin_token: str = ""
+    shard: str = DEFAULT_SHARD
+
+def _teams_from_env() -> tuple[Team, ...]:
+    # TEAMS='[{"id": 1, "slug": "hawks", "admin_token": "...", "shard": "a"}, ...]'
+    raw = os.getenv("TEAMS", "").strip()
+    if not raw:
+        return ()
+    return tuple(
+        Team(id=int(t["id"]), slug=str(t["slug"]).strip().lower(),
+             admin_token=str(t.get("admin_token", "")).strip(),
+             shard=str(t.get("shard", DEFAULT_SHARD)).strip())
+        for t in json.loads(raw)
+    )
+
+def _shards_from_env() -> tuple[tuple[str, str], ...]:
+    # SHARDS='{"a": "mysql+pymysql://...", "b": "mysql+pymysql://..."}'
+    raw = os.getenv("SHARDS", "").strip()
+    return tuple((name, url.strip()) for name, url in json.loads(raw).items()) if raw else ()
+
+@dataclass(frozen=True)
+class Settings:
+    # Primary takes every write; GET routers read from database_url_read (a
+    # replica) when it is set, otherwise from the primary as well.
+    database_url: str
+    database_url_read: str = ""
+    # async URLs default to the sync ones with the matching async driver
+    database_url_async: str = ""
+    database_url_read_async: str = ""
+    # per-worker pool sizing (ignored for SQLite)
+    pool_size: int = 5
+    max_overflow: int = 10
+    pool_timeout: int = 30
+    pool_recycle: int = 3600
+    pool_pre_ping: bool = True
+    # seconds after a write during which that client's reads stay on the primary
+    read_pin_seconds: int = 5
+    # admin token of the default team when `teams` is empty; empty blocks every admin route
+    admin_token: str = ""
+    cors_origins: tuple[str, ...] = field(default=DEFAULT_CORS_ORIGINS)
+    # Teams served by this app; empty means one team (DEFAULT_TEAM_ID) on DATABASE_URL
+    teams: tuple[Team, ...] = ()
+    # Extra databases teams can live on, as (name, url); DATABASE_URL is DEFAULT_SHARD
+    shards: tuple[tuple[str, str], ...] = ()
+    # Read cache: data-version file shared by the host's workers (empty: one in
+    # the temp dir) and LRU entries per app
+    data_version_file: str = ""
+    response_cache_size: int = 256
+    # Server-Timing + /metrics; log queries slower than slow_query_ms (None: off)
+    request_metrics: bool = True
+    slow_query_ms: float | None = None
+    # Live game feed: redis:// URL to share it across workers, per-client queue
+    # length and seconds between keep-alives
+    live_broker_url: str = ""
+    live_queue_size: int = 100
+    live_heartbeat_seconds: float = 15
+    # Write-behind stat queue; a journal directory enables crash replay
+    write_behind_flush_ms: int = 250
+    write_behind_batch: int = 200
+    write_behind_journal: str = ""
+    write_behind_fsync: bool = False
+    # Lineup simulation: ceilings on a request's games and budget, and how many
+    # requests one team may have running per worker (more get 429)
+    simulation_max_games: int = 200_000
+    simulation_max_budget_ms: int = 10_000
+    simulation_per_team: int = 1
+
+    def __post_init__(self):
+        shards = {DEFAULT_SHARD, *(name for name, _ in self.shards)}
+        for team in self.teams:
+            if team.shard not in shards:
+                raise RuntimeError(f"Team {team.slug!r} is on unknown shard {team.shard!r}")
+        for attr in ("id", "slug"):
+            values = [getattr(t, attr) for t in self.teams]
+            if len(set(values)) != len(values):
+                raise RuntimeError(f"Duplicate team {attr} in TEAMS")
+
+    @property
+    def read_url(self) -> str:
+        return self.database_url_read or self.database_url
+
+    @property
+    def has_replica(self) -> bool:
+        return self.read_url != self.database_url
+
+    @property
+    def team_list(self) -> tuple[Team, ...]:
+        return self.teams or (Team(DEFAULT_TEAM_ID, "default", self.admin_token),)
+
+    def shard_settings(self) -> dict[str, "Settings"]:
+        """Settings for each shard's Database. Only the default shard has a replica."""
+        return {
+            DEFAULT_SHARD: self,
+            **{name: replace(self, database_url=url, database_url_read="",
+                             database_url_async="", database_url_read_async="")
+               for name, url in self.shards},
+        }
+
+    @classmethod
+    def from_env(cls) -> "Settings":
+        origins = tuple(o.strip() for o in os.getenv("API_CORS_ORIGINS", "").split(",") if o.strip())
+        return cls(
+            database_url=_build_url(),
+            database_url_read=os.getenv("DATABASE_URL_READ", "").strip(),
+            database_url_async=os.getenv("DATABASE_URL_ASYNC", "").strip(),
+            database_url_read_async=os.getenv("DATABASE_URL_READ_ASYNC", "").strip(),
+            pool_size=_env_int("DB_POOL_SIZE", 5),
+            max_overflow=_env_int("DB_MAX_OVERFLOW", 10),
+            pool_timeout=_env_int("DB_POOL_TIMEOUT", 30),
+            pool_recycle=_env_int("DB_POOL_RECYCLE", 3600),
+            pool_pre_ping=_env_bool("DB_POOL_PRE_PING", True),
+            read_pin_seconds=_env_int("DB_READ_PIN_SECONDS", 5),
+            admin_token=os.getenv("ADMIN_TOKEN", "").strip(),
+            cors_origins=origins or DEFAULT_CORS_ORIGINS,
+            teams=_teams_from_env(),
+            shards=_shards_from_env(),
+            data_version_file=os.getenv("DATA_VERSION_FILE", "").strip(),
+            response_cache_size=_env_int("RESPONSE_CACHE_SIZE", 256),
+            request_metrics=_env_bool("REQUEST_METRICS", True),
+            slow_query_ms=_env_float("SLOW_QUERY_MS", None),
+            live_broker_url=os.getenv("LIVE_BROKER_URL", "").strip(),
+            live_queue_size=_env_int("LIVE_QUEUE_SIZE", 100),
+            live_heartbeat_seconds=_env_float("LIVE_HEARTBEAT_SECONDS", 15),
+            write_behind_flush_ms=_env_int("WRITE_BEHIND_FLUSH_MS", 250),
+            write_behind_batch=_env_int("WRITE_BEHIND_BATCH", 200),
+            write_behind_journal=os.getenv("WRITE_BEHIND_JOURNAL", "").strip(),
+            write_behind_fsync=_env_bool("WRITE_BEHIND_FSYNC", False),
+            simulation_max_games=_env_int("SIMULATION_MAX_GAMES", 200_000),
+            simulation_max_budget_ms=_env_int("SIMULATION_MAX_BUDGET_MS", 10_000),
+            simulation_per_team=_env_int("SIMULATION_PER_TEAM", 1),
+        )
@@ -0,0 +1,263 @@
+"""
+Monte Carlo lineup simulation, vectorized with NumPy.
+
+A batch of games is simulated side by side: every step draws one plate
+appearance outcome for each unfinished game from its current batter's
+probabilities, and table lookups move runners, outs and runs. Batches are
+independent, so they are spread over a process pool and combined afterwards.
+
+This module only needs NumPy so pool workers start quickly; it must not
+import the database or the app.
+"""
+import asyncio
+import concurrent.futures
+import multiprocessing
+import os
+import time
+from typing import Sequence
+import numpy as np
+
+# Plate appearance outcomes, in the order of a probability row
+OUTCOMES = [
+    "out", "strikeout", "single", "double", "triple", "home_run",
+    "walk", "hit_by_pitch", "sac_fly", "sac_bunt",
+]
+# Counting column behind each outcome ("out" is the at-bats left over)
+OUTCOME_FIELDS = {
+    "strikeout": "strikeouts", "single": "singles", "double": "doubles",
+    "triple": "triples", "home_run": "home_runs", "walk": "walks",
+    "hit_by_pitch": "hit_by_pitches", "sac_fly": "sac_flies", "sac_bunt": "sac_bunts",
+}
+# Plate appearances of roster-average hitting blended into every player, so
+# a handful of PAs can't produce a .000 or 1.000 hitter
+PRIOR_PA = 20
+
+GAMES_PER_TASK = 5000
+# Games a task simulates between looks at its deadline
+GAMES_PER_CHECK = 2500
+WORKERS = int(os.getenv("SIMULATION_WORKERS", "0")) or os.cpu_count() or 1
+
+def outcome_probabilities(lines: Sequence[dict]) -> np.ndarray:
+    """
+    One probability row per player from counting totals, shrunk toward the
+    combined line of everyone passed in by PRIOR_PA plate appearances.
+    """
+    counts = np.zeros((len(lines), len(OUTCOMES)), dtype=np.float64)
+    for i, line in enumerate(lines):
+        hits = line["singles"] + line["doubles"] + line["triples"] + line["home_runs"]
+        counts[i, 0] = max(line["at_bats"] - hits - line["strikeouts"], 0)
+        for j, outcome in enumerate(OUTCOMES[1:], start=1):
+            counts[i, j] = line[OUTCOME_FIELDS[outcome]]
+    totals = counts.sum(axis=0)
+    league = totals / totals.sum() if totals.sum() else np.eye(len(OUTCOMES))[0]
+    return (counts + PRIOR_PA * league) / (counts.sum(axis=1, keepdims=True) + PRIOR_PA)
+
+def _transitions():
+    """
+    (new bases, runs, outs added) for every outcome x outs (0-2) x bases,
+    where bases is a bitmask: 1 = first, 2 = second, 4 = third.
+    """
+    shape = (len(OUTCOMES), 3, 8)
+    new_bases = np.zeros(shape, dtype=np.int8)
+    runs = np.zeros(shape, dtype=np.int8)
+    outs_added = np.zeros(shape, dtype=np.int8)
+    for o, outcome in enumerate(OUTCOMES):
+        for outs in range(3):
+            for b in range(8):
+                first, second, third = b & 1, b >> 1 & 1, b >> 2 & 1
+                nb, r, out = b, 0, 0
+                if outcome in ("out", "strikeout"):
+                    out = 1
+                elif outcome in ("walk", "hit_by_pitch"):
+                    # batter to first; only forced runners move
+                    if not first:
+                        nb = b | 1
+                    elif not second:
+                        nb = b | 3
+                    elif not third:
+                        nb = 7
+                    else:
+                        nb, r = 7, 1
+                elif outcome == "single":
+                    # runners on second and third score, first goes to second
+                    r = second + third
+                    nb = 1 | (2 if first else 0)
+                elif outcome == "double":
+                    # everyone but a runner from first scores
+                    r = second + third
+                    nb = 2 | (4 if first else 0)
+                elif outcome == "triple":
+                    r, nb = first + second + third, 4
+                elif outcome == "home_run":
+                    r, nb = first + second + third + 1, 0
+                elif outcome == "sac_fly":
+                    out = 1
+                    if third and outs < 2:
+                        r, nb = 1, b & 3
+                elif outcome == "sac_bunt":
+                    out = 1
+                    if outs < 2:
+                        # everyone moves up one base
+                        r, nb = third, (b << 1) & 7
+                new_bases[o, outs, b], runs[o, outs, b], outs_added[o, outs, b] = nb, r, out
+    return new_bases, runs, outs_added
+
+NEW_BASES, RUNS, OUTS_ADDED = _transitions()
+
+def simulate_games(probabilities: np.ndarray, games: int, innings: int, seed,
+                   deadline: float | None = None) -> np.ndarray:
+    """
+    Runs scored in each of `games` games by the lineup whose rows are given
+    in batting order. Games are played GAMES_PER_CHECK at a time; once
+    `deadline` (time.time()) has passed, the games finished so far are
+    returned, so a task whose caller gave up doesn't keep its worker busy.
+    """
+    rng = np.random.default_rng(seed)
+    cumulative = np.cumsum(probabilities, axis=1)
+    cumulative[:, -1] = 1.0
+    batches = []
+    for start in range(0, games, GAMES_PER_CHECK):
+        if deadline is not None and time.time() >= deadline:
+            break
+        batches.append(_play(cumulative, min(GAMES_PER_CHECK, games - start), innings, rng))
+    return np.concatenate(batches) if batches else np.zeros(0, dtype=np.int32)
+
+def _play(cumulative: np.ndarray, games: int, innings: int, rng: np.random.Generator) -> np.ndarray:
+    """One batch of games played side by side, from cumulative outcome rows."""
+    size = len(cumulative)
+
+    runs = np.zeros(games, dtype=np.int32)
+    inning = np.zeros(games, dtype=np.int32)
+    outs = np.zeros(games, dtype=np.int8)
+    bases = np.zeros(games, dtype=np.int8)
+    batter = np.zeros(games, dtype=np.int32)
+    live = np.arange(games)
+
+    while len(live):
+        b, o, bs = batter[live], outs[live], bases[live]
+        draws = rng.random(len(live))
+        outcome = (draws[:, None] > cumulative[b]).sum(axis=1)
+        runs[live] += RUNS[outcome, o, bs]
+        added = OUTS_ADDED[outcome, o, bs]
+        bs = NEW_BASES[outcome, o, bs]
+        o = o + added
+
+        side_retired = o >= 3
+        bs[side_retired] = 0
+        o[side_retired] = 0
+        inning[live] += side_retired
+        outs[live], bases[live] = o, bs
+        batter[live] = (b + 1) % size
+        live = live[inning[live] < innings]
+    return runs
+
+def summarize(runs: np.ndarray) -> dict:
+    """Expected runs with a normal-approximation 95% confidence interval."""
+    n = len(runs)
+    mean = float(runs.mean()) if n else 0.0
+    std = float(runs.std(ddof=1)) if n > 1 else 0.0
+    half = 1.96 * std / np.sqrt(n) if n else 0.0
+    return {
+        "games": n, "expected_runs": round(mean, 3), "std": round(std, 3),
+        "ci_low": round(mean - half, 3), "ci_high": round(mean + half, 3),
+    }
+
+# ---------- process pool ----------
+_pool: concurrent.futures.ProcessPoolExecutor | None = None
+
+def pool() -> concurrent.futures.ProcessPoolExecutor:
+    """Created on first use in each worker process; spawned, not forked, so
+    child processes don't inherit the server's threads or connections."""
+    global _pool
+    if _pool is None:
+        _pool = concurrent.futures.ProcessPoolExecutor(
+            max_workers=WORKERS, mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _pool
+
+def shutdown():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+async def run_tasks(tasks: list[tuple], deadline: float) -> tuple[list, bool]:
+    """
+    Run simulate_games(*args, deadline) for each (probabilities, games,
+    innings, seed) task on the pool until `deadline` (time.time()). Returns
+    (results in task order, None where a task did not finish in time; True
+    if any task was cut off or cut itself short).
+    """
+    loop = asyncio.get_running_loop()
+    futures = [loop.run_in_executor(pool(), simulate_games, *args, deadline) for args in tasks]
+    done, pending = await asyncio.wait(futures, timeout=max(deadline - time.time(), 0))
+    # Tasks still queued are cancelled here; ones already running stop on
+    # their own at the deadline.
+    for f in pending:
+        f.cancel()
+    results = [f.result() if f in done else None for f in futures]
+    short = any(r is not None and len(r) < args[1] for r, args in zip(results, tasks))
+    return results, bool(pending) or short
+
+def game_tasks(probabilities: np.ndarray, games: int, innings: int, seed: int | None) -> list[tuple]:
+    """Split `games` into pool tasks with independent random streams."""
+    chunks = [GAMES_PER_TASK] * (games // GAMES_PER_TASK)
+    if games % GAMES_PER_TASK:
+        chunks.append(games % GAMES_PER_TASK)
+    seeds = np.random.SeedSequence(seed).spawn(len(chunks))
+    return [(probabilities, n, innings, s) for n, s in zip(chunks, seeds)]
+
+async def simulate(probabilities: np.ndarray, games: int, innings: int,
+                   seed: int | None, budget_seconds: float) -> tuple[dict, bool]:
+    """Simulate on the pool within the budget; summary of the games that finished."""
+    deadline = time.time() + budget_seconds
+    results, truncated = await run_tasks(game_tasks(probabilities, games, innings, seed), deadline)
+    finished = [r for r in results if r is not None]
+    runs = np.concatenate(finished) if finished else np.zeros(0, dtype=np.int32)
+    return summarize(runs), truncated
+
+async def optimize(probabilities: np.ndarray, order: list[int], games: int, innings: int,
+                   seed: int | None, budget_seconds: float) -> dict:
+    """
+    Hill-climb over batting orders: each round evaluates every pairwise swap
+    of the current best order in parallel and keeps the best improvement.
+    All candidates share one random stream (common random numbers), so the
+    differences between them are mostly lineup, not noise.
+    """
+    deadline = time.time() + budget_seconds
+    seed = seed if seed is not None else int(np.random.SeedSequence().entropy % 2**32)
+
+    def evaluate_tasks(orders):
+        return [(probabilities[o], games, innings, seed) for o in orders]
+
+    def complete(results):
+        # a candidate cut short played fewer of the shared games; don't compare it
+        return [r if r is not None and len(r) == games else None for r in results]
+
+    results, truncated = await run_tasks(evaluate_tasks([order]), deadline)
+    results = complete(results)
+    if results[0] is None:
+        return {"order": order, "baseline": None, "best": None, "evaluated": 0,
+                "rounds": 0, "truncated": True}
+    baseline = best = summarize(results[0])
+    evaluated, rounds = 1, 0
+    while not truncated:
+        candidates = []
+        for i in range(len(order)):
+            for j in range(i + 1, len(order)):
+                swapped = list(order)
+                swapped[i], swapped[j] = swapped[j], swapped[i]
+                candidates.append(swapped)
+        if not candidates:
+            break
+        results, truncated = await run_tasks(evaluate_tasks(candidates), deadline)
+        results = complete(results)
+        rounds += 1
+        scored = [(summarize(r), c) for r, c in zip(results, candidates) if r is not None]
+        evaluated += len(scored)
+        top = max(scored, key=lambda sc: sc[0]["expected_runs"], default=None)
+        if top is None or top[0]["expected_runs"] <= best["expected_runs"]:
+            break
+        best, order = top
+    return {"order": order, "baseline": baseline, "best": best, "evaluated": evaluated,
+            "rounds": rounds, "truncated": truncated}
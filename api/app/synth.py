@@ -0,0 +1,125 @@
+"""
+Synthetic league data for load testing.
+
+    python -m app.synth --players 5000 --games 20000 --lines-per-game 12
+    python -m app.synth --players 500 --games 2000 --team 2
+
+Writes to whatever DATABASE_URL / MYSQL_* points at (SQLite or MySQL).
+Players are split into teams of `lines-per-game`; each game is played by one
+team, so every (player, game) pair is unique. Rows satisfy the StatBase
+invariants and are loaded with chunked executemany INSERTs rather than the
+per-row commit/refresh the seed helpers use.
+"""
+import argparse
+import time
+from datetime import date, datetime, timedelta
+import numpy as np
+from sqlalchemy import func, insert, select
+from .db import SessionLocal
+from . import models, totals
+from .cache import bump_version
+from .seed import ensure_tables
+from .settings import DEFAULT_TEAM_ID
+
+FIRST = ["Alex", "Riley", "Taylor", "Jordan", "Casey", "Morgan", "Avery", "Quinn",
+         "Jamie", "Drew", "Parker", "Rowan", "Sam", "Charlie", "Emerson", "Hayden"]
+LAST = ["Morgan", "Parker", "Kim", "Lopez", "Nguyen", "Smith", "Patel", "Garcia",
+        "Johnson", "Brown", "Davis", "Miller", "Wilson", "Moore", "Clark", "Lewis"]
+OPPONENTS = ["Blue Jays", "Cardinals", "Orioles", "Hawks", "Falcons", "Owls",
+             "Ravens", "Wrens", "Herons", "Robins", "Sparrows", "Eagles"]
+
+def generate_lines(rng: np.random.Generator, n: int) -> dict[str, np.ndarray]:
+    """n batting lines as column arrays; hits == 1B+2B+3B+HR and hits <= AB."""
+    pa = rng.integers(2, 6, n)
+    walks = rng.binomial(pa, 0.08)
+    hbp = rng.binomial(pa - walks, 0.01)
+    sac_flies = rng.binomial(pa - walks - hbp, 0.02)
+    at_bats = pa - walks - hbp - sac_flies
+    hits = rng.binomial(at_bats, 0.28)
+    home_runs = rng.binomial(hits, 0.06)
+    triples = rng.binomial(hits - home_runs, 0.03)
+    doubles = rng.binomial(hits - home_runs - triples, 0.2)
+    singles = hits - home_runs - triples - doubles
+    return {
+        "at_bats": at_bats, "hits": hits, "singles": singles, "doubles": doubles,
+        "triples": triples, "home_runs": home_runs,
+        "rbis": rng.binomial(hits + sac_flies, 0.45),
+        "walks": walks, "strikeouts": rng.binomial(at_bats - hits, 0.25),
+        "sac_flies": sac_flies, "sac_bunts": np.zeros(n, dtype=np.int64),
+        "hit_by_pitches": hbp, "errors": rng.binomial(1, 0.05, n),
+    }
+
+def _insert_chunks(db, model, rows: list[dict], chunk: int):
+    for i in range(0, len(rows), chunk):
+        db.execute(insert(model), rows[i:i + chunk])
+
+def generate(players: int, games: int, lines_per_game: int, seed: int = 1,
+             chunk: int = 5000, start: date = date(2015, 4, 1),
+             team_id: int = DEFAULT_TEAM_ID) -> dict:
+    rng = np.random.default_rng(seed)
+    now = datetime.utcnow()
+    t0 = time.perf_counter()
+    with SessionLocal() as db:
+        first_player = (db.scalar(select(func.max(models.Player.id))) or 0) + 1
+        first_game = (db.scalar(select(func.max(models.Game.id))) or 0) + 1
+
+        player_ids = np.arange(first_player, first_player + players)
+        _insert_chunks(db, models.Player, [
+            {"id": int(pid), "team_id": team_id, "first_name": FIRST[i % len(FIRST)],
+             "last_name": f"{LAST[(i // len(FIRST)) % len(LAST)]}{i}",
+             "jersey_number": int(i % 100), "created_at": now}
+            for i, pid in enumerate(player_ids)
+        ], chunk)
+
+        game_ids = np.arange(first_game, first_game + games)
+        days = rng.integers(0, 3650, games)
+        _insert_chunks(db, models.Game, [
+            {"id": int(gid), "team_id": team_id,
+             "opponent": OPPONENTS[int(rng.integers(len(OPPONENTS)))],
+             "date": start + timedelta(days=int(d)), "location": f"Field {int(d) % 6 + 1}",
+             "created_at": now}
+            for gid, d in zip(game_ids, days)
+        ], chunk)
+
+        # each game is played by one team of consecutive player ids
+        teams = max(1, players // lines_per_game)
+        lineup = min(lines_per_game, players)
+        team_of_game = rng.integers(0, teams, games)
+        stat_players = (player_ids[0] + team_of_game[:, None] * lineup + np.arange(lineup)).ravel()
+        stat_games = np.repeat(game_ids, lineup)
+        cols = generate_lines(rng, len(stat_games))
+        names = list(cols)
+        values = [c.tolist() for c in cols.values()]
+        pids, gids = stat_players.tolist(), stat_games.tolist()
+        for i in range(0, len(gids), chunk):
+            db.execute(insert(models.PlayerGameStat), [
+                {"player_id": pids[j], "game_id": gids[j], "team_id": team_id, "created_at": now,
+                 **{name: values[k][j] for k, name in enumerate(names)}}
+                for j in range(i, min(i + chunk, len(gids)))
+            ])
+        db.commit()
+        t_load = time.perf_counter() - t0
+
+        totals.rebuild(db)
+    bump_version()
+    return {
+        "players": players, "games": games, "stats": len(gids),
+        "load_seconds": round(t_load, 2),
+        "total_seconds": round(time.perf_counter() - t0, 2),
+    }
+
+def main():
+    ap = argparse.ArgumentParser(description="Load synthetic league data")
+    ap.add_argument("--players", type=int, default=5000)
+    ap.add_argument("--games", type=int, default=20000)
+    ap.add_argument("--lines-per-game", type=int, default=12)
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--chunk", type=int, default=5000, help="rows per INSERT batch")
+    ap.add_argument("--team", type=int, default=DEFAULT_TEAM_ID, help="team id the league is loaded under")
+    args = ap.parse_args()
+    ensure_tables()
+    print(generate(args.players, args.games, args.lines_per_game, args.seed, args.chunk,
+                   team_id=args.team))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,26 @@
+"""
+Which team a request is for. Clients name it with the X-Team header (or a
+`team` query parameter, for EventSource and download links that can't set
+headers). Apps serving a single team don't need either.
+"""
+from fastapi import HTTPException
+from starlette.requests import HTTPConnection
+from .settings import Team
+
+TEAM_HEADER = "X-Team"
+
+def requested_team(request: HTTPConnection) -> str | None:
+    slug = request.headers.get(TEAM_HEADER) or request.query_params.get("team")
+    return slug.strip().lower() if slug and slug.strip() else None
+
+def get_team(request: HTTPConnection) -> Team:
+    teams: dict[str, Team] = request.app.state.teams
+    slug = requested_team(request)
+    if slug is None:
+        if len(teams) == 1:
+            return next(iter(teams.values()))
+        raise HTTPException(status_code=400, detail=f"{TEAM_HEADER} header is required")
+    team = teams.get(slug)
+    if team is None:
+        raise HTTPException(status_code=404, detail="Team not found")
+    return team
@@ -0,0 +1,120 @@
+from sqlalchemy import bindparam, func, insert, select, update
+from sqlalchemy.orm import Session
+from . import models
+
+# Counting columns shared by PlayerGameStat and PlayerTotal
+COUNTING_FIELDS = [
+    "at_bats","hits","singles","doubles","triples","home_runs",
+    "rbis","walks","strikeouts","sac_flies","sac_bunts","hit_by_pitches","errors"
+]
+
+def stat_values(stat) -> dict | None:
+    """Counting values of a stat row (or None when there is no row)."""
+    if stat is None:
+        return None
+    return {f: int(getattr(stat, f) or 0) for f in COUNTING_FIELDS}
+
+def apply_delta(db: Session, player_id: int, old: dict | None, new: dict | None):
+    """
+    Move a player's totals from `old` to `new` line values inside the caller's
+    transaction. Updates are relative (col = col + delta) so concurrent writers
+    for the same player don't overwrite each other. Does not commit.
+    """
+    games = (new is not None) - (old is not None)
+    delta = {
+        f: (new or {}).get(f, 0) - (old or {}).get(f, 0)
+        for f in COUNTING_FIELDS
+    }
+    delta = {f: d for f, d in delta.items() if d}
+    if games:
+        delta["games_played"] = games
+    if not delta:
+        return
+
+    res = db.execute(
+        update(models.PlayerTotal)
+        .where(models.PlayerTotal.player_id == player_id)
+        .values({f: getattr(models.PlayerTotal, f) + d for f, d in delta.items()})
+        .execution_options(synchronize_session=False)
+    )
+    if res.rowcount == 0:
+        # No totals row yet (player predates the table): start one from the delta.
+        db.add(models.PlayerTotal(player_id=player_id, **{
+            f: 0 for f in COUNTING_FIELDS + ["games_played"]
+        } | delta))
+        db.flush()
+
+def add_line_delta(deltas: dict[int, dict], player_id: int, old: dict | None, new: dict):
+    """Accumulate one line moving from `old` (None when new) to `new` into `deltas`, for apply_deltas."""
+    delta = deltas.setdefault(player_id, {"games_played": 0})
+    delta["games_played"] += old is None
+    for f, v in new.items():
+        delta[f] = delta.get(f, 0) + v - (old or {}).get(f, 0)
+
+def apply_deltas(db: Session, deltas: dict[int, dict]):
+    """
+    Batch form of apply_delta for bulk loaders: `deltas` maps player_id to
+    per-column increments (COUNTING_FIELDS and games_played). Missing totals
+    rows are created at zero first, then every player moves with one
+    executemany UPDATE. Does not commit.
+    """
+    if not deltas:
+        return
+    total = models.PlayerTotal
+    fields = COUNTING_FIELDS + ["games_played"]
+    have = set(db.scalars(select(total.player_id).where(total.player_id.in_(list(deltas)))))
+    missing = [pid for pid in deltas if pid not in have]
+    if missing:
+        db.execute(insert(total), [{"player_id": pid, **{f: 0 for f in fields}} for pid in missing])
+    db.execute(
+        update(total.__table__)
+        .where(total.__table__.c.player_id == bindparam("pid"))
+        .values({f: getattr(total.__table__.c, f) + bindparam(f"d_{f}") for f in fields}),
+        [{"pid": pid, **{f"d_{f}": d.get(f, 0) for f in fields}} for pid, d in deltas.items()],
+    )
+
+def _actual_totals(db: Session, team_id: int | None) -> dict[int, dict]:
+    stat = models.PlayerGameStat
+    query = select(
+        models.Player.id,
+        func.count(stat.id),
+        *[func.coalesce(func.sum(getattr(stat, f)), 0) for f in COUNTING_FIELDS],
+    ).outerjoin(stat, stat.player_id == models.Player.id).group_by(models.Player.id)
+    if team_id is not None:
+        query = query.where(models.Player.team_id == team_id)
+    rows = db.execute(query).all()
+    return {
+        pid: {"games_played": int(games), **{f: int(v) for f, v in zip(COUNTING_FIELDS, vals)}}
+        for pid, games, *vals in rows
+    }
+
+def rebuild(db: Session, team_id: int | None = None) -> dict:
+    """
+    Recompute player_totals from player_game_stats and overwrite the table
+    (only the rows of `team_id`'s players when given). Returns a report of
+    every (player, field) whose stored value had drifted.
+    """
+    actual = _actual_totals(db, team_id)
+    stored_query = select(models.PlayerTotal)
+    if team_id is not None:
+        stored_query = stored_query.join(models.Player, models.Player.id == models.PlayerTotal.player_id)\
+                                   .where(models.Player.team_id == team_id)
+    stored = {t.player_id: t for t in db.scalars(stored_query)}
+
+    drift = []
+    for pid, values in actual.items():
+        row = stored.pop(pid, None)
+        if row is None:
+            row = models.PlayerTotal(player_id=pid)
+            db.add(row)
+        for f, v in values.items():
+            current = getattr(row, f)
+            if (current or 0) != v:
+                drift.append({"player_id": pid, "field": f, "stored": current or 0, "actual": v})
+            setattr(row, f, v)
+    # Leftover rows belong to players that no longer exist
+    for row in stored.values():
+        db.delete(row)
+
+    db.commit()
+    return {"players": len(actual), "drift": drift}
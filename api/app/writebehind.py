@@ -0,0 +1,206 @@
+"""
+Write-behind queue for live scorekeeping (POST /stats/deferred).
+
+A scorekeeper resends a player's whole line after every plate appearance, so
+updates to the same (team_id, player_id, game_id) supersede each other. Lines are
+acknowledged as soon as they are queued; the latest line per key is kept and
+the queue is flushed through bulk.write_lines, one transaction per team on
+the team's shard, every write_behind_flush_ms, sooner once
+write_behind_batch keys are waiting, and on shutdown.
+
+Durability: with a journal directory (write_behind_journal) set, each worker
+appends queued lines to its own journal file (fsynced per line with
+write_behind_fsync) and drops it once the lines are committed. On startup a
+worker replays journals left behind by workers that died before flushing;
+lines are absolute values, so replaying one twice is harmless. Without a
+journal, lines still queued when a worker is killed are lost.
+
+Each worker keeps its own queue; don't mix deferred and direct writes for the
+same game, or an older queued line can land after a newer direct one.
+"""
+import asyncio
+import contextlib
+import fcntl
+import glob
+import logging
+import os
+import threading
+import orjson
+from . import bulk
+from .settings import DEFAULT_TEAM_ID
+
+log = logging.getLogger(__name__)
+
+class WriteBehindQueue:
+    def __init__(self, flush_ms: int = 250, batch_size: int = 200,
+                 journal_dir: str = "", fsync: bool = False):
+        self._flush_seconds = flush_ms / 1000
+        self._batch_size = batch_size
+        self._pending: dict[tuple[int, int, int], dict] = {}
+        self._lock = threading.Lock()
+        # one flush at a time, whether from the timer or from shutdown
+        self._flush_lock = threading.Lock()
+        self._journal_dir = journal_dir
+        self._fsync = fsync
+        self._journal = None
+        self._rotations = 0
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._wake: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+        self._databases = None
+        self._data_version = None
+        self._broker = None
+
+    # ---------- journal ----------
+    def _journal_path(self, suffix: str = "") -> str:
+        return os.path.join(self._journal_dir, f"stats-{os.getpid()}.journal{suffix}")
+
+    def _open_journal(self):
+        self._journal = open(self._journal_path(), "ab")
+        # held while this worker lives, so others know not to replay it
+        fcntl.flock(self._journal, fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+    def _append(self, team_id: int, player_id: int, game_id: int, line: dict):
+        self._journal.write(orjson.dumps(
+            {"team_id": team_id, "player_id": player_id, "game_id": game_id, "line": line}
+        ) + b"\n")
+        self._journal.flush()
+        if self._fsync:
+            os.fsync(self._journal.fileno())
+
+    def _rotate_journal(self):
+        """
+        Move the live journal aside for the lines about to be flushed. Its
+        handle stays open (and locked) until the flush is done.
+        """
+        if self._journal is None:
+            return None
+        self._rotations += 1
+        flushing = (self._journal, self._journal_path(f".{self._rotations}.flushing"))
+        os.replace(self._journal_path(), flushing[1])
+        self._open_journal()
+        return flushing
+
+    def _drop_journal(self, flushing):
+        handle, path = flushing
+        handle.close()
+        os.remove(path)
+
+    def _replay_orphans(self):
+        """Flush journals from workers that exited before committing them."""
+        for path in sorted(glob.glob(os.path.join(self._journal_dir, "stats-*.journal*"))):
+            with open(path, "rb") as f:
+                try:
+                    fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    continue  # a live worker's journal
+                lines = {}
+                for raw in f:
+                    try:
+                        entry = orjson.loads(raw)
+                    except orjson.JSONDecodeError:
+                        break  # torn last write
+                    # journals from before teams existed have no team_id
+                    team_id = entry.get("team_id", DEFAULT_TEAM_ID)
+                    lines[(team_id, entry["player_id"], entry["game_id"])] = entry["line"]
+                if lines:
+                    self._write(lines)
+                    log.warning("replayed %d stat lines from %s", len(lines), path)
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(path)  # another worker may have replayed it first
+
+    # ---------- queue ----------
+    def put(self, team_id: int, player_id: int, game_id: int, line: dict) -> int:
+        """Queue a line (latest wins). Returns the number of keys waiting."""
+        with self._lock:
+            if self._journal is not None:
+                self._append(team_id, player_id, game_id, line)
+            self._pending[(team_id, player_id, game_id)] = line
+            pending = len(self._pending)
+        if pending >= self._batch_size and self._loop is not None:
+            self._loop.call_soon_threadsafe(self._wake.set)
+        return pending
+
+    def _write(self, lines: dict):
+        by_team: dict[int, dict] = {}
+        for (team_id, pid, gid), line in lines.items():
+            by_team.setdefault(team_id, {})[(pid, gid)] = line
+        for team_id, team_lines in by_team.items():
+            try:
+                database = self._databases.for_team(team_id)
+            except KeyError:
+                log.warning("dropped %d queued lines for unknown team %s", len(team_lines), team_id)
+                continue
+            with database.SessionLocal() as db:
+                results = bulk.write_lines(db, team_lines, team_id, self._data_version, self._broker)
+            for r in results:
+                if r["status"] == "error":
+                    log.warning("dropped queued line team=%s player=%s game=%s: %s",
+                                team_id, r["player_id"], r["game_id"], r["detail"])
+
+    def flush(self) -> int:
+        """Write everything queued so far. Returns the number of lines written."""
+        with self._flush_lock:
+            with self._lock:
+                lines, self._pending = self._pending, {}
+                flushing = self._rotate_journal() if lines else None
+            if not lines:
+                return 0
+            try:
+                self._write(lines)
+            except Exception:
+                # put back whatever no newer line has replaced, journal it
+                # again, and let the timer retry
+                with self._lock:
+                    for key, line in lines.items():
+                        if key not in self._pending and self._journal is not None:
+                            self._append(*key, line)
+                    self._pending = {**lines, **self._pending}
+                if flushing is not None:
+                    self._drop_journal(flushing)
+                raise
+            if flushing is not None:
+                self._drop_journal(flushing)
+            return len(lines)
+
+    # ---------- lifecycle ----------
+    async def start(self, databases, data_version, broker):
+        """Begin flushing to `databases`, bumping `data_version` and publishing on `broker`."""
+        self._databases = databases
+        self._data_version = data_version
+        self._broker = broker
+        if self._journal_dir:
+            os.makedirs(self._journal_dir, exist_ok=True)
+            await asyncio.to_thread(self._replay_orphans)
+            self._open_journal()
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self._flush_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                await asyncio.to_thread(self.flush)
+            except Exception:
+                log.exception("write-behind flush failed; will retry")
+
+    async def stop(self):
+        """Flush what is left; called from the app's shutdown hook."""
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+        try:
+            await asyncio.to_thread(self.flush)
+        except Exception:
+            log.exception("final write-behind flush failed; lines left in the journal")
+            return
+        if self._journal is not None:
+            self._journal.close()
+            os.remove(self._journal_path())
+            self._journal = None
@@ -0,0 +1,95 @@
+"""
+Worker boot budget: import time, create_app() time and time to the first
+answered request, each measured in a fresh interpreter.
+
+    cd api
+    DATABASE_URL=sqlite:////tmp/league.db python -m bench.boot_bench
+    DATABASE_URL=sqlite:////tmp/league.db python -m bench.boot_bench --import-ms 1500
+
+Also checks that neither importing app.main nor building the app opens a
+database engine (that must wait until a worker serves its first request).
+Exits non-zero when a median is over budget or an engine exists at boot;
+tests/test_boot.py runs the same check with the budgets scaled up by
+BOOT_BUDGET_SCALE (default 4; 0 checks only the engines and the request).
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+API_DIR = Path(__file__).resolve().parent.parent
+
+# Median budgets per phase
+BUDGETS_MS = {"import_ms": 2500, "create_ms": 100, "first_request_ms": 750}
+
+# Runs in the child interpreter; prints one JSON line
+_CHILD = """
+import json, time
+t0 = time.perf_counter()
+import app.main
+t1 = time.perf_counter()
+app = app.main.create_app()
+t2 = time.perf_counter()
+engines_at_boot = app.state.database._pid is not None
+from fastapi.testclient import TestClient
+with TestClient(app) as client:
+    status = client.get("/health").status_code
+t3 = time.perf_counter()
+print(json.dumps({
+    "import_ms": (t1 - t0) * 1e3, "create_ms": (t2 - t1) * 1e3,
+    "first_request_ms": (t3 - t2) * 1e3, "engines_at_boot": engines_at_boot,
+    "status": status,
+}))
+"""
+
+def measure(runs: int) -> list[dict]:
+    samples = []
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", _CHILD], cwd=API_DIR, env=os.environ,
+            capture_output=True, text=True, check=True,
+        )
+        samples.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    return samples
+
+def over_budget(samples: list[dict], budgets: dict[str, float]) -> list[str]:
+    """Problems with `samples`: medians over `budgets`, engines at boot, failed requests."""
+    failures = []
+    for key, budget in budgets.items():
+        median = statistics.median(s[key] for s in samples)
+        if median > budget:
+            failures.append(f"{key[:-3]}: median {median:.1f}ms over {budget:.0f}ms")
+    if any(s["engines_at_boot"] for s in samples):
+        failures.append("a database engine was created before the first request")
+    if any(s["status"] != 200 for s in samples):
+        failures.append("/health did not answer 200")
+    return failures
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--runs", type=int, default=5, help="fresh interpreters to time")
+    ap.add_argument("--import-ms", type=float, default=BUDGETS_MS["import_ms"],
+                    help="budget for `import app.main`")
+    ap.add_argument("--create-ms", type=float, default=BUDGETS_MS["create_ms"],
+                    help="budget for create_app()")
+    ap.add_argument("--first-request-ms", type=float, default=BUDGETS_MS["first_request_ms"],
+                    help="budget for startup plus the first /health request")
+    args = ap.parse_args()
+    budgets = {"import_ms": args.import_ms, "create_ms": args.create_ms,
+               "first_request_ms": args.first_request_ms}
+
+    samples = measure(args.runs)
+    print(f"{'phase':<18} {'median ms':>10} {'max ms':>10} {'budget ms':>10}")
+    for key, budget in budgets.items():
+        values = [s[key] for s in samples]
+        print(f"{key[:-3]:<18} {statistics.median(values):>10.1f} {max(values):>10.1f} {budget:>10.0f}")
+    failures = over_budget(samples, budgets)
+    for line in failures:
+        print("OVER BUDGET", line)
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
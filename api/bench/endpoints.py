@@ -0,0 +1,164 @@
+"""
+Endpoint benchmark: latency percentiles and queries per request.
+
+    cd api
+    DATABASE_URL=sqlite:////tmp/league.db python -m app.synth   # load data once
+    DATABASE_URL=sqlite:////tmp/league.db python -m bench.endpoints --compare
+    DATABASE_URL=sqlite:////tmp/league.db python -m bench.endpoints --save
+
+Requests go through the ASGI app in-process, with the response cache disabled.
+--save stores the results in bench/baselines.json, together with the size of
+the league they were measured on. --compare exits non-zero when an endpoint's
+query count goes up or its p95 grows by more than --tolerance over the
+baseline. Latencies only compare on the machine and league the baseline came
+from (the committed one: app.synth defaults on SQLite, one CPU); query counts
+compare anywhere.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+os.environ["RESPONSE_CACHE_SIZE"] = "0"
+os.environ.setdefault("ADMIN_TOKEN", "bench")
+
+import numpy as np
+from fastapi.testclient import TestClient
+from sqlalchemy import event, func, select
+from sqlalchemy.engine import Engine
+
+from app.main import create_app
+from app.db import SessionLocal
+from app import models
+
+BASELINE = Path(__file__).with_name("baselines.json")
+
+_queries = 0
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _count(*_):
+    global _queries
+    _queries += 1
+
+def league() -> dict:
+    """Row counts of the data being measured, stored with a baseline."""
+    with SessionLocal() as db:
+        return {name: db.scalar(select(func.count()).select_from(model))
+                for name, model in (("players", models.Player), ("games", models.Game),
+                                    ("stat_rows", models.PlayerGameStat))}
+
+def endpoints() -> list[tuple[str, str, str, dict | None]]:
+    """(name, method, path, json body) for every route, using ids from the data."""
+    with SessionLocal() as db:
+        line = db.scalars(select(models.PlayerGameStat).order_by(models.PlayerGameStat.id).limit(1)).first()
+        if line is None:
+            sys.exit("No stats in the database; load some with `python -m app.synth` first")
+        pid, gid = line.player_id, line.game_id
+        body = {f: getattr(line, f) for f in [
+            "at_bats","hits","singles","doubles","triples","home_runs",
+            "rbis","walks","strikeouts","sac_flies","hit_by_pitches","errors"
+        ]}
+    body.update(player_id=pid, game_id=gid)
+    return [
+        ("players", "GET", "/players?limit=500", None),
+        ("players_search", "GET", "/players?q=an&limit=100", None),
+        ("typeahead", "GET", "/players/search?prefix=an", None),
+        ("games", "GET", "/games?limit=500", None),
+        ("stats", "GET", "/stats?limit=1000", None),
+        ("stats_player", "GET", f"/stats?player_id={pid}", None),
+        ("aggregate", "GET", "/stats/aggregate", None),
+        ("aggregate_player", "GET", f"/stats/aggregate?player_id={pid}", None),
+        ("aggregate_dates", "GET", "/stats/aggregate?date_from=2016-01-01&date_to=2016-12-31", None),
+        ("splits_opponent", "GET", "/stats/aggregate/splits?group_by=opponent", None),
+        ("splits_month_player", "GET",
+         "/stats/aggregate/splits?group_by=month,player&date_from=2016-01-01&date_to=2016-12-31", None),
+        ("leaders", "GET", "/leaders?stat=ops,avg,hr&min_pa=20&k=10", None),
+        ("leaders_dates", "GET", "/leaders?stat=ops&min_pa=5&date_from=2016-01-01&date_to=2016-12-31", None),
+        ("player_trend", "GET", f"/players/{pid}/trend?window=5", None),
+        ("roster_trend", "GET", "/players/trend?window=5&date_from=2016-01-01&date_to=2016-03-31", None),
+        ("boxscore", "GET", f"/games/{gid}/boxscore", None),
+        ("export_player", "GET", f"/export/stats?player_id={pid}", None),
+        ("export_dates", "GET", "/export/stats?date_from=2016-01-01&date_to=2016-01-31&format=ndjson", None),
+        ("export_games", "GET", "/export/games", None),
+        ("export_players", "GET", "/export/players", None),
+        ("upsert_stat", "POST", "/stats", body),
+        ("bulk_one", "POST", "/stats/bulk", {"lines": [body]}),
+        ("deferred_stat", "POST", "/stats/deferred", body),
+    ]
+
+def run(requests: int) -> dict:
+    global _queries
+    headers = {"Authorization": f"Bearer {os.environ['ADMIN_TOKEN']}"}
+    results = {}
+    with TestClient(create_app()) as client:
+        for name, method, path, body in endpoints():
+            for _ in range(2):  # warm-up
+                client.request(method, path, json=body, headers=headers)
+            latencies = []
+            _queries = 0
+            for _ in range(requests):
+                t0 = time.perf_counter()
+                r = client.request(method, path, json=body, headers=headers)
+                latencies.append((time.perf_counter() - t0) * 1e3)
+                if r.status_code >= 400:
+                    sys.exit(f"{name}: {method} {path} -> {r.status_code} {r.text[:200]}")
+            p50, p95, p99 = np.percentile(latencies, [50, 95, 99]).tolist()
+            results[name] = {
+                "p50_ms": round(p50, 2), "p95_ms": round(p95, 2), "p99_ms": round(p99, 2),
+                "queries": round(_queries / requests, 2),
+            }
+    return results
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    regressions = []
+    for name, r in results.items():
+        b = baseline["endpoints"].get(name)
+        if not b:
+            continue
+        if r["queries"] > b["queries"]:
+            regressions.append(f"{name}: queries {b['queries']} -> {r['queries']}")
+        if r["p95_ms"] > b["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {b['p95_ms']}ms -> {r['p95_ms']}ms")
+    return regressions
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--requests", type=int, default=30, help="timed requests per endpoint")
+    mode = ap.add_mutually_exclusive_group()
+    mode.add_argument("--save", action="store_true", help="write the results as the new baseline")
+    mode.add_argument("--compare", action="store_true", help="fail on regressions against the baseline")
+    ap.add_argument("--baseline", type=Path, default=BASELINE, help=f"default: bench/{BASELINE.name}")
+    ap.add_argument("--tolerance", type=float, default=0.5, help="allowed p95 slowdown vs baseline (0.5: +50%%)")
+    args = ap.parse_args()
+
+    baseline = None
+    if args.compare:
+        if not args.baseline.exists():
+            sys.exit(f"No baseline at {args.baseline}; record one with --save")
+        baseline = json.loads(args.baseline.read_text())
+
+    size = league()
+    results = run(args.requests)
+    print(f"{'endpoint':<20} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'queries':>8}")
+    for name, r in results.items():
+        print(f"{name:<20} {r['p50_ms']:>8} {r['p95_ms']:>8} {r['p99_ms']:>8} {r['queries']:>8}")
+
+    if args.save:
+        args.baseline.write_text(json.dumps({"league": size, "endpoints": results}, indent=2) + "\n")
+        print(f"baseline saved to {args.baseline}")
+    elif baseline is not None:
+        if baseline["league"] != size:
+            print(f"WARNING baseline was measured on {baseline['league']}, this league is {size}; "
+                  "latencies are not comparable")
+        missing = sorted(set(results) - set(baseline["endpoints"]))
+        if missing:
+            print("not in the baseline:", ", ".join(missing))
+        regressions = compare(results, baseline, args.tolerance)
+        for line in regressions:
+            print("REGRESSION", line)
+        sys.exit(1 if regressions else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Microbenchmark: app.metrics against the per-row derived-stat code it replaced.
+
+    cd api && python -m bench.metrics_bench [rows ...]
+"""
+import random
+import sys
+import timeit
+
+from app import metrics
+
+def _safe_div(n: float, d: float) -> float:
+    return float(n / d) if d else 0.0
+
+def legacy_rows(lines: list[dict]) -> list[dict]:
+    # The loop list_players used to run for every player on the page
+    out = []
+    for r in lines:
+        ab, h, s1, s2, s3, hr = r["at_bats"], r["hits"], r["singles"], r["doubles"], r["triples"], r["home_runs"]
+        bb, hbp, sf = r["walks"], r["hit_by_pitches"], r["sac_flies"]
+        plate_appearances = int(ab + bb + hbp + sf)
+        total_bases = int(s1 + 2 * s2 + 3 * s3 + 4 * hr)
+        avg = _safe_div(h, ab)
+        slg = _safe_div(total_bases, ab)
+        obp = _safe_div(h + bb + hbp, plate_appearances)
+        ops = obp + slg
+        out.append({
+            "plate_appearances": plate_appearances,
+            "total_bases": total_bases,
+            "average": round(avg, 3),
+            "slugging": round(slg, 3),
+            "on_base_percent": round(obp, 3),
+            "on_base_percent_plus_slugging": round(ops, 3),
+        })
+    return out
+
+def make_lines(n: int, seed: int = 7) -> list[dict]:
+    rnd = random.Random(seed)
+    lines = []
+    for _ in range(n):
+        singles, doubles, triples, hr = (rnd.randint(0, 60), rnd.randint(0, 20),
+                                         rnd.randint(0, 5), rnd.randint(0, 10))
+        hits = singles + doubles + triples + hr
+        lines.append({
+            "at_bats": hits + rnd.randint(0, 150), "hits": hits, "singles": singles,
+            "doubles": doubles, "triples": triples, "home_runs": hr,
+            "walks": rnd.randint(0, 30), "strikeouts": rnd.randint(0, 40),
+            "sac_flies": rnd.randint(0, 5), "sac_bunts": 0, "hit_by_pitches": rnd.randint(0, 5),
+        })
+    return lines
+
+def main(sizes: list[int]):
+    # "rows" includes building per-row dicts with all metrics; "arrays" is the math alone
+    print(f"{'rows':>8} {'legacy ms':>10} {'rows ms':>8} {'arrays ms':>10} {'rows x':>7} {'arrays x':>9}")
+    for n in sizes:
+        lines = make_lines(n)
+        columns = {f: [r[f] for r in lines] for f in metrics.INPUT_FIELDS}
+
+        # same answers on the fields both implementations produce
+        new = metrics.rows(columns)
+        for old_row, new_row in zip(legacy_rows(lines), new):
+            assert all(new_row[k] == v for k, v in old_row.items()), (old_row, new_row)
+
+        reps = max(1, 200_000 // n)
+        legacy = min(timeit.repeat(lambda: legacy_rows(lines), number=reps, repeat=3)) / reps
+        vector = min(timeit.repeat(lambda: metrics.rows(columns), number=reps, repeat=3)) / reps
+        arrays = min(timeit.repeat(lambda: metrics.compute(columns), number=reps, repeat=3)) / reps
+        print(f"{n:>8} {legacy * 1e3:>10.3f} {vector * 1e3:>8.3f} {arrays * 1e3:>10.3f} "
+              f"{legacy / vector:>6.1f}x {legacy / arrays:>8.1f}x")
+
+if __name__ == "__main__":
+    main([int(a) for a in sys.argv[1:]] or [10, 500, 5000, 100_000])
@@ -0,0 +1,57 @@
+"""
+Microbenchmark: per-row cost of encoding list responses.
+
+"before" is the old path for /stats: a StatRead built per row, FastAPI's
+response_model validation of the list, then json.dumps. "after" is the fast
+path: column tuples zipped into dicts and encoded once with orjson.
+
+    cd api && python -m bench.serialization_bench [rows]
+"""
+import json
+import sys
+import timeit
+from datetime import datetime
+from typing import List
+
+from fastapi.responses import ORJSONResponse
+from pydantic import TypeAdapter
+
+from app.schemas import StatRead
+
+KEYS = list(StatRead.model_fields)
+_adapter = TypeAdapter(List[StatRead])
+
+def make_rows(n: int) -> list[tuple]:
+    rows = []
+    for i in range(n):
+        values = {
+            "at_bats": 4, "hits": 2, "singles": 1, "doubles": 1, "triples": 0, "home_runs": 0,
+            "rbis": i % 4, "walks": 1, "strikeouts": 1, "sac_flies": 0, "hit_by_pitches": 0,
+            "errors": i % 2, "id": i + 1, "player_id": i % 500 + 1, "game_id": n - i,
+            "player_first_name": "Alex", "player_last_name": f"Morgan{i}",
+            "created_at": datetime(2025, 4, 12, 18, 30, i % 60, 1000 * (i % 1000)),
+        }
+        rows.append(tuple(values[k] for k in KEYS))
+    return rows
+
+def before(rows: list[tuple]) -> bytes:
+    models = [StatRead(**dict(zip(KEYS, r))) for r in rows]
+    validated = _adapter.validate_python(models)
+    content = _adapter.dump_python(validated, mode="json")
+    return json.dumps(content, ensure_ascii=False, allow_nan=False,
+                      indent=None, separators=(",", ":")).encode("utf-8")
+
+def after(rows: list[tuple]) -> bytes:
+    return ORJSONResponse([dict(zip(KEYS, r)) for r in rows]).body
+
+def main(n: int):
+    rows = make_rows(n)
+    assert before(rows) == after(rows), "fast path output differs"
+    reps = max(1, 20_000 // n)
+    t_before = min(timeit.repeat(lambda: before(rows), number=reps, repeat=5)) / reps
+    t_after = min(timeit.repeat(lambda: after(rows), number=reps, repeat=5)) / reps
+    print(f"{n} rows: before {t_before * 1e6 / n:.2f} us/row, after {t_after * 1e6 / n:.2f} us/row "
+          f"({t_before / t_after:.1f}x); output identical")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
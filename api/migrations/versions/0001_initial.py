@@ -0,0 +1,73 @@
+"""initial schema
+
+Matches the tables the API used to create with Base.metadata.create_all.
+Databases created that way can be adopted with `alembic stamp 0001_initial`.
+
+Revision ID: 0001_initial
+Revises:
+Create Date: 2026-10-18 09:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001_initial'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'players',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('first_name', sa.String(length=100), nullable=False),
+        sa.Column('last_name', sa.String(length=100), nullable=False),
+        sa.Column('jersey_number', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+    )
+    op.create_table(
+        'games',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('opponent', sa.String(length=150), nullable=False),
+        sa.Column('date', sa.Date(), nullable=False),
+        sa.Column('time', sa.String(length=10), nullable=True),
+        sa.Column('location', sa.String(length=200), nullable=True),
+        sa.Column('notes', sa.Text(), nullable=True),
+        sa.Column('score_ours', sa.Integer(), nullable=True),
+        sa.Column('score_opponent', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+    )
+    op.create_table(
+        'player_game_stats',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('player_id', sa.Integer(), sa.ForeignKey('players.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('game_id', sa.Integer(), sa.ForeignKey('games.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('at_bats', sa.Integer(), nullable=False),
+        sa.Column('hits', sa.Integer(), nullable=False),
+        sa.Column('singles', sa.Integer(), nullable=False),
+        sa.Column('doubles', sa.Integer(), nullable=False),
+        sa.Column('triples', sa.Integer(), nullable=False),
+        sa.Column('home_runs', sa.Integer(), nullable=False),
+        sa.Column('rbis', sa.Integer(), nullable=False),
+        sa.Column('walks', sa.Integer(), nullable=False),
+        sa.Column('strikeouts', sa.Integer(), nullable=False),
+        sa.Column('sac_flies', sa.Integer(), nullable=False),
+        sa.Column('sac_bunts', sa.Integer(), nullable=False),
+        sa.Column('hit_by_pitches', sa.Integer(), nullable=False),
+        sa.Column('errors', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.UniqueConstraint('player_id', 'game_id', name='uq_player_game'),
+        sa.CheckConstraint("at_bats >= 0 AND hits >= 0 AND singles >= 0 AND doubles >= 0 AND triples >= 0 AND home_runs >= 0", name='ck_nonneg_hits'),
+        sa.CheckConstraint("rbis >= 0 AND walks >= 0 AND strikeouts >= 0 AND sac_flies >= 0 AND sac_bunts >= 0 AND hit_by_pitches >= 0 AND errors >= 0", name='ck_nonneg_other'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('player_game_stats')
+    op.drop_table('games')
+    op.drop_table('players')
@@ -0,0 +1,47 @@
+"""player_totals summary table
+
+Creates the table and backfills it from player_game_stats.
+
+Revision ID: 0002_player_totals
+Revises: 0001_initial
+Create Date: 2026-10-18 09:31:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002_player_totals'
+down_revision: Union[str, None] = '0001_initial'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COUNTING = [
+    'at_bats', 'hits', 'singles', 'doubles', 'triples', 'home_runs',
+    'rbis', 'walks', 'strikeouts', 'sac_flies', 'sac_bunts', 'hit_by_pitches', 'errors',
+]
+
+
+def upgrade() -> None:
+    op.create_table(
+        'player_totals',
+        sa.Column('player_id', sa.Integer(), sa.ForeignKey('players.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('games_played', sa.Integer(), nullable=False),
+        *[sa.Column(c, sa.Integer(), nullable=False) for c in COUNTING],
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+    )
+    cols = ", ".join(COUNTING)
+    sums = ", ".join(f"COALESCE(SUM(s.{c}), 0)" for c in COUNTING)
+    op.execute(
+        f"INSERT INTO player_totals (player_id, games_played, {cols}, updated_at) "
+        f"SELECT p.id, COUNT(s.id), {sums}, CURRENT_TIMESTAMP "
+        f"FROM players p LEFT JOIN player_game_stats s ON s.player_id = p.id "
+        f"GROUP BY p.id"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('player_totals')
@@ -0,0 +1,42 @@
+"""indexes for the router query shapes
+
+- players (last_name, first_name, id): roster sort and keyset pages
+- games (date, id): date filters, newest-first listing and keyset pages
+- player_game_stats (game_id, player_id): box scores, /stats ordering, join to games
+- player_game_stats (player_id, game_id, <counting columns>): covering index
+  so per-player SUMs never touch the table rows
+
+Revision ID: 0003_hot_query_indexes
+Revises: 0002_player_totals
+Create Date: 2026-10-18 09:32:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003_hot_query_indexes'
+down_revision: Union[str, None] = '0002_player_totals'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_players_name', 'players', ['last_name', 'first_name', 'id'])
+    op.create_index('ix_games_date_id', 'games', ['date', 'id'])
+    op.create_index('ix_pgs_game_player', 'player_game_stats', ['game_id', 'player_id'])
+    op.create_index('ix_pgs_player_totals', 'player_game_stats', [
+        'player_id', 'game_id',
+        'at_bats', 'hits', 'singles', 'doubles', 'triples', 'home_runs', 'rbis',
+        'walks', 'strikeouts', 'sac_flies', 'sac_bunts', 'hit_by_pitches', 'errors',
+    ])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_pgs_player_totals', table_name='player_game_stats')
+    op.drop_index('ix_pgs_game_player', table_name='player_game_stats')
+    op.drop_index('ix_games_date_id', table_name='games')
+    op.drop_index('ix_players_name', table_name='players')
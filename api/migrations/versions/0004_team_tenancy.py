@@ -0,0 +1,56 @@
+"""team_id on players, games and player_game_stats
+
+Existing rows become team 1 (the single team of older deployments). The
+name, date and covering indexes gain team_id as their leading column so a
+team's queries never scan another team's rows; ix_pgs_game_player stays
+because MySQL needs a game_id-leading index for the games foreign key.
+
+Revision ID: 0004_team_tenancy
+Revises: 0003_hot_query_indexes
+Create Date: 2026-10-18 09:34:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004_team_tenancy'
+down_revision: Union[str, None] = '0003_hot_query_indexes'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COUNTING = [
+    'at_bats', 'hits', 'singles', 'doubles', 'triples', 'home_runs',
+    'rbis', 'walks', 'strikeouts', 'sac_flies', 'sac_bunts', 'hit_by_pitches', 'errors',
+]
+
+
+def upgrade() -> None:
+    for table in ('players', 'games', 'player_game_stats'):
+        op.add_column(table, sa.Column('team_id', sa.Integer(), nullable=False, server_default='1'))
+
+    op.drop_index('ix_players_name', table_name='players')
+    op.create_index('ix_players_team_name', 'players', ['team_id', 'last_name', 'first_name', 'id'])
+    op.drop_index('ix_games_date_id', table_name='games')
+    op.create_index('ix_games_team_date', 'games', ['team_id', 'date', 'id'])
+    op.create_index('ix_pgs_team_game', 'player_game_stats', ['team_id', 'game_id', 'player_id'])
+    op.drop_index('ix_pgs_player_totals', table_name='player_game_stats')
+    op.create_index('ix_pgs_team_player_totals', 'player_game_stats',
+                    ['team_id', 'player_id', 'game_id', *COUNTING])
+
+
+def downgrade() -> None:
+    op.create_index('ix_pgs_player_totals', 'player_game_stats', ['player_id', 'game_id', *COUNTING])
+    op.drop_index('ix_pgs_team_player_totals', table_name='player_game_stats')
+    op.drop_index('ix_pgs_team_game', table_name='player_game_stats')
+    op.create_index('ix_games_date_id', 'games', ['date', 'id'])
+    op.drop_index('ix_games_team_date', table_name='games')
+    op.create_index('ix_players_name', 'players', ['last_name', 'first_name', 'id'])
+    op.drop_index('ix_players_team_name', table_name='players')
+
+    for table in ('player_game_stats', 'games', 'players'):
+        with op.batch_alter_table(table) as batch:
+            batch.drop_column('team_id')
@@ -0,0 +1,54 @@
+"""players.updated_at, maintained by the database
+
+The typeahead index (search.py) reloads a team's names when the newest
+updated_at moves, so renames and jersey changes made outside the API have to
+move it too: MySQL does that with ON UPDATE CURRENT_TIMESTAMP, SQLite with a
+trigger. Existing rows start at the epoch.
+
+Revision ID: 0005_player_updated_at
+Revises: 0004_team_tenancy
+Create Date: 2026-10-18 11:05:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005_player_updated_at'
+down_revision: Union[str, None] = '0004_team_tenancy'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name == 'mysql':
+        op.add_column('players', sa.Column(
+            'updated_at', mysql.DATETIME(fsp=6), nullable=False,
+            server_default=sa.text('CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6)'),
+        ))
+    else:
+        # SQLite can't add a column with a non-constant default
+        op.add_column('players', sa.Column(
+            'updated_at', sa.DateTime(), nullable=False, server_default='1970-01-01 00:00:00.000000',
+        ))
+        op.execute("""
+            CREATE TRIGGER players_updated_at
+            AFTER UPDATE OF first_name, last_name, jersey_number ON players
+            FOR EACH ROW WHEN NEW.updated_at = OLD.updated_at
+            BEGIN
+                UPDATE players SET updated_at = strftime('%Y-%m-%d %H:%M:%f', 'now') WHERE id = NEW.id;
+            END
+        """)
+    op.create_index('ix_players_team_updated', 'players', ['team_id', 'updated_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_players_team_updated', table_name='players')
+    if op.get_bind().dialect.name != 'mysql':
+        op.execute('DROP TRIGGER IF EXISTS players_updated_at')
+    with op.batch_alter_table('players') as batch:
+        batch.drop_column('updated_at')
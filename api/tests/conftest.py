@@ -0,0 +1,72 @@
+"""
+Shared fixtures. Every test gets its own SQLite file, migrated with the same
+Alembic scripts a deployment runs, and an app built on it with create_app().
+"""
+import os
+from datetime import date, datetime, timedelta
+import pytest
+from alembic import command
+from alembic.config import Config
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session
+
+from app import models, totals
+from app.main import create_app
+from app.settings import DEFAULT_TEAM_ID, Settings
+
+API_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ADMIN_TOKEN = "test-token"
+
+def migrate(url: str, monkeypatch: pytest.MonkeyPatch):
+    """`alembic upgrade head` against `url`."""
+    monkeypatch.setenv("DATABASE_URL", url)
+    monkeypatch.delenv("SHARDS", raising=False)
+    config = Config()
+    config.set_main_option("script_location", os.path.join(API_DIR, "migrations"))
+    command.upgrade(config, "head")
+
+def seed(url: str, players: int, games: int, team_id: int = DEFAULT_TEAM_ID,
+         first_name: str = "Player") -> tuple[list[int], list[int]]:
+    """`players` players who each have a line in each of `games` games; returns their ids."""
+    engine = create_engine(url)
+    now = datetime.utcnow()
+    with Session(engine) as db:
+        player_ids = [db.execute(insert(models.Player).values(
+            team_id=team_id, first_name=first_name, last_name=f"Last{i:04d}",
+            jersey_number=i % 100, created_at=now,
+        )).inserted_primary_key[0] for i in range(players)]
+        game_ids = [db.execute(insert(models.Game).values(
+            team_id=team_id, opponent=f"Opponent {i}", date=date(2025, 4, 1) + timedelta(days=i),
+            created_at=now,
+        )).inserted_primary_key[0] for i in range(games)]
+        if player_ids and game_ids:
+            db.execute(insert(models.PlayerGameStat), [
+                {"player_id": pid, "game_id": gid, "team_id": team_id, "created_at": now,
+                 "at_bats": 4, "hits": 2, "singles": 1, "doubles": 1, "walks": 1, "rbis": 1}
+                for pid in player_ids for gid in game_ids
+            ])
+        db.commit()
+        totals.rebuild(db, team_id)
+    engine.dispose()
+    return player_ids, game_ids
+
+@pytest.fixture
+def database_url(tmp_path, monkeypatch) -> str:
+    url = f"sqlite:///{tmp_path / 'stats.db'}"
+    migrate(url, monkeypatch)
+    return url
+
+@pytest.fixture
+def settings(database_url, tmp_path) -> Settings:
+    return Settings(database_url=database_url, admin_token=ADMIN_TOKEN,
+                    data_version_file=str(tmp_path / "version"))
+
+@pytest.fixture
+def client(settings):
+    with TestClient(create_app(settings)) as client:
+        yield client
+
+@pytest.fixture
+def admin() -> dict:
+    return {"Authorization": f"Bearer {ADMIN_TOKEN}"}
@@ -0,0 +1,85 @@
+"""
+The audit flags bad stat rows and player_totals that no longer match the
+lines they sum, and the command line covers every shard.
+"""
+import asyncio
+import json
+import sys
+import pytest
+from sqlalchemy import create_engine, text
+
+from app import audit
+from app.settings import Settings, Team
+from conftest import migrate, seed
+
+def execute(url: str, sql: str, **params):
+    engine = create_engine(url)
+    with engine.begin() as conn:
+        conn.execute(text(sql), params)
+    engine.dispose()
+
+@pytest.fixture(autouse=True)
+def stop_pool():
+    yield
+    audit.shutdown()
+
+def test_clean_data_passes(client, admin, database_url):
+    seed(database_url, players=3, games=2)
+    report = client.post("/stats/audit", headers=admin).json()
+    assert report["ok"] and report["rows_scanned"] == 6
+    assert report["totals_drift"] == [] and report["totals_drift_players"] == 0
+
+def test_reports_corrupt_totals_and_rows(client, admin, database_url):
+    players, games = seed(database_url, players=3, games=2)
+    execute(database_url, "UPDATE player_totals SET hits = hits + 5, games_played = 7 WHERE player_id = :p",
+            p=players[1])
+    execute(database_url, "UPDATE player_game_stats SET hits = 3 WHERE player_id = :p AND game_id = :g",
+            p=players[2], g=games[0])
+
+    report = client.post("/stats/audit", headers=admin).json()
+    assert not report["ok"]
+    assert report["totals_drift_players"] == 2
+    assert report["totals_drift"] == [
+        {"player_id": players[1], "field": "games_played", "stored": 7, "actual": 2},
+        {"player_id": players[1], "field": "hits", "stored": 9, "actual": 4},
+        # the edited line moved the sum away from the stored total
+        {"player_id": players[2], "field": "hits", "stored": 4, "actual": 5},
+    ]
+    assert report["failures"]["hits_breakdown"] == 1
+
+    # a rebuild brings the totals back in line
+    client.post("/stats/totals/rebuild", headers=admin)
+    report = client.post("/stats/audit", headers=admin).json()
+    assert report["totals_drift_players"] == 0 and report["failures"]["hits_breakdown"] == 1
+
+def test_command_line_audits_every_shard(tmp_path, monkeypatch, capsys):
+    urls = {name: f"sqlite:///{tmp_path / name}.db" for name in ("default", "b")}
+    for url in urls.values():
+        migrate(url, monkeypatch)
+    seed(urls["default"], players=2, games=1)
+    players, _ = seed(urls["b"], players=2, games=1, team_id=2)
+    execute(urls["b"], "UPDATE player_totals SET rbis = 0 WHERE player_id = :p", p=players[0])
+
+    monkeypatch.setenv("DATABASE_URL", urls["default"])
+    monkeypatch.setenv("SHARDS", json.dumps({"b": urls["b"]}))
+    monkeypatch.setattr(sys, "argv", ["app.audit"])
+    with pytest.raises(SystemExit) as exit:
+        audit.main()
+    report = json.loads(capsys.readouterr().out)
+    assert exit.value.code == 1 and not report["ok"]
+    assert set(report["shards"]) == {"default", "b"}
+    assert report["shards"]["default"]["ok"]
+    assert report["shards"]["b"]["totals_drift"] == [
+        {"player_id": players[0], "field": "rbis", "stored": 0, "actual": 1},
+    ]
+
+def test_a_teams_audit_stays_on_its_shard(tmp_path, monkeypatch):
+    # the default shard is never opened
+    settings = Settings(database_url=f"sqlite:///{tmp_path / 'default.db'}",
+                        shards=(("b", f"sqlite:///{tmp_path / 'b.db'}"),),
+                        teams=(Team(1, "hawks", "x"), Team(2, "jays", "y", "b")))
+    migrate(settings.shards[0][1], monkeypatch)
+    seed(settings.shards[0][1], players=1, games=1, team_id=2)
+    report = asyncio.run(audit.run_shards(settings, team_id=2))
+    assert list(report["shards"]) == ["b"] and report["ok"]
+    assert not (tmp_path / "default.db").exists()
@@ -0,0 +1,42 @@
+"""
+Worker boot opens nothing until it is used and is driven by the Settings it
+is given; bench/boot_bench.py's timing budgets are checked loosely.
+"""
+import os
+from dataclasses import replace
+from fastapi.testclient import TestClient
+from app import simulate
+from app.main import create_app
+from bench import boot_bench
+
+# Wall-clock budgets only catch gross regressions on a shared test machine,
+# so they are scaled up here; BOOT_BUDGET_SCALE=0 skips them.
+BUDGET_SCALE = float(os.getenv("BOOT_BUDGET_SCALE", "4"))
+
+def test_boot_in_a_fresh_interpreter(database_url, monkeypatch):
+    # the child interpreters build their app from the environment
+    monkeypatch.setenv("DATABASE_URL", database_url)
+    samples = boot_bench.measure(runs=3)
+    budgets = {k: v * BUDGET_SCALE for k, v in boot_bench.BUDGETS_MS.items()} if BUDGET_SCALE else {}
+    assert boot_bench.over_budget(samples, budgets) == []
+
+def test_engines_wait_for_the_first_query(settings):
+    app = create_app(settings)
+    database = app.state.database
+    assert database._pid is None
+    with TestClient(app) as client:
+        # starting the app connects nothing either
+        assert database._pid is None
+        assert client.get("/health").json() == {"ok": True, "db": True}
+        assert database._pid == os.getpid()
+    # shutdown disposes the pools
+    assert database._pid is None
+    assert simulate._pool is None
+
+def test_create_app_takes_its_settings(settings, tmp_path):
+    settings = replace(settings, data_version_file=str(tmp_path / "other-version"),
+                       live_queue_size=3, live_heartbeat_seconds=2, write_behind_batch=5)
+    app = create_app(settings)
+    assert app.state.data_version.path == settings.data_version_file
+    assert (app.state.broker.queue_size, app.state.broker.heartbeat_seconds) == (3, 2)
+    assert app.state.stat_queue._batch_size == 5
@@ -0,0 +1,30 @@
+"""/games/{id}/boxscore: the game, its lines in name order and the summed team line."""
+
+def test_boxscore_lines_and_totals(client, admin):
+    ids = {name: client.post("/players", json={"first_name": name, "last_name": last}, headers=admin).json()["id"]
+           for name, last in (("Zoe", "Adams"), ("Amy", "Baker"), ("Bo", "Adams"))}
+    game = client.post("/games", json={"opponent": "Owls", "date": "2025-04-10"}, headers=admin).json()["id"]
+    empty = client.post("/games", json={"opponent": "Jays", "date": "2025-04-11"}, headers=admin).json()["id"]
+    lines = [
+        {"player_id": ids["Zoe"], "game_id": game, "at_bats": 4, "hits": 2, "singles": 1, "home_runs": 1, "rbis": 3},
+        {"player_id": ids["Amy"], "game_id": game, "at_bats": 3, "hits": 1, "doubles": 1, "walks": 1},
+        {"player_id": ids["Bo"], "game_id": game, "at_bats": 4, "hits": 0, "strikeouts": 2, "rbis": 1},
+    ]
+    assert client.post("/stats/bulk", json={"lines": lines}, headers=admin).json()["errors"] == 0
+
+    box = client.get(f"/games/{game}/boxscore").json()
+    assert box["game"]["opponent"] == "Owls"
+    assert [(l["player_last_name"], l["player_first_name"]) for l in box["lines"]] == [
+        ("Adams", "Bo"), ("Adams", "Zoe"), ("Baker", "Amy"),
+    ]
+    totals = box["totals"]
+    assert (totals["at_bats"], totals["hits"], totals["home_runs"], totals["rbis"]) == (11, 3, 1, 4)
+    assert totals["average"] == round(3 / 11, 3)
+    # no score recorded, so it is estimated from team RBIs
+    assert (box["score_ours"], box["score_ours_derived"]) == (4, True)
+
+    nothing = client.get(f"/games/{empty}/boxscore").json()
+    assert nothing["lines"] == [] and nothing["totals"]["at_bats"] == 0
+    assert (nothing["score_ours"], nothing["score_ours_derived"]) == (None, False)
+
+    assert client.get(f"/games/{empty + 100}/boxscore").status_code == 404
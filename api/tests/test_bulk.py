@@ -0,0 +1,61 @@
+"""
+Round trips for the bulk stat upsert on MySQL 8, counted on a pymysql
+cursor that records each query it would send instead of sending it.
+"""
+import math
+import pymysql
+from pymysql.cursors import Cursor
+from sqlalchemy.dialects import mysql
+from sqlalchemy.dialects.mysql.pymysql import MySQLDialect_pymysql
+
+from app import models
+from app.bulk import MYSQL_ROWS_PER_STATEMENT, upsert_statements
+
+class CountingCursor(Cursor):
+    def __init__(self, connection):
+        super().__init__(connection)
+        self.queries = []
+
+    def _query(self, q):
+        self.queries.append(q)
+        self.rowcount = 0
+        return 0
+
+def mysql8_dialect():
+    dialect = MySQLDialect_pymysql()
+    dialect.server_version_info = (8, 0, 36)
+    dialect._requires_alias_for_on_duplicate_key = True
+    return dialect
+
+def rows(n):
+    return [{"player_id": i, "game_id": 1, "team_id": 1, "hits": i % 4, "at_bats": 4}
+            for i in range(n)]
+
+def run(statements):
+    """Send `statements` through a pymysql cursor the way SQLAlchemy's pymysql dialect does."""
+    dialect = mysql8_dialect()
+    cursor = CountingCursor(pymysql.connections.Connection(defer_connect=True))
+    for stmt, params in statements:
+        compiled = stmt.compile(dialect=dialect, column_keys=list(params[0]) if params else None)
+
+        def positional(p=None):
+            values = compiled.construct_params(p)
+            return tuple(values[k] for k in compiled.positiontup)
+
+        if params is None:
+            cursor.execute(compiled.string, positional())
+        else:
+            cursor.executemany(compiled.string, [positional(p) for p in params])
+    return cursor.queries
+
+def test_mysql_upsert_is_one_round_trip_per_chunk():
+    for n in (1, MYSQL_ROWS_PER_STATEMENT, 3 * MYSQL_ROWS_PER_STATEMENT + 1):
+        queries = run(upsert_statements("mysql", rows(n)))
+        assert len(queries) == math.ceil(n / MYSQL_ROWS_PER_STATEMENT)
+        assert all("AS new ON DUPLICATE KEY UPDATE" in q for q in queries)
+
+def test_single_row_executemany_would_be_a_round_trip_per_row():
+    # What the chunking avoids: pymysql can't batch the MySQL 8 upsert form.
+    stmt = mysql.insert(models.PlayerGameStat.__table__)
+    stmt = stmt.on_duplicate_key_update(hits=stmt.inserted.hits, at_bats=stmt.inserted.at_bats)
+    assert len(run([(stmt, rows(50))])) == 50
@@ -0,0 +1,64 @@
+"""
+GET responses carry a per-version, per-team ETag and are answered with 304
+when the client already holds it; any write moves the version on.
+"""
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import create_app
+from app.settings import Settings, Team
+from conftest import seed
+
+def test_etag_round_trip_and_invalidation_on_write(client, admin, database_url):
+    seed(database_url, players=2, games=1)
+    first = client.get("/players")
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+
+    again = client.get("/players", headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.headers["etag"] == etag and again.content == b""
+
+    created = client.post("/players", json={"first_name": "New", "last_name": "Player"}, headers=admin)
+    assert created.status_code == 201
+
+    after = client.get("/players", headers={"If-None-Match": etag})
+    assert after.status_code == 200
+    assert after.headers["etag"] != etag
+    assert "New" in {p["first_name"] for p in after.json()}
+    assert client.get("/players", headers={"If-None-Match": after.headers["etag"]}).status_code == 304
+
+@pytest.mark.parametrize("header, status", [
+    ("{etag}", 304),
+    ("W/{etag}", 304),
+    ('"other", {etag}', 304),
+    ('W/"other",W/{etag}', 304),
+    ("*", 304),
+    ('"other"', 200),
+    ("", 200),
+    # contains the tag as a substring but doesn't list it
+    ('"{etag}"', 200),
+    ("{bare}", 200),
+])
+def test_if_none_match_parsing(client, header, status):
+    etag = client.get("/games").headers["etag"]
+    value = header.format(etag=etag, bare=etag.strip('"'))
+    assert client.get("/games", headers={"If-None-Match": value}).status_code == status
+
+def test_cache_is_keyed_by_team(database_url, tmp_path):
+    hawks, owls = Team(1, "hawks", "hawks-token"), Team(2, "owls", "owls-token")
+    seed(database_url, players=2, games=1, team_id=hawks.id, first_name="hawk")
+    seed(database_url, players=3, games=1, team_id=owls.id, first_name="owl")
+    settings = Settings(database_url=database_url, teams=(hawks, owls),
+                        data_version_file=str(tmp_path / "version"))
+    with TestClient(create_app(settings)) as client:
+        for _ in range(2):  # the second round is served from the cache
+            hawk_page = client.get("/players", headers={"X-Team": "hawks"})
+            owl_page = client.get("/players", headers={"X-Team": "owls"})
+            assert {p["first_name"] for p in hawk_page.json()} == {"hawk"}
+            assert {p["first_name"] for p in owl_page.json()} == {"owl"}
+        assert hawk_page.headers["etag"] != owl_page.headers["etag"]
+        assert "X-Team" in hawk_page.headers["vary"]
+        stale = client.get("/players", headers={"X-Team": "owls",
+                                                "If-None-Match": hawk_page.headers["etag"]})
+        assert stale.status_code == 200
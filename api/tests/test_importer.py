@@ -0,0 +1,64 @@
+import csv
+import io
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session, sessionmaker
+
+from app import importer, models
+from conftest import seed
+
+@pytest.fixture
+def session_local(database_url, monkeypatch):
+    engine = create_engine(database_url)
+    monkeypatch.setattr(importer, "SessionLocal", sessionmaker(bind=engine))
+    yield
+    engine.dispose()
+
+def write_csv(path, rows):
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+
+def test_errors_are_counted_but_only_the_first_are_kept(tmp_path, session_local):
+    good = [{"first_name": "Ann", "last_name": f"Lee{i}", "opponent": "Owls",
+             "date": "2025-05-01", "at_bats": 3, "hits": 1, "singles": 1} for i in range(3)]
+    bad = [{"first_name": "", "last_name": "", "opponent": "Owls", "date": "2025-05-01",
+            "at_bats": 3, "hits": 1, "singles": 1}] * 5000
+    path = tmp_path / "season.csv"
+    write_csv(path, good + bad)
+
+    out = io.StringIO()
+    result = importer.run(str(path), "csv", chunk=500, progress_seconds=3600, out=out)
+    assert result["rows"] == 5003
+    assert result["created"] == 3
+    assert result["errors"] == 5000
+    shown = [line for line in out.getvalue().splitlines() if line.startswith("row ")]
+    assert len(shown) == importer.MAX_ERRORS_SHOWN
+    assert shown[0].startswith("row 4: player_id or first_name")
+
+def test_error_log_is_bounded():
+    errors = importer.ErrorLog(keep=3)
+    for number in range(1, 101):
+        errors.add(number, "bad")
+    assert errors.count == 100
+    assert errors.first == [(1, "bad"), (2, "bad"), (3, "bad")]
+
+def test_write_chunk_locks_the_lines_it_reads(database_url):
+    players, games = seed(database_url, players=2, games=1)
+    engine = create_engine(database_url)
+    selects = []
+    with Session(engine) as db:
+        @event.listens_for(db, "do_orm_execute")
+        def record(state):
+            if state.is_select:
+                selects.append(state.statement)
+
+        line = {"at_bats": 4, "hits": 3, "singles": 3}
+        counts = importer.write_chunk(db, {(players[0], games[0]): line}, 1)
+        db.commit()
+    engine.dispose()
+    assert counts == {"created": 0, "updated": 1}
+    # SQLite drops FOR UPDATE from the SQL, so check the statement itself
+    (read,) = [s for s in selects if models.PlayerGameStat.__table__ in s.get_final_froms()]
+    assert read._for_update_arg is not None
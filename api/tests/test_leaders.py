@@ -0,0 +1,39 @@
+"""/leaders: ranked on the values shown, ties sharing a rank and listed by name."""
+import pytest
+
+@pytest.fixture
+def board(client, admin):
+    game = client.post("/games", json={"opponent": "Owls", "date": "2025-04-10"}, headers=admin).json()["id"]
+    # (first, last, at_bats, hits, home_runs)
+    players = [("Abe", "Avila", 1000, 333, 0),   # .333 (0.3330)
+               ("Zed", "Zorn", 3, 1, 1),          # .333 (0.3333), fewer PA
+               ("Max", "Moss", 10, 4, 2),         # .400
+               ("Ida", "Ives", 20, 5, 2)]         # .250
+    ids = {}
+    lines = []
+    for first, last, ab, h, hr in players:
+        ids[first] = client.post("/players", json={"first_name": first, "last_name": last}, headers=admin).json()["id"]
+        lines.append({"player_id": ids[first], "game_id": game, "at_bats": ab, "hits": h,
+                      "singles": h - hr, "home_runs": hr})
+    assert client.post("/stats/bulk", json={"lines": lines}, headers=admin).json()["errors"] == 0
+    return ids
+
+def entries(board):
+    return [(e["rank"], e["first_name"], e["value"]) for e in board["leaders"]]
+
+def test_rates_rank_on_the_rounded_value(client, board):
+    avg, = client.get("/leaders", params={"stat": "avg"}).json()
+    assert avg["stat"] == "average"
+    # .3330 and .3333 both show as .333: one shared rank, in name order
+    assert entries(avg) == [(1, "Max", 0.4), (2, "Abe", 0.333), (2, "Zed", 0.333), (4, "Ida", 0.25)]
+
+def test_counts_order_and_qualification(client, board):
+    hr, low = client.get("/leaders", params={"stat": ["hr", "-hr"], "k": 3}).json()
+    assert entries(hr) == [(1, "Ida", 2), (1, "Max", 2), (3, "Zed", 1)]
+    assert low["order"] == "asc" and entries(low)[0] == (1, "Abe", 0)
+
+    qualified, = client.get("/leaders", params={"stat": "avg", "min_pa": 10}).json()
+    assert [e["first_name"] for e in qualified["leaders"]] == ["Max", "Abe", "Ida"]
+
+def test_unknown_stat_is_400(client):
+    assert client.get("/leaders", params={"stat": "xyz"}).status_code == 400
@@ -0,0 +1,62 @@
+"""
+Lineup simulation runs on a process pool shared by every team, so it needs
+the team's admin token, one request per team at a time, and the server's
+ceilings on games and budget.
+"""
+from dataclasses import replace
+import pytest
+from fastapi.testclient import TestClient
+
+from app import simulate
+from app.main import create_app
+from conftest import seed
+
+@pytest.fixture
+def recorded(monkeypatch):
+    """Stand-ins for the pool runs, recording (games, budget_seconds)."""
+    calls = []
+
+    async def fake_simulate(probabilities, games, innings, seed, budget_seconds):
+        calls.append((games, budget_seconds))
+        return simulate.summarize(simulate.simulate_games(probabilities, 100, innings, seed)), True
+
+    async def fake_optimize(probabilities, order, games, innings, seed, budget_seconds):
+        calls.append((games, budget_seconds))
+        return {"order": order, "baseline": None, "best": None, "evaluated": 0,
+                "rounds": 0, "truncated": True}
+
+    monkeypatch.setattr(simulate, "simulate", fake_simulate)
+    monkeypatch.setattr(simulate, "optimize", fake_optimize)
+    return calls
+
+@pytest.mark.parametrize("path", ["/lineups/simulate", "/lineups/optimize"])
+def test_needs_the_admin_token(client, database_url, recorded, path):
+    players, _ = seed(database_url, players=2, games=1)
+    assert client.post(path, json={"lineup": players}).status_code == 401
+    assert client.post(path, json={"lineup": players},
+                       headers={"Authorization": "Bearer wrong"}).status_code == 403
+    assert recorded == []
+
+@pytest.mark.parametrize("path", ["/lineups/simulate", "/lineups/optimize"])
+def test_one_run_per_team(client, admin, database_url, recorded, path):
+    players, _ = seed(database_url, players=2, games=1)
+    client.app.state.simulations[1] = 1  # a run already in flight
+    busy = client.post(path, json={"lineup": players}, headers=admin)
+    assert busy.status_code == 429 and busy.headers["retry-after"] == "1"
+    assert recorded == []
+
+    client.app.state.simulations[1] = 0
+    assert client.post(path, json={"lineup": players}, headers=admin).status_code == 200
+    # the slot is given back once the response is out
+    assert client.app.state.simulations[1] == 0
+
+@pytest.mark.parametrize("path", ["/lineups/simulate", "/lineups/optimize"])
+def test_games_and_budget_are_capped(settings, admin, database_url, recorded, path):
+    players, _ = seed(database_url, players=2, games=1)
+    capped = replace(settings, simulation_max_games=500, simulation_max_budget_ms=250)
+    with TestClient(create_app(capped)) as client:
+        body = {"lineup": players, "games": 50_000, "budget_ms": 20_000}
+        assert client.post(path, json=body, headers=admin).status_code == 200
+        body = {"lineup": players, "games": 200, "budget_ms": 100}
+        assert client.post(path, json=body, headers=admin).status_code == 200
+    assert recorded == [(500, 0.25), (200, 0.1)]
@@ -0,0 +1,83 @@
+"""
+/games/{id}/live streams a game's stat writes as Server-Sent Events, through
+every middleware the app installs, and lets go of its subscription as soon
+as the client disconnects.
+"""
+import asyncio
+import pytest
+
+from app import live
+from app.main import create_app
+from conftest import seed
+
+async def stream(app, game_id: int, on_chunk) -> list[bytes]:
+    """
+    Drive one GET of the live feed over raw ASGI, the way a server would.
+    on_chunk(body, disconnect) is called for each body chunk; calling
+    disconnect() makes the client go away.
+    """
+    gone = asyncio.Event()
+    requested = False
+    chunks = []
+
+    async def receive():
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await gone.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            assert message["status"] == 200
+        elif message.get("body"):
+            chunks.append(message["body"])
+            await on_chunk(message["body"], gone.set)
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "GET", "scheme": "http", "path": f"/games/{game_id}/live",
+        "raw_path": f"/games/{game_id}/live".encode(), "root_path": "", "query_string": b"",
+        "headers": [(b"host", b"testserver")], "client": ("127.0.0.1", 1234),
+        "server": ("testserver", 80),
+    }
+    try:
+        await asyncio.wait_for(app(scope, receive, send), 5)
+    finally:
+        await app.state.databases.dispose()
+    return chunks
+
+@pytest.fixture
+def feed(settings, database_url):
+    _, (game_id,) = seed(database_url, players=1, games=1)
+    app = create_app(settings)
+    return app, game_id, live.channel(1, game_id)
+
+def test_disconnect_unsubscribes(feed):
+    app, game_id, channel = feed
+    broker = app.state.broker
+    seen = []
+
+    async def on_chunk(body, disconnect):
+        seen.append(broker.subscribers(channel))
+        disconnect()
+
+    chunks = asyncio.run(stream(app, game_id, on_chunk))
+    assert chunks[0].startswith(b"event: hello\n")
+    assert seen == [1]
+    assert broker.subscribers(channel) == 0
+
+def test_stat_events_reach_the_client(feed):
+    app, game_id, channel = feed
+    broker = app.state.broker
+
+    async def on_chunk(body, disconnect):
+        if body.startswith(b"event: hello"):
+            broker.publish(channel, {"type": "stat", "player_id": 1})
+        else:
+            disconnect()
+
+    chunks = asyncio.run(stream(app, game_id, on_chunk))
+    assert chunks[1] == b'event: stat\ndata: {"type":"stat","player_id":1}\n\n'
+    assert broker.subscribers(channel) == 0
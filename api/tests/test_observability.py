@@ -0,0 +1,56 @@
+"""
+Every request reports its database and encoding time in Server-Timing and
+feeds the per-route histograms on /metrics.
+"""
+import re
+import fastapi.routing
+from dataclasses import replace
+from fastapi.testclient import TestClient
+
+from app.main import create_app
+from conftest import seed
+
+SERIALIZE_COUNT = re.compile(
+    r'^http_request_serialize_seconds_count\{method="GET",route="/stats"\} (\d+)$', re.M)
+
+def timings(response) -> dict[str, str]:
+    """Server-Timing as {name: "dur=..;desc=.."}."""
+    entries = [part.strip().split(";", 1) for part in response.headers["server-timing"].split(",")]
+    return {name: params for name, params in entries}
+
+def serialize_count(client) -> int:
+    match = SERIALIZE_COUNT.search(client.get("/metrics").text)
+    return int(match.group(1)) if match else 0
+
+def duration(params: str) -> float:
+    return float(re.search(r"dur=([\d.]+)", params).group(1))
+
+def test_server_timing_reports_db_and_encoding(client, database_url):
+    seed(database_url, players=20, games=25)
+    for path in ("/stats?limit=500", "/games"):
+        response = client.get(path)
+        assert response.status_code == 200
+        timing = timings(response)
+        assert set(timing) == {"db", "ser", "total"}
+        assert re.search(r'desc="[1-9]\d* queries"', timing["db"])
+        assert duration(timing["ser"]) > 0
+        assert duration(timing["total"]) >= duration(timing["db"])
+
+def test_histograms_count_each_request(client, database_url):
+    seed(database_url, players=2, games=2)
+    before = serialize_count(client)
+    assert client.get("/stats").status_code == 200
+    assert client.get("/stats", params={"limit": 1}).status_code == 200
+    assert serialize_count(client) == before + 2
+
+def test_fastapi_is_not_patched(settings):
+    original = fastapi.routing.serialize_response
+    create_app(settings)
+    assert fastapi.routing.serialize_response is original
+
+def test_disabled_sends_no_header(settings, database_url):
+    seed(database_url, players=1, games=1)
+    with TestClient(create_app(replace(settings, request_metrics=False))) as quiet:
+        response = quiet.get("/stats")
+        assert response.status_code == 200
+        assert "server-timing" not in response.headers
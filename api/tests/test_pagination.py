@@ -0,0 +1,70 @@
+"""
+Keyset paging: following X-Next-Cursor from the first page must return
+every row exactly once, in the same order as one big page.
+"""
+import base64
+import pytest
+from app.pagination import NEXT_CURSOR_HEADER, encode_cursor
+from conftest import seed
+
+def walk(client, url: str, limit: int, max_pages: int = 200) -> list[dict]:
+    rows, cursor = [], None
+    for _ in range(max_pages):
+        params = {"limit": limit, **({"cursor": cursor} if cursor else {})}
+        response = client.get(url, params=params)
+        assert response.status_code == 200
+        page = response.json()
+        assert len(page) <= limit
+        rows += page
+        cursor = response.headers.get(NEXT_CURSOR_HEADER)
+        if cursor is None:
+            return rows
+    pytest.fail(f"{url} still had a next page after {max_pages} pages")
+
+@pytest.fixture
+def tied(client, admin, database_url):
+    """Seeded rows plus players sharing a full name and games sharing a date."""
+    seed(database_url, players=7, games=5)
+    for _ in range(4):
+        client.post("/players", json={"first_name": "Sam", "last_name": "Last0003"}, headers=admin)
+        client.post("/players", json={"first_name": "Ann", "last_name": "Last0003"}, headers=admin)
+        client.post("/games", json={"opponent": "Twins", "date": "2025-04-03"}, headers=admin)
+
+@pytest.mark.parametrize("url, key", [
+    ("/players", lambda r: (r["last_name"], r["first_name"], r["id"])),
+    ("/games", lambda r: (r["date"], r["id"])),
+    ("/stats", lambda r: (-r["game_id"], r["player_id"])),
+])
+@pytest.mark.parametrize("limit", [1, 3, 4])
+def test_cursor_walk_returns_every_row_once(client, tied, url, key, limit):
+    everything = client.get(url, params={"limit": 500}).json()
+    walked = walk(client, url, limit)
+    assert walked == everything
+    keys = [key(r) for r in walked]
+    assert len(set(keys)) == len(keys)
+    if url == "/games":
+        assert keys == sorted(keys, reverse=True)
+    else:
+        assert keys == sorted(keys)
+
+def test_stats_seek_mixes_directions(client, database_url):
+    players, games = seed(database_url, players=3, games=3)
+    # resume inside the middle game: its later players, then the older games
+    cursor = encode_cursor(games[1], players[0])
+    rows = client.get("/stats", params={"cursor": cursor, "limit": 500}).json()
+    assert [(r["game_id"], r["player_id"]) for r in rows] == (
+        [(games[1], p) for p in players[1:]] + [(games[0], p) for p in players]
+    )
+
+@pytest.mark.parametrize("url", ["/players", "/games", "/stats"])
+@pytest.mark.parametrize("cursor", [
+    "not a cursor!",
+    base64.urlsafe_b64encode(b'{"a": 1}').decode(),    # not a list
+    encode_cursor(1, 2, 3, 4),                           # wrong arity
+    encode_cursor("x", "y"),                             # wrong types (or arity, for players)
+    encode_cursor("x", "y", "z"),                        # wrong types (or arity, for games/stats)
+])
+def test_malformed_cursor_is_400(client, url, cursor):
+    response = client.get(url, params={"cursor": cursor})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid cursor"
@@ -0,0 +1,63 @@
+"""
+The list endpoints must cost a fixed number of statements however many rows
+a page holds; a per-row lookup (the old N+1 in /players) fails these.
+"""
+from contextlib import contextmanager
+import pytest
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from conftest import seed
+
+@contextmanager
+def count_statements():
+    statements = []
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    # every engine, including the sync side of the async read engines
+    event.listen(Engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(Engine, "before_cursor_execute", before_cursor_execute)
+
+def statements_for(client, url: str) -> int:
+    with count_statements() as statements:
+        response = client.get(url)
+    assert response.status_code == 200
+    return len(statements)
+
+@pytest.mark.parametrize("url", ["/players?limit=500", "/games?limit=500", "/stats?limit=500"])
+def test_list_statement_count_is_constant(client, database_url, url):
+    seed(database_url, players=3, games=2)
+    small = statements_for(client, url)
+
+    seed(database_url, players=60, games=8)
+    # new data version, so the second request misses the response cache too
+    client.app.state.data_version.bump()
+    large = statements_for(client, url)
+
+    assert 1 <= small == large <= 2
+
+def test_player_page_totals_match_lines(client, database_url):
+    seed(database_url, players=5, games=3)
+    players = client.get("/players").json()
+    assert len(players) == 5
+    for p in players:
+        assert (p["games_played"], p["at_bats"], p["hits"], p["walks"]) == (3, 12, 6, 3)
+        assert p["average"] == 0.5
+
+def test_bulk_statement_count_is_constant(client, database_url, admin):
+    player_ids, game_ids = seed(database_url, players=40, games=2)
+    def post(game_id: int, players: list[int]) -> int:
+        lines = [{"player_id": pid, "game_id": game_id, "at_bats": 3, "hits": 1, "singles": 1}
+                 for pid in players]
+        with count_statements() as statements:
+            response = client.post("/stats/bulk", json={"lines": lines}, headers=admin)
+        assert response.status_code == 200 and response.json()["updated"] == len(players)
+        return len(statements)
+
+    assert post(game_ids[0], player_ids[:2]) == post(game_ids[1], player_ids)
+    assert client.get(f"/players/{player_ids[0]}/trend").status_code == 200
+    totals = {p["id"]: p for p in client.get("/players?limit=500").json()}
+    # 4/2 and 4/2 seeded, then both lines rewritten to 3/1
+    assert (totals[player_ids[0]]["at_bats"], totals[player_ids[0]]["hits"]) == (6, 2)
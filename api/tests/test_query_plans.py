@@ -0,0 +1,51 @@
+"""
+EXPLAIN QUERY PLAN for the statements the hot endpoints actually send: each
+must be answered through an index, never a full scan of a table that grows
+with the league.
+"""
+import sqlite3
+import pytest
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from conftest import seed
+
+GROWING_TABLES = ("players", "games", "player_game_stats")
+
+def captured_selects(client, url: str) -> list[tuple[str, tuple]]:
+    captured = []
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            captured.append((statement, tuple(parameters)))
+    event.listen(Engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        assert client.get(url).status_code == 200
+    finally:
+        event.remove(Engine, "before_cursor_execute", before_cursor_execute)
+    return captured
+
+@pytest.mark.parametrize("url", [
+    # roster page, keyset-ordered by name, and the typeahead index load
+    "/players?limit=50",
+    "/players/search?prefix=last",
+    # games by date
+    "/games?date_from=2025-04-02&date_to=2025-04-05",
+    # the aggregate's join to games for a date range
+    "/stats/aggregate?date_from=2025-04-02&date_to=2025-04-05",
+    # per-player sums
+    "/leaders?stat=hits&date_from=2025-04-02",
+])
+def test_hot_queries_use_an_index(client, database_url, url):
+    seed(database_url, players=30, games=6)
+    statements = captured_selects(client, url)
+    assert statements
+
+    path = database_url.removeprefix("sqlite:///")
+    with sqlite3.connect(path) as conn:
+        for statement, parameters in statements:
+            plan = [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {statement}", parameters)]
+            assert any("USING INDEX" in step or "USING COVERING INDEX" in step for step in plan), \
+                (statement, plan)
+            full_scans = [step for step in plan
+                          if step.startswith("SCAN") and step.split()[1] in GROWING_TABLES
+                          and "USING" not in step]
+            assert not full_scans, (statement, plan)
@@ -0,0 +1,65 @@
+"""
+With a replica configured, reads go to it except for a client that has just
+written: its db_read_primary_until cookie keeps its reads on the primary
+(read-your-writes) until the pin runs out.
+"""
+import time
+from dataclasses import replace
+from types import SimpleNamespace
+import pytest
+from fastapi.testclient import TestClient
+
+from app import db as db_module
+from app.db import READ_PIN_COOKIE
+from app.main import create_app
+from conftest import migrate, seed
+
+@pytest.fixture
+def replica_client(settings, database_url, tmp_path, monkeypatch):
+    # a replica that has caught up with the seed rows and then stops replicating
+    replica_url = f"sqlite:///{tmp_path / 'replica.db'}"
+    migrate(replica_url, monkeypatch)
+    for url in (database_url, replica_url):
+        seed(url, players=2, games=1)
+    with TestClient(create_app(replace(settings, database_url_read=replica_url))) as client:
+        yield client
+
+def names(client) -> set[str]:
+    response = client.get("/players")
+    assert response.status_code == 200
+    return {p["last_name"] for p in response.json()}
+
+def test_reads_follow_the_write_while_pinned(replica_client, admin):
+    assert names(replica_client) == {"Last0000", "Last0001"}
+    created = replica_client.post(
+        "/players", json={"first_name": "New", "last_name": "Signing"}, headers=admin)
+    assert created.status_code == 201
+
+    pin = float(replica_client.cookies[READ_PIN_COOKIE])
+    assert time.time() < pin <= time.time() + replica_client.app.state.settings.read_pin_seconds
+    # the writer reads from the primary
+    assert "Signing" in names(replica_client)
+
+    # anyone else still reads the replica
+    with TestClient(replica_client.app) as other:
+        assert "Signing" not in names(other)
+
+def test_pin_expires(replica_client, admin, monkeypatch):
+    created = replica_client.post(
+        "/players", json={"first_name": "New", "last_name": "Signing"}, headers=admin)
+    assert created.status_code == 201
+    assert "Signing" in names(replica_client)
+
+    later = time.time() + replica_client.app.state.settings.read_pin_seconds + 1
+    monkeypatch.setattr(db_module, "time", SimpleNamespace(time=lambda: later))
+    assert "Signing" not in names(replica_client)
+
+def test_failed_write_does_not_pin(replica_client, admin):
+    response = replica_client.post("/players", json={"first_name": "No"}, headers=admin)
+    assert response.status_code == 422
+    assert READ_PIN_COOKIE not in replica_client.cookies
+
+def test_no_pin_without_a_replica(client, admin):
+    created = client.post("/players", json={"first_name": "New", "last_name": "Signing"}, headers=admin)
+    assert created.status_code == 201
+    assert READ_PIN_COOKIE not in client.cookies
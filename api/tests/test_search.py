@@ -0,0 +1,26 @@
+"""Typeahead index: ranked prefix matches that follow roster edits."""
+import sqlite3
+from conftest import seed
+
+def names(client, prefix: str) -> list[tuple[str, str, str]]:
+    response = client.get(f"/players/search?prefix={prefix}")
+    assert response.status_code == 200
+    return [(p["first_name"], p["last_name"], p["match"]) for p in response.json()]
+
+def test_prefix_and_jersey_matches(client, database_url):
+    seed(database_url, players=12, games=0)
+    assert names(client, "last001") == [("Player", "Last0010", "last_name"), ("Player", "Last0011", "last_name")]
+    assert names(client, "7")[0] == ("Player", "Last0007", "jersey")
+
+def test_index_follows_edits_made_outside_the_api(client, database_url):
+    seed(database_url, players=3, games=0)
+    assert names(client, "zed") == []
+
+    with sqlite3.connect(database_url.removeprefix("sqlite:///")) as conn:
+        conn.execute("UPDATE players SET last_name = 'Zed' WHERE last_name = 'Last0001'")
+        conn.execute("UPDATE players SET jersey_number = 99 WHERE last_name = 'Last0002'")
+    client.app.state.data_version.bump()
+
+    assert names(client, "zed") == [("Player", "Zed", "last_name")]
+    assert names(client, "99") == [("Player", "Last0002", "jersey")]
+    assert names(client, "last0001") == []
@@ -0,0 +1,63 @@
+"""Lineup simulation on the process pool, and what happens when the budget runs out."""
+import asyncio
+import concurrent.futures
+import itertools
+import time
+from types import SimpleNamespace
+import pytest
+from app import simulate
+
+LINE = {"at_bats": 100, "singles": 20, "doubles": 5, "triples": 1, "home_runs": 2,
+        "strikeouts": 15, "walks": 8, "hit_by_pitches": 1, "sac_flies": 1, "sac_bunts": 1}
+
+@pytest.fixture
+def probabilities():
+    yield simulate.outcome_probabilities([LINE] * 9)
+    simulate.shutdown()
+
+@pytest.fixture
+def one_worker(monkeypatch):
+    """
+    A single-thread pool in place of the process pool, with every
+    simulate_games call it runs recorded as (games asked for, games played).
+    """
+    calls = []
+    simulate_games = simulate.simulate_games
+
+    def recorded(probabilities, games, innings, seed, deadline=None):
+        runs = simulate_games(probabilities, games, innings, seed, deadline)
+        calls.append((games, len(runs)))
+        return runs
+
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+    monkeypatch.setattr(simulate, "simulate_games", recorded)
+    monkeypatch.setattr(simulate, "pool", lambda: executor)
+    yield calls
+    executor.shutdown(wait=True)
+
+def test_full_budget_plays_every_game(probabilities):
+    summary, truncated = asyncio.run(simulate.simulate(probabilities, 12_000, 7, 1, 30))
+    assert not truncated and summary["games"] == 12_000
+    assert 0 < summary["ci_low"] < summary["expected_runs"] < summary["ci_high"]
+
+def test_tiny_budget_is_partial_and_frees_the_pool(probabilities, one_worker):
+    # the optimizer's 100k-game candidates run for most of a second each
+    result = asyncio.run(simulate.optimize(probabilities, list(range(9)), 100_000, 7, 1, 0.1))
+    assert result["truncated"] and result["evaluated"] == 0
+    tasks = [(probabilities, 100_000, 7, seed) for seed in range(3)]
+    results, truncated = asyncio.run(simulate.run_tasks(tasks, time.time() + 0.1))
+    assert truncated and results[1:] == [None, None]
+
+    simulate.pool().shutdown(wait=True)
+    # the task already running stopped at the deadline instead of finishing
+    # abandoned work, and the queued ones never started
+    (optimize_games, optimize_played), (task_games, task_played) = one_worker
+    assert optimize_played < optimize_games and task_played < task_games
+
+def test_deadline_cuts_a_task_short(probabilities, monkeypatch):
+    # a clock that passes the deadline after the first batch
+    clock = itertools.chain([0], itertools.repeat(200))
+    monkeypatch.setattr(simulate, "time", SimpleNamespace(time=lambda: next(clock)))
+    runs = simulate.simulate_games(probabilities, 50_000, 7, 1, deadline=100)
+    assert len(runs) == simulate.GAMES_PER_CHECK
+    assert len(simulate.simulate_games(probabilities, 50_000, 7, 1, deadline=0)) == 0
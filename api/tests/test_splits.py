@@ -0,0 +1,45 @@
+"""/stats/aggregate/splits: one bucket per split key, summed like /stats/aggregate."""
+import pytest
+
+@pytest.fixture
+def season(client, admin):
+    """Two players; the Owls are played in April and May, the Jays in May."""
+    players = [client.post("/players", json={"first_name": f, "last_name": "Diaz"}, headers=admin).json()["id"]
+               for f in ("Ana", "Bea")]
+    games = [client.post("/games", json={"opponent": o, "date": d, "location": loc}, headers=admin).json()["id"]
+             for o, d, loc in (("Owls", "2025-04-10", "Field 1"), ("Owls", "2025-05-02", "Field 2"),
+                               ("Jays", "2025-05-20", "Field 1"))]
+    lines = [
+        {"player_id": players[0], "game_id": games[0], "at_bats": 4, "hits": 2, "singles": 2},
+        {"player_id": players[1], "game_id": games[0], "at_bats": 3, "hits": 1, "home_runs": 1},
+        {"player_id": players[0], "game_id": games[1], "at_bats": 4, "hits": 1, "doubles": 1},
+        {"player_id": players[1], "game_id": games[2], "at_bats": 2, "hits": 0, "walks": 2},
+    ]
+    assert client.post("/stats/bulk", json={"lines": lines}, headers=admin).json()["errors"] == 0
+    return players, games
+
+def test_buckets_by_opponent_and_month(client, season):
+    by_opponent = client.get("/stats/aggregate/splits", params={"group_by": "opponent"}).json()
+    assert [(b["split"], b["games"], b["at_bats"], b["hits"]) for b in by_opponent] == [
+        ({"opponent": "Jays"}, 1, 2, 0),
+        ({"opponent": "Owls"}, 2, 11, 4),
+    ]
+    assert by_opponent[1]["average"] == round(4 / 11, 3)
+
+    combined = client.get("/stats/aggregate/splits", params={"group_by": "opponent,month"}).json()
+    assert [(b["split"], b["hits"]) for b in combined] == [
+        ({"opponent": "Jays", "month": "2025-05"}, 0),
+        ({"opponent": "Owls", "month": "2025-04"}, 3),
+        ({"opponent": "Owls", "month": "2025-05"}, 1),
+    ]
+
+    # the buckets add up to /stats/aggregate under the same filters
+    params = {"date_from": "2025-05-01"}
+    may = client.get("/stats/aggregate/splits", params={"group_by": "location", **params}).json()
+    total = client.get("/stats/aggregate", params=params).json()
+    for field in ("at_bats", "hits", "walks", "doubles"):
+        assert sum(b[field] for b in may) == total[field]
+
+def test_unknown_or_missing_split_is_400(client):
+    assert client.get("/stats/aggregate/splits", params={"group_by": "weather"}).status_code == 400
+    assert client.get("/stats/aggregate/splits", params={"group_by": ","}).status_code == 400
@@ -0,0 +1,107 @@
+"""
+Two teams on two SQLite files (plus a second team on the first file):
+reads and writes stay on the caller's team and shard, and admin routes
+take only that team's token.
+"""
+import sqlite3
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import create_app
+from app.settings import Settings, Team
+from conftest import migrate, seed
+
+HAWKS = Team(1, "hawks", "hawks-token")
+OWLS = Team(2, "owls", "owls-token")
+JAYS = Team(3, "jays", "jays-token", "b")
+# (players, games): the jays have more of both, so some of their ids are
+# past anything on the default shard
+SIZES = {"hawks": (3, 2), "owls": (3, 2), "jays": (8, 4)}
+
+@pytest.fixture
+def shards(tmp_path, monkeypatch) -> dict[str, str]:
+    paths = {"default": tmp_path / "a.db", "b": tmp_path / "b.db"}
+    for path in paths.values():
+        migrate(f"sqlite:///{path}", monkeypatch)
+    return paths
+
+@pytest.fixture
+def ids(shards) -> dict[str, tuple[list[int], list[int]]]:
+    return {team.slug: seed(f"sqlite:///{shards[team.shard]}", *SIZES[team.slug], team.id,
+                            first_name=team.slug)
+            for team in (HAWKS, OWLS, JAYS)}
+
+@pytest.fixture
+def client(shards, ids, tmp_path):
+    settings = Settings(database_url=f"sqlite:///{shards['default']}",
+                        shards=(("b", f"sqlite:///{shards['b']}"),),
+                        teams=(HAWKS, OWLS, JAYS),
+                        data_version_file=str(tmp_path / "version"))
+    with TestClient(create_app(settings)) as client:
+        yield client
+
+def as_team(team: Team, token: str | None = None) -> dict:
+    headers = {"X-Team": team.slug}
+    if token is not None:
+        headers["Authorization"] = f"Bearer {token}"
+    return headers
+
+def count(path, sql: str) -> int:
+    with sqlite3.connect(path) as conn:
+        return conn.execute(sql).fetchone()[0]
+
+@pytest.mark.parametrize("team", [HAWKS, OWLS, JAYS])
+def test_reads_see_only_the_callers_team(client, ids, team):
+    players = client.get("/players", headers=as_team(team)).json()
+    assert sorted(p["id"] for p in players) == sorted(ids[team.slug][0])
+    assert {p["first_name"] for p in players} == {team.slug}
+
+    stats = client.get("/stats", headers=as_team(team)).json()
+    players, games = SIZES[team.slug]
+    assert len(stats) == players * games
+    assert {s["player_first_name"] for s in stats} == {team.slug}
+
+    search = client.get("/players/search", params={"prefix": "last"}, headers=as_team(team)).json()
+    assert {p["id"] for p in search} <= set(ids[team.slug][0])
+
+@pytest.mark.parametrize("team, other", [(HAWKS, OWLS), (OWLS, HAWKS), (HAWKS, JAYS), (OWLS, JAYS)])
+def test_other_teams_rows_are_not_found(client, ids, team, other):
+    other_players, other_games = ids[other.slug]
+    headers = as_team(team)
+    # ids can repeat across shards, so only ask for ones the caller doesn't have
+    player = next(p for p in other_players if p not in ids[team.slug][0])
+    game = next(g for g in other_games if g not in ids[team.slug][1])
+    assert client.get(f"/players/{player}/trend", headers=headers).status_code == 404
+    assert client.get("/stats", params={"player_id": player}, headers=headers).json() == []
+    assert client.get(f"/games/{game}/boxscore", headers=headers).status_code == 404
+
+def test_writes_land_on_the_teams_shard(client, shards):
+    response = client.post("/players", json={"first_name": "New", "last_name": "Jay"},
+                           headers=as_team(JAYS, JAYS.admin_token))
+    assert response.status_code == 201
+    new = "SELECT count(*) FROM players WHERE first_name = 'New'"
+    assert count(shards["b"], new) == 1
+    assert count(shards["default"], new) == 0
+
+def test_cannot_write_another_teams_player(client, ids):
+    owl, game = ids["owls"][0][0], ids["hawks"][1][0]
+    response = client.post("/stats", json={"player_id": owl, "game_id": game, "at_bats": 1},
+                           headers=as_team(HAWKS, HAWKS.admin_token))
+    assert response.status_code == 404
+
+@pytest.mark.parametrize("token, status", [
+    (None, 401),
+    ("", 401),
+    ("wrong-token", 403),
+    (HAWKS.admin_token, 403),   # another team's token
+    (OWLS.admin_token, 403),    # another team's token on the same shard
+])
+def test_admin_routes_take_only_the_teams_token(client, token, status):
+    response = client.post("/players", json={"first_name": "No", "last_name": "Body"},
+                           headers=as_team(JAYS, token))
+    assert response.status_code == status
+    assert client.get("/players", headers=as_team(JAYS)).json()[-1]["first_name"] == "jays"
+
+def test_team_is_required_when_there_are_several(client):
+    assert client.get("/players").status_code == 400
+    assert client.get("/players", headers={"X-Team": "nobody"}).status_code == 404
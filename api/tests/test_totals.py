@@ -0,0 +1,41 @@
+"""
+player_totals is moved by deltas on every write; a full recompute from
+player_game_stats must find nothing to correct afterwards.
+"""
+from sqlalchemy import create_engine, text
+from conftest import seed
+
+def line(player_id, game_id, hits, **extra):
+    return {"player_id": player_id, "game_id": game_id, "at_bats": 4, "hits": hits,
+            "singles": hits, **extra}
+
+def test_writes_through_the_api_leave_no_drift(client, admin, database_url):
+    players, games = seed(database_url, players=4, games=3)
+    new_game = seed(database_url, players=0, games=1)[1][0]
+
+    # create, update and re-update single lines
+    for body in (line(players[0], new_game, 1, walks=1),
+                 line(players[0], new_game, 3, rbis=2),
+                 line(players[1], games[0], 0, strikeouts=2)):
+        assert client.post("/stats", json=body, headers=admin).status_code == 201
+    # a bulk batch that mixes creates, updates and a repeated key
+    bulk = [line(p, new_game, 2) for p in players[1:]] + [
+        line(players[2], games[1], 4, walks=1), line(players[3], new_game, 1, errors=1),
+    ]
+    response = client.post("/stats/bulk", json={"lines": bulk}, headers=admin)
+    assert response.status_code == 200 and response.json()["errors"] == 0
+
+    report = client.post("/stats/totals/rebuild", headers=admin).json()
+    assert report == {"players": 4, "drift": []}
+
+def test_rebuild_reports_and_repairs_drift(client, admin, database_url):
+    players, _ = seed(database_url, players=2, games=2)
+    engine = create_engine(database_url)
+    with engine.begin() as conn:
+        conn.execute(text("UPDATE player_totals SET hits = hits + 5 WHERE player_id = :p"),
+                     {"p": players[0]})
+    engine.dispose()
+
+    report = client.post("/stats/totals/rebuild", headers=admin).json()
+    assert report["drift"] == [{"player_id": players[0], "field": "hits", "stored": 9, "actual": 4}]
+    assert client.post("/stats/totals/rebuild", headers=admin).json()["drift"] == []
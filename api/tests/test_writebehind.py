@@ -0,0 +1,149 @@
+"""
+POST /stats/deferred journals each line before acknowledging it. Flushes
+rotate the journal, shutdown flushes what is left, and a journal left by a
+worker that died is replayed into the database exactly once.
+"""
+import fcntl
+import glob
+import os
+import subprocess
+import sys
+import textwrap
+from dataclasses import replace
+import orjson
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+from app.bulk import LINE_FIELDS
+from app.cache import DataVersion
+from app.main import create_app
+from conftest import API_DIR, seed
+
+def line(player_id, game_id, hits):
+    return {"player_id": player_id, "game_id": game_id, "at_bats": 4, "hits": hits, "singles": hits}
+
+def queued(player_id, game_id, hits) -> tuple:
+    """put() arguments for a line on the default team."""
+    values = line(player_id, game_id, hits)
+    return 1, player_id, game_id, {f: values.get(f, 0) for f in LINE_FIELDS}
+
+@pytest.fixture
+def journal_settings(settings, tmp_path):
+    # the timer never fires during a test; flushes happen only where a test asks
+    return replace(settings, write_behind_journal=str(tmp_path / "journal"),
+                   write_behind_flush_ms=60_000)
+
+def journals(settings) -> list[str]:
+    return sorted(os.path.basename(p) for p in glob.glob(os.path.join(settings.write_behind_journal, "*")))
+
+def hits(database_url) -> dict[int, int]:
+    engine = create_engine(database_url)
+    with engine.connect() as conn:
+        rows = dict(conn.execute(text("SELECT player_id, hits FROM player_game_stats")).all())
+    engine.dispose()
+    return rows
+
+def crash_with_queued(settings, entries: list[tuple]):
+    """put() `entries` in another process that then dies without flushing."""
+    script = textwrap.dedent(f"""
+        import asyncio, os
+        from app import live
+        from app.cache import DataVersion
+        from app.db import Databases
+        from app.settings import Settings
+        from app.writebehind import WriteBehindQueue
+
+        async def main():
+            settings = Settings(database_url={settings.database_url!r},
+                                data_version_file={settings.data_version_file!r})
+            queue = WriteBehindQueue(60_000, 200, {settings.write_behind_journal!r})
+            await queue.start(Databases(settings), DataVersion(settings.data_version_file),
+                              live.LocalBroker())
+            for entry in {entries!r}:
+                queue.put(*entry)
+            os._exit(1)
+
+        asyncio.run(main())
+    """)
+    result = subprocess.run([sys.executable, "-c", script], cwd=API_DIR)
+    assert result.returncode == 1
+
+def test_crashed_workers_journal_is_replayed_once(journal_settings, database_url, admin):
+    (p0, p1), (game,) = seed(database_url, players=2, games=1)
+    crash_with_queued(journal_settings, [queued(p0, game, 1), queued(p0, game, 3),
+                                         queued(p1, game, 0)])
+    (orphan,) = glob.glob(os.path.join(journal_settings.write_behind_journal, "*"))
+    with open(orphan, "ab") as f:
+        f.write(b'{"team_id": 1, "player_id": ')  # torn by the crash
+    version = DataVersion(journal_settings.data_version_file)
+    before = version.get()
+
+    with TestClient(create_app(journal_settings)):
+        # the latest line per key, written in one batch
+        assert hits(database_url) == {p0: 3, p1: 0}
+        assert version.get() == before + 1
+    assert journals(journal_settings) == []
+
+    # nothing left to replay on the next start
+    with TestClient(create_app(journal_settings)) as client:
+        assert version.get() == before + 1
+        assert client.post("/stats/totals/rebuild", headers=admin).json()["drift"] == []
+
+def test_live_workers_journal_is_left_alone(journal_settings, database_url):
+    (p0,), (game,) = seed(database_url, players=1, games=1)
+    os.makedirs(journal_settings.write_behind_journal)
+    path = os.path.join(journal_settings.write_behind_journal, "stats-1.journal")
+    with open(path, "wb") as held:
+        fcntl.flock(held, fcntl.LOCK_EX)
+        team_id, player_id, game_id, values = queued(p0, game, 0)
+        held.write(orjson.dumps({"team_id": team_id, "player_id": player_id,
+                                 "game_id": game_id, "line": values}) + b"\n")
+        held.flush()
+        with TestClient(create_app(journal_settings)):
+            assert hits(database_url) == {p0: 2}
+        assert os.path.exists(path)
+
+    # once its owner is gone it is an orphan like any other
+    with TestClient(create_app(journal_settings)):
+        assert hits(database_url) == {p0: 0}
+
+def test_flush_rotates_the_journal(journal_settings, database_url, admin, monkeypatch):
+    (p0, p1), (game,) = seed(database_url, players=2, games=1)
+    live_journal = f"stats-{os.getpid()}.journal"
+    with TestClient(create_app(journal_settings)) as client:
+        queue = client.app.state.stat_queue
+        for body in (line(p0, game, 1), line(p0, game, 0)):
+            assert client.post("/stats/deferred", json=body, headers=admin).status_code == 202
+        path = os.path.join(journal_settings.write_behind_journal, live_journal)
+        with open(path, "rb") as f:
+            assert len(f.readlines()) == 2
+
+        write = queue._write
+        during = {}
+
+        def observed_write(lines):
+            # the flushed lines have moved aside; new ones go to a fresh journal
+            during["files"] = journals(journal_settings)
+            during["live"] = os.path.getsize(path)
+            queue.put(*queued(p1, game, 4))
+            write(lines)
+
+        monkeypatch.setattr(queue, "_write", observed_write)
+        assert queue.flush() == 1
+        monkeypatch.undo()
+
+        assert during == {"files": [live_journal, f"{live_journal}.1.flushing"], "live": 0}
+        assert journals(journal_settings) == [live_journal]
+        with open(path, "rb") as f:
+            assert len(f.readlines()) == 1
+        assert hits(database_url) == {p0: 0, p1: 2}
+
+def test_shutdown_flushes_queued_lines(journal_settings, database_url, admin):
+    (p0,), (game,) = seed(database_url, players=1, games=1)
+    with TestClient(create_app(journal_settings)) as client:
+        response = client.post("/stats/deferred", json=line(p0, game, 4), headers=admin)
+        assert response.status_code == 202 and response.json()["pending"] == 1
+        assert hits(database_url) == {p0: 2}
+    assert hits(database_url) == {p0: 4}
+    assert journals(journal_settings) == []
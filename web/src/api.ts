@@ -86,11 +86,16 @@ export type StatInput = {
 
 function getToken() { return localStorage.getItem("ADMIN_TOKEN") || ""; }
 
+const TEAM = import.meta.env.VITE_TEAM_SLUG || "";
+
 api.interceptors.request.use((config) => {
   const t = getToken();
   if (t && config && config.headers) {
     (config.headers as any).Authorization = `Bearer ${t}`;
   }
+  if (TEAM && config && config.headers) {
+    (config.headers as any)["X-Team"] = TEAM;
+  }
   return config;
 });
 